@@ -1,22 +1,42 @@
-from fastapi import FastAPI, Depends
+from fastapi import FastAPI, Depends, Request
 from fastapi.middleware.cors import CORSMiddleware
 from sqlalchemy.orm import Session
+from contextlib import asynccontextmanager
 import os
 from datetime import datetime
 import json
 
 from .database import engine, Base, get_db
 from .models import models
-from .routers import backtest, screen, journal, strategies
+from .routers import backtest, screen, journal, strategies, data, admin
+from .services.scheduler import screen_scheduler, SCREEN_SCHEDULER_ENABLED
+from .services.journal_stats import rebuild_journal_stats
+from .services.profiling import memory_profiler, MEMORY_PROFILING
+from .services.screen_hits import save_screen_hits
+from .services.compute import compute_pool
+from .services.http_cache import versions
 
 # Erstelle die Tabellen in der Datenbank
 Base.metadata.create_all(bind=engine)
 
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Speicherprofilierung (opt-in über MEMORY_PROFILING)
+    if MEMORY_PROFILING:
+        memory_profiler.enable()
+    # Scheduler für die geplanten End-of-Day-Screenings starten
+    if SCREEN_SCHEDULER_ENABLED:
+        screen_scheduler.start()
+    yield
+    await screen_scheduler.stop()
+    compute_pool.close()
+
 # FastAPI-App initialisieren
 app = FastAPI(
     title="Trading App API",
     description="API für Backtest, Screening und Trading Journal",
     version="0.1.0",
+    lifespan=lifespan,
 )
 
 # CORS-Middleware hinzufügen, damit das Frontend zugreifen kann
@@ -28,14 +48,23 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Speicherbilanz je Anfrage, solange die Profilierung aktiv ist
+@app.middleware("http")
+async def memory_profile_requests(request: Request, call_next):
+    with memory_profiler.request(f"{request.method} {request.url.path}"):
+        return await call_next(request)
+
 # Router einbinden
 app.include_router(backtest.router)
 app.include_router(screen.router)
 app.include_router(journal.router)
 app.include_router(strategies.router)
+app.include_router(data.router)
+app.include_router(admin.router)
 
+# Leichte Endpunkte ohne blockierende Zugriffe laufen direkt in der Event-Loop
 @app.get("/")
-def read_root():
+async def read_root():
     return {
         "message": "Trading App API",
         "version": "0.1.0",
@@ -49,7 +78,7 @@ def read_root():
     }
 
 @app.get("/health")
-def health_check():
+async def health_check():
     return {
         "status": "ok",
         "timestamp": datetime.now().isoformat()
@@ -142,6 +171,10 @@ def create_demo_data(db: Session = Depends(get_db)):
         db.add_all(trades)
         db.commit()
         
+        # Journal-Statistik für die Beispiel-Trades aufbauen
+        rebuild_journal_stats(db)
+        db.commit()
+        
         # Beispiel-Backtest-Ergebnisse
         backtest_results = [
             models.BacktestResult(
@@ -155,6 +188,8 @@ def create_demo_data(db: Session = Depends(get_db)):
                 sharpe_ratio=0.87,
                 max_drawdown=12.3,
                 cagr=8.9,
+                win_rate=58.33,
+                net_profit_percent=8.9,
                 metrics={
                     "win_rate": 58.33,
                     "avg_win": 523.45,
@@ -174,6 +209,8 @@ def create_demo_data(db: Session = Depends(get_db)):
                 sharpe_ratio=1.12,
                 max_drawdown=8.4,
                 cagr=11.3,
+                win_rate=61.11,
+                net_profit_percent=11.3,
                 metrics={
                     "win_rate": 61.11,
                     "avg_win": 648.32,
@@ -216,7 +253,10 @@ def create_demo_data(db: Session = Depends(get_db)):
         ]
         
         db.add_all(screens)
+        db.flush()
+        save_screen_hits(db, screens)
         db.commit()
+        versions.invalidate("strategies", "backtests", "screens")
         
         return {"message": "Demo-Daten erfolgreich erstellt"}
     
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Float, DateTime, ForeignKey, JSON, Boolean, Text
+from sqlalchemy import Column, Integer, String, Float, DateTime, ForeignKey, JSON, Boolean, Text, UniqueConstraint, Index, text
 from sqlalchemy.orm import relationship
 from datetime import datetime
 
@@ -37,32 +37,159 @@ class Trade(Base):
     updated_at = Column(DateTime, default=datetime.now, onupdate=datetime.now)
 
 
+class JournalSummary(Base):
+    __tablename__ = "journal_summary"
+    
+    id = Column(Integer, primary_key=True)  # Genau eine Zeile (id=1)
+    closed_trades = Column(Integer, default=0)
+    winning_trades = Column(Integer, default=0)
+    losing_trades = Column(Integer, default=0)
+    gross_profit = Column(Float, default=0.0)
+    gross_loss = Column(Float, default=0.0)
+    updated_at = Column(DateTime, default=datetime.now, onupdate=datetime.now)
+
+
+class JournalDailyPnl(Base):
+    __tablename__ = "journal_daily_pnl"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    date = Column(DateTime, unique=True, index=True)
+    pnl = Column(Float, default=0.0)
+    trades = Column(Integer, default=0)
+    # Laufende Werte der Equity-Kurve bis einschließlich dieses Tages
+    equity = Column(Float)
+    peak = Column(Float)
+    drawdown = Column(Float)
+    max_drawdown = Column(Float)
+
+
+class JournalSetupStats(Base):
+    __tablename__ = "journal_setup_stats"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    setup_type = Column(String, unique=True, index=True)
+    trades = Column(Integer, default=0)
+    winning_trades = Column(Integer, default=0)
+    gross_profit = Column(Float, default=0.0)
+    gross_loss = Column(Float, default=0.0)
+
+
 class BacktestResult(Base):
     __tablename__ = "backtest_results"
     
     id = Column(Integer, primary_key=True, index=True)
-    strategy_id = Column(Integer, ForeignKey("strategies.id"))
+    strategy_id = Column(Integer, ForeignKey("strategies.id"), index=True)
     start_date = Column(DateTime)
     end_date = Column(DateTime)
-    total_trades = Column(Integer)
+    total_trades = Column(Integer, index=True)
     winning_trades = Column(Integer)
     losing_trades = Column(Integer)
-    profit_factor = Column(Float)
-    sharpe_ratio = Column(Float, nullable=True)
-    max_drawdown = Column(Float)
-    cagr = Column(Float, nullable=True)
+    # Indizierte Kennzahlen für Ranglisten (/backtest/leaderboard)
+    profit_factor = Column(Float, index=True)
+    sharpe_ratio = Column(Float, nullable=True, index=True)
+    max_drawdown = Column(Float, index=True)
+    cagr = Column(Float, nullable=True, index=True)
+    win_rate = Column(Float, nullable=True, index=True)
+    net_profit_percent = Column(Float, nullable=True, index=True)
     metrics = Column(JSON, nullable=True)  # Weitere metrische Daten
-    created_at = Column(DateTime, default=datetime.now)
+    created_at = Column(DateTime, default=datetime.now, index=True)
     
     strategy = relationship("Strategy", back_populates="backtest_results")
 
 
+class BacktestTrade(Base):
+    __tablename__ = "backtest_trades"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    backtest_id = Column(Integer, ForeignKey("backtest_results.id"), index=True)
+    ticker = Column(String, index=True)
+    entry_date = Column(DateTime)
+    exit_date = Column(DateTime)
+    entry_price = Column(Float)
+    exit_price = Column(Float)
+    position_size = Column(Float)
+    profit_loss = Column(Float)
+    profit_loss_percent = Column(Float)
+
+
+class BacktestEquityPoint(Base):
+    __tablename__ = "backtest_equity"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    backtest_id = Column(Integer, ForeignKey("backtest_results.id"), index=True)
+    seq = Column(Integer)  # Reihenfolge innerhalb der Equity-Kurve
+    date = Column(DateTime)
+    equity = Column(Float)
+
+
 class Screen(Base):
     __tablename__ = "screens"
+    __table_args__ = (
+        Index("ix_screens_name_date", "name", "date"),
+        # Nur PostgreSQL: Suche nach Tickern in results (GET /screen/by-ticker/{ticker}?source=jsonb)
+        Index(
+            "ix_screens_results_tickers_gin",
+            text("((results::jsonb) -> 'tickers') jsonb_path_ops"),
+            postgresql_using="gin"
+        ).ddl_if(dialect="postgresql"),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
+    name = Column(String, nullable=True)  # Name des geplanten Screenings (materialisierte Ergebnisse)
     date = Column(DateTime, default=datetime.now)
     filter_criteria = Column(JSON)
     results = Column(JSON)  # Liste der gefundenen Ticker
     notes = Column(Text, nullable=True)
     created_at = Column(DateTime, default=datetime.now)
+    updated_at = Column(DateTime, default=datetime.now, onupdate=datetime.now)  # z.B. durch /refresh
+
+
+class ScheduledScreen(Base):
+    __tablename__ = "scheduled_screens"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    name = Column(String, unique=True, index=True)
+    filter_criteria = Column(JSON)
+    tickers = Column(JSON)  # Universum, auf das das Screening angewendet wird
+    is_active = Column(Boolean, default=True)
+    last_run_at = Column(DateTime, nullable=True)
+    created_at = Column(DateTime, default=datetime.now)
+    updated_at = Column(DateTime, default=datetime.now, onupdate=datetime.now)
+
+
+class ScreenTickerState(Base):
+    __tablename__ = "screen_ticker_states"
+    __table_args__ = (UniqueConstraint("screen_id", "ticker"),)
+    
+    id = Column(Integer, primary_key=True, index=True)
+    screen_id = Column(Integer, ForeignKey("screens.id"), index=True)
+    ticker = Column(String, index=True)
+    data_version = Column(String)  # Versionskennung der Kursdaten bei der letzten Auswertung
+    matched = Column(Boolean, default=False)
+    result = Column(JSON, nullable=True)  # Ergebnis-Eintrag, falls der Ticker passt
+    evaluated_at = Column(DateTime, default=datetime.now, onupdate=datetime.now)
+
+
+class ScreenHit(Base):
+    """
+    Umgekehrter Index: ein Ticker im Ergebnis eines gespeicherten Screenings
+    """
+    __tablename__ = "screen_hits"
+    __table_args__ = (Index("ix_screen_hits_ticker_date", "ticker", "date"),)
+    
+    id = Column(Integer, primary_key=True, index=True)
+    screen_id = Column(Integer, ForeignKey("screens.id"), index=True)
+    ticker = Column(String)
+    date = Column(DateTime)  # Datum des Screenings (für Zeitraumabfragen je Ticker)
+
+
+class CorporateAction(Base):
+    __tablename__ = "corporate_actions"
+    __table_args__ = (Index("ix_corporate_actions_ticker_ex_date", "ticker", "ex_date"),)
+    
+    id = Column(Integer, primary_key=True, index=True)
+    ticker = Column(String)
+    ex_date = Column(DateTime)
+    action_type = Column(String)  # "split" oder "dividend"
+    value = Column(Float)  # Split-Verhältnis (z.B. 2.0 bei 2:1) bzw. Dividende je Aktie
+    created_at = Column(DateTime, default=datetime.now)
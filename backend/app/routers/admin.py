@@ -0,0 +1,84 @@
+from fastapi import APIRouter, Body, HTTPException, Query
+from typing import List, Dict, Any
+import tracemalloc
+
+from ..services.compute import compute_pool
+from ..services.profiling import memory_profiler, memory_limit_bytes, process_memory_bytes
+
+router = APIRouter(
+    prefix="/admin",
+    tags=["admin"],
+    responses={404: {"description": "Not found"}},
+)
+
+@router.get("/memory", response_model=Dict[str, Any])
+def get_memory_status():
+    """
+    Gibt den aktuellen Speicherverbrauch, die weiche Speichergrenze und den
+    Status der Profilierung zurück
+    """
+    status = {
+        "profiling_enabled": memory_profiler.enabled,
+        "process_memory_bytes": process_memory_bytes(),
+        "soft_limit_bytes": memory_limit_bytes()
+    }
+    if memory_profiler.enabled:
+        current, peak = tracemalloc.get_traced_memory()
+        status["traced_current_bytes"] = current
+        status["traced_peak_bytes"] = peak
+    return status
+
+@router.post("/memory/profiling", response_model=Dict[str, Any])
+def set_memory_profiling(
+    enabled: bool = Body(..., embed=True),
+    frames: int = Body(1, ge=1, le=50, embed=True)
+):
+    """
+    Schaltet die Speicherprofilierung (tracemalloc) zur Laufzeit ein oder aus.
+    frames bestimmt die Tiefe der aufgezeichneten Stacks der Allokationsstellen.
+    """
+    if enabled:
+        memory_profiler.enable(frames)
+    else:
+        memory_profiler.disable()
+    return {"profiling_enabled": memory_profiler.enabled}
+
+@router.get("/memory/requests", response_model=List[Dict[str, Any]])
+def list_memory_profiles(limit: int = Query(20, ge=1, le=1000)):
+    """
+    Gibt die Speicherprofile der zuletzt bearbeiteten Anfragen zurück
+    (Spitzen- und Nettoverbrauch, aufgeschlüsselt nach Stages)
+    """
+    return memory_profiler.profiles(limit)
+
+@router.get("/memory/top", response_model=List[Dict[str, Any]])
+def get_top_allocations(
+    limit: int = Query(25, ge=1, le=500),
+    group_by: str = Query("lineno", pattern="^(lineno|filename|traceback)$"),
+    compare: bool = Query(True)
+):
+    """
+    Gibt die größten Allokationsstellen zurück, mit compare als Zuwachs
+    gegenüber der Vergleichsbasis (beim Einschalten bzw. POST /admin/memory/baseline)
+    """
+    if not memory_profiler.enabled:
+        raise HTTPException(status_code=409, detail="Speicherprofilierung ist nicht aktiv")
+    return memory_profiler.top_allocations(limit, group_by, compare)
+
+@router.post("/memory/baseline", response_model=Dict[str, Any])
+def reset_memory_baseline():
+    """
+    Setzt die Vergleichsbasis für die Allokationsstellen auf den aktuellen Stand
+    """
+    if not memory_profiler.enabled:
+        raise HTTPException(status_code=409, detail="Speicherprofilierung ist nicht aktiv")
+    memory_profiler.reset_baseline()
+    return {"message": "Vergleichsbasis wurde zurückgesetzt"}
+
+@router.get("/compute", response_model=Dict[str, Any])
+async def get_compute_status():
+    """
+    Gibt die Auslastung des Compute-Pools zurück (laufende und wartende
+    rechenintensive Anfragen, Anzahl der mit 429 abgewiesenen Anfragen)
+    """
+    return compute_pool.stats()
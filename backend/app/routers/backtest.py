@@ -1,12 +1,28 @@
-from fastapi import APIRouter, Depends, HTTPException, Body
+from fastapi import APIRouter, Depends, HTTPException, Body, Query, Request, UploadFile, File, WebSocket, WebSocketDisconnect
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import Response, StreamingResponse
+from sqlalchemy import func, insert, select
 from sqlalchemy.orm import Session
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Iterable, Optional
 from datetime import datetime, timedelta
+import asyncio
+import math
 import pandas as pd
 
-from ..database import get_db
-from ..models.models import Strategy, BacktestResult
-from ..services.trading_service import run_backtest
+from ..database import get_db, SessionLocal
+from ..models.models import Strategy, BacktestResult, BacktestTrade, BacktestEquityPoint
+from ..services.trading_service import run_backtest, run_backtest_compare, BacktestAccumulator
+from ..services.montecarlo import run_montecarlo
+from ..services.executors import BACKTEST_EXECUTOR, get_executor, run_backtest_distributed
+from ..services.profiling import profile_stage
+from ..services.http_cache import conditional_get, strong_etag, weak_etag, versions
+from ..services.strategies import resolve_strategy
+from ..services.compute import compute_pool
+from ..services.jobs import jobs, run_with_disconnect_watch, CancellationToken
+from ..services.serialization import negotiate_response
+from ..services.archive import export_backtests, import_backtests
+from ..services.streaming import run_backtest_streaming, iter_spilled_trades, discard_spill
+from ..services.universe import resolve_request_tickers
 
 router = APIRouter(
     prefix="/backtest",
@@ -15,94 +31,447 @@ router = APIRouter(
 )
 
 @router.post("/", response_model=Dict[str, Any])
-def create_backtest(
-    tickers: List[str] = Body(...),
+async def create_backtest(
+    request: Request,
+    tickers: Optional[List[str]] = Body(None),
+    universe: Optional[str] = Body(None),
+    adjustment: str = Body("none", pattern="^(none|split|total_return)$"),
     strategy_id: Optional[int] = Body(None),
     strategy_params: Dict[str, Any] = Body(...),
     start_date: str = Body(...),
     end_date: str = Body(...),
     save_results: bool = Body(True),
+    job_id: Optional[str] = Body(None),
+    max_seconds: Optional[float] = Body(None),
+    executor: Optional[str] = Body(None, pattern="^(inprocess|process|tcp)$"),
     db: Session = Depends(get_db)
 ):
     """
-    Führt einen Backtest durch und speichert die Ergebnisse optional in der Datenbank
+    Führt einen Backtest durch und speichert die Ergebnisse optional in der Datenbank.
+    Der Backtest lässt sich über DELETE /backtest/jobs/{job_id} abbrechen und
+    endet automatisch, wenn der Client die Verbindung trennt oder max_seconds
+    überschritten wird. Teilergebnisse werden mit partial=True markiert und
+    nicht gespeichert.
+    
+    Mit Accept: application/vnd.apache.arrow.stream werden die Trades (bzw.
+    ?table=equity_curve) als Arrow-IPC-Stream geliefert.
+    
+    Statt tickers kann universe (z.B. "SP500") angegeben werden: Getestet
+    werden alle Ticker, die im Zeitraum Mitglied waren, und Einstiege sind
+    nur an Tagen mit Mitgliedschaft möglich. adjustment wählt unadjustierte,
+    split-adjustierte oder Total-Return-Kurse.
+    
+    executor wählt das Ausführungs-Backend (inprocess, process oder tcp,
+    Standard: BACKTEST_EXECUTOR). Mit process bzw. tcp werden die Ticker in
+    Paketen auf einen lokalen Prozess-Pool bzw. auf Worker-Knoten verteilt.
+    """
+    job_id, token = jobs.register("backtest", job_id, max_seconds)
+    try:
+        results = await run_with_disconnect_watch(
+            request, token, _execute_backtest,
+            db, tickers, universe, adjustment, strategy_id, strategy_params, start_date, end_date, save_results, job_id, token,
+            executor
+        )
+    finally:
+        jobs.finish(job_id, token)
+    
+    return negotiate_response(
+        request,
+        results,
+        tables={"trades": results["trades"], "equity_curve": results["equity_curve"]},
+        default_table="trades"
+    )
+
+def _execute_backtest(
+    db: Session,
+    tickers: Optional[List[str]],
+    universe: Optional[str],
+    adjustment: str,
+    strategy_id: Optional[int],
+    strategy_params: Dict[str, Any],
+    start_date: str,
+    end_date: str,
+    save_results: bool,
+    job_id: str,
+    token: CancellationToken,
+    executor: Optional[str] = None
+) -> Dict[str, Any]:
+    """
+    Blockierender Teil von create_backtest, läuft im Compute-Pool
     """
     try:
         # Datumskonvertierung
         start = datetime.strptime(start_date, "%Y-%m-%d")
         end = datetime.strptime(end_date, "%Y-%m-%d")
         
+        # Ticker aus Liste und/oder Universum (Mitglieder im Zeitraum)
+        tickers, membership = resolve_request_tickers(tickers, universe, start, end)
+        
         # Überprüfe, ob die angegebene Strategie existiert
         strategy = None
         if strategy_id:
             strategy = db.query(Strategy).filter(Strategy.id == strategy_id).first()
             if not strategy:
                 raise HTTPException(status_code=404, detail=f"Strategie mit ID {strategy_id} nicht gefunden")
+            # Parameter der gespeicherten Strategie, durch die Anfrage überschreibbar
+            strategy_params = {**(strategy.parameters or {}), **strategy_params}
+        try:
+            resolve_strategy(strategy_params)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        
+        # Führe den Backtest durch (im Webprozess oder verteilt)
+        executor = executor or BACKTEST_EXECUTOR
+        if executor == "inprocess":
+            results = run_backtest(
+                strategy_params=strategy_params,
+                tickers=tickers,
+                start_date=start,
+                end_date=end,
+                cancel_token=token,
+                universe=membership,
+                adjustment=adjustment
+            )
+        else:
+            results = run_backtest_distributed(
+                strategy_params=strategy_params,
+                tickers=tickers,
+                start_date=start,
+                end_date=end,
+                executor=get_executor(executor),
+                cancel_token=token,
+                universe_name=membership.name if membership else None,
+                adjustment=adjustment
+            )
+        results['job_id'] = job_id
         
-        # Führe den Backtest durch
-        results = run_backtest(
+        # Speichere die Ergebnisse, falls gewünscht (keine Teilergebnisse)
+        if save_results and results['trades'] and not results.get('partial'):
+            with profile_stage("save"):
+                _save_backtest_results(db, results, strategy, strategy_params, tickers, start, end)
+        
+        return results
+    
+    except HTTPException:
+        db.rollback()
+        raise
+    except Exception as e:
+        db.rollback()
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.post("/streaming", response_model=Dict[str, Any])
+async def create_streaming_backtest(
+    request: Request,
+    tickers: Optional[List[str]] = Body(None),
+    universe: Optional[str] = Body(None),
+    adjustment: str = Body("none", pattern="^(none|split|total_return)$"),
+    strategy_id: Optional[int] = Body(None),
+    strategy_params: Dict[str, Any] = Body(...),
+    start_date: str = Body(...),
+    end_date: str = Body(...),
+    save_results: bool = Body(True),
+    memory_limit_mb: Optional[int] = Body(None, gt=0),
+    job_id: Optional[str] = Body(None),
+    max_seconds: Optional[float] = Body(None),
+    db: Session = Depends(get_db)
+):
+    """
+    Führt einen Backtest über ein großes Universum mit begrenztem Speicher
+    aus (Standard: BACKTEST_MEMORY_LIMIT_MB). Die Trades werden während der
+    Berechnung in eine temporäre Parquet-Datei ausgelagert und beim Speichern
+    batchweise übernommen; die Antwort enthält nur Zusammenfassung und
+    Anzahl der Trades. Einzelne Trades sind über den gespeicherten Backtest
+    bzw. GET /backtest/export abrufbar.
+    """
+    job_id, token = jobs.register("backtest", job_id, max_seconds)
+    try:
+        return await run_with_disconnect_watch(
+            request, token, _execute_streaming_backtest,
+            db, tickers, universe, adjustment, strategy_id, strategy_params, start_date, end_date, save_results, memory_limit_mb, job_id, token
+        )
+    finally:
+        jobs.finish(job_id, token)
+
+def _execute_streaming_backtest(
+    db: Session,
+    tickers: Optional[List[str]],
+    universe: Optional[str],
+    adjustment: str,
+    strategy_id: Optional[int],
+    strategy_params: Dict[str, Any],
+    start_date: str,
+    end_date: str,
+    save_results: bool,
+    memory_limit_mb: Optional[int],
+    job_id: str,
+    token: CancellationToken
+) -> Dict[str, Any]:
+    """
+    Blockierender Teil von create_streaming_backtest, läuft im Compute-Pool
+    """
+    trades_path = None
+    try:
+        start = datetime.strptime(start_date, "%Y-%m-%d")
+        end = datetime.strptime(end_date, "%Y-%m-%d")
+        tickers, membership = resolve_request_tickers(tickers, universe, start, end)
+        
+        strategy = None
+        if strategy_id:
+            strategy = db.query(Strategy).filter(Strategy.id == strategy_id).first()
+            if not strategy:
+                raise HTTPException(status_code=404, detail=f"Strategie mit ID {strategy_id} nicht gefunden")
+            # Parameter der gespeicherten Strategie, durch die Anfrage überschreibbar
+            strategy_params = {**(strategy.parameters or {}), **strategy_params}
+        try:
+            resolve_strategy(strategy_params)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        
+        results = run_backtest_streaming(
             strategy_params=strategy_params,
             tickers=tickers,
             start_date=start,
-            end_date=end
+            end_date=end,
+            memory_limit_mb=memory_limit_mb,
+            cancel_token=token,
+            universe=membership,
+            adjustment=adjustment
         )
+        trades_path = results.pop('trades_path')
+        results['job_id'] = job_id
         
-        # Speichere die Ergebnisse, falls gewünscht
-        if save_results and results['trades']:
-            summary = results['summary']
-            
-            # Wenn keine Strategie angegeben wurde, erstelle eine neue
-            if not strategy:
-                strategy = Strategy(
-                    name=f"Backtest vom {datetime.now().strftime('%Y-%m-%d %H:%M')}",
-                    description=f"Automatisch erstellte Strategie für {', '.join(tickers)}",
-                    parameters=strategy_params
+        if save_results and results['trade_count'] and not results.get('partial'):
+            with profile_stage("save"):
+                _save_backtest_results(
+                    db, results, strategy, strategy_params, tickers, start, end,
+                    trade_batches=iter_spilled_trades(trades_path)
                 )
-                db.add(strategy)
-                db.flush()  # Generiere die ID
-            
-            # Speichere die Backtest-Ergebnisse
-            db_result = BacktestResult(
-                strategy_id=strategy.id,
-                start_date=start,
-                end_date=end,
-                total_trades=summary['total_trades'],
-                winning_trades=summary['winning_trades'],
-                losing_trades=summary['losing_trades'],
-                profit_factor=summary['profit_factor'],
-                sharpe_ratio=0.0,  # Müsste noch berechnet werden
-                max_drawdown=summary['max_drawdown'],
-                cagr=summary['cagr'],
-                metrics={
-                    'win_rate': summary['win_rate'],
-                    'net_profit': summary['net_profit'],
-                    'net_profit_percent': summary['net_profit_percent'],
-                    'final_equity': summary['final_equity']
-                }
-            )
-            db.add(db_result)
-            db.commit()
-            
-            # Füge die DB-IDs zu den Ergebnissen hinzu
-            results['strategy_id'] = strategy.id
-            results['backtest_id'] = db_result.id
         
         return results
     
+    except HTTPException:
+        db.rollback()
+        raise
+    except Exception as e:
+        db.rollback()
+        raise HTTPException(status_code=500, detail=str(e))
+    finally:
+        if trades_path is not None:
+            discard_spill(trades_path)
+
+@router.post("/compare", response_model=Dict[str, Any])
+async def compare_strategies(
+    request: Request,
+    strategy_ids: Optional[List[int]] = Body(None),
+    strategies: Optional[List[Dict[str, Any]]] = Body(None),
+    tickers: Optional[List[str]] = Body(None),
+    universe: Optional[str] = Body(None),
+    adjustment: str = Body("none", pattern="^(none|split|total_return)$"),
+    start_date: str = Body(...),
+    end_date: str = Body(...),
+    save_results: bool = Body(True),
+    job_id: Optional[str] = Body(None),
+    max_seconds: Optional[float] = Body(None),
+    db: Session = Depends(get_db)
+):
+    """
+    Vergleicht mehrere Strategien auf demselben Universum in einem
+    Datendurchlauf. strategy_ids wählt gespeicherte Strategien (Auswahl der
+    Implementierung über deren Parameter), strategies ergänzt Parameter-Sets
+    ohne gespeicherte Strategie. Gemeinsame Indikatoren werden pro Ticker
+    nur einmal berechnet. Gespeichert werden nur Ergebnisse gespeicherter
+    Strategien.
+    """
+    job_id, token = jobs.register("backtest", job_id, max_seconds)
+    try:
+        return await run_with_disconnect_watch(
+            request, token, _execute_compare,
+            db, strategy_ids, strategies, tickers, universe, adjustment, start_date, end_date, save_results, job_id, token
+        )
+    finally:
+        jobs.finish(job_id, token)
+
+def _execute_compare(
+    db: Session,
+    strategy_ids: Optional[List[int]],
+    strategies: Optional[List[Dict[str, Any]]],
+    tickers: Optional[List[str]],
+    universe: Optional[str],
+    adjustment: str,
+    start_date: str,
+    end_date: str,
+    save_results: bool,
+    job_id: str,
+    token: CancellationToken
+) -> Dict[str, Any]:
+    """
+    Blockierender Teil von compare_strategies, läuft im Compute-Pool
+    """
+    try:
+        start = datetime.strptime(start_date, "%Y-%m-%d")
+        end = datetime.strptime(end_date, "%Y-%m-%d")
+        tickers, membership = resolve_request_tickers(tickers, universe, start, end)
+        
+        # Gespeicherte Strategien in der angegebenen Reihenfolge
+        entries = []
+        if strategy_ids:
+            found = {strategy.id: strategy for strategy in db.query(Strategy).filter(Strategy.id.in_(strategy_ids))}
+            for strategy_id in strategy_ids:
+                if strategy_id not in found:
+                    raise HTTPException(status_code=404, detail=f"Strategie mit ID {strategy_id} nicht gefunden")
+                entries.append((found[strategy_id], found[strategy_id].parameters or {}))
+        entries.extend((None, params) for params in strategies or [])
+        
+        if not entries:
+            raise HTTPException(status_code=400, detail="Mindestens eine Strategie muss angegeben werden")
+        for _, params in entries:
+            try:
+                resolve_strategy(params)
+            except ValueError as e:
+                raise HTTPException(status_code=400, detail=str(e))
+        
+        results = run_backtest_compare(
+            strategy_params_list=[params for _, params in entries],
+            tickers=tickers,
+            start_date=start,
+            end_date=end,
+            cancel_token=token,
+            universe=membership,
+            adjustment=adjustment
+        )
+        
+        runs = []
+        for (strategy, params), run in zip(entries, results['runs']):
+            run['strategy_id'] = strategy.id if strategy else None
+            run['strategy_name'] = strategy.name if strategy else None
+            run['strategy_type'] = resolve_strategy(params).name
+            run['strategy_params'] = params
+            
+            # Speichern wie bei einzelnen Backtests (keine Teilergebnisse)
+            if save_results and strategy and run['trades'] and not results.get('partial'):
+                with profile_stage("save"):
+                    _save_backtest_results(db, run, strategy, params, tickers, start, end)
+            runs.append(run)
+        
+        response = {
+            'results': runs,
+            'tickers_processed': results['tickers_processed'],
+            'job_id': job_id
+        }
+        if results.get('partial'):
+            response['partial'] = True
+            response['cancel_reason'] = results['cancel_reason']
+        return response
+    
+    except HTTPException:
+        db.rollback()
+        raise
     except Exception as e:
         db.rollback()
         raise HTTPException(status_code=500, detail=str(e))
 
+@router.websocket("/ws")
+async def backtest_progress_ws(websocket: WebSocket):
+    """
+    Führt einen Backtest aus und streamt dabei Fortschritt, laufende Equity
+    und Zwischenergebnisse. Der Client sendet nach dem Verbindungsaufbau die
+    Backtest-Parameter wie bei POST /backtest/ als JSON-Nachricht und erhält
+    Nachrichten vom Typ "progress", abschließend "result" oder "error".
+    """
+    await websocket.accept()
+    try:
+        request = await websocket.receive_json()
+        tickers = request["tickers"]
+        strategy_params = request.get("strategy_params", {})
+        resolve_strategy(strategy_params)
+        start = datetime.strptime(request["start_date"], "%Y-%m-%d")
+        end = datetime.strptime(request["end_date"], "%Y-%m-%d")
+        save_results = request.get("save_results", False)
+        max_seconds = request.get("max_seconds")
+        # Nachrichtenrate begrenzen: höchstens 10 Fortschrittsmeldungen pro Sekunde
+        progress_interval = max(float(request.get("progress_interval", 0.5)), 0.1)
+    except WebSocketDisconnect:
+        return
+    except Exception as e:
+        await websocket.send_json({"type": "error", "detail": f"Ungültige Anfrage: {e}"})
+        await websocket.close()
+        return
+    
+    job_id, token = jobs.register("backtest", request.get("job_id"), max_seconds)
+    loop = asyncio.get_running_loop()
+    queue: asyncio.Queue = asyncio.Queue()
+    
+    def on_progress(event: Dict[str, Any]):
+        loop.call_soon_threadsafe(queue.put_nowait, event)
+    
+    def run():
+        # Läuft im Compute-Pool, Nachrichten gehen über die Queue an den Event-Loop
+        try:
+            results = run_backtest(
+                strategy_params=strategy_params,
+                tickers=tickers,
+                start_date=start,
+                end_date=end,
+                progress_callback=on_progress,
+                progress_interval=progress_interval,
+                cancel_token=token
+            )
+            results['job_id'] = job_id
+            if save_results and results['trades'] and not results.get('partial'):
+                db = SessionLocal()
+                try:
+                    _save_backtest_results(db, results, None, strategy_params, tickers, start, end)
+                except Exception:
+                    db.rollback()
+                    raise
+                finally:
+                    db.close()
+            on_progress({"type": "result", **results})
+        except Exception as e:
+            on_progress({"type": "error", "detail": str(e)})
+    
+    async def execute():
+        try:
+            await compute_pool.run(run)
+        except HTTPException as e:
+            # Compute-Pool ausgelastet (429)
+            on_progress({"type": "error", "status_code": e.status_code, "detail": e.detail})
+    
+    worker = asyncio.create_task(execute())
+    try:
+        while True:
+            message = await queue.get()
+            await websocket.send_json(jsonable_encoder(message))
+            if message["type"] in ("result", "error"):
+                break
+        await websocket.close()
+    except WebSocketDisconnect:
+        # Client ist weg: Berechnung beim nächsten Prüfpunkt beenden
+        token.cancel("client_disconnected")
+    finally:
+        await worker
+        jobs.finish(job_id, token)
+
 @router.get("/", response_model=List[Dict[str, Any]])
 def list_backtests(
+    request: Request,
+    response: Response,
     skip: int = 0, 
     limit: int = 100, 
     db: Session = Depends(get_db)
 ):
     """
-    Gibt eine Liste der gespeicherten Backtest-Ergebnisse zurück
+    Gibt eine Liste der gespeicherten Backtest-Ergebnisse zurück.
+    Unterstützt bedingte Anfragen (schwacher ETag, Last-Modified).
     """
     try:
+        not_modified = conditional_get(
+            request, response, ("backtests", skip, limit),
+            lambda: _backtest_list_version(db, skip, limit)
+        )
+        if not_modified is not None:
+            return not_modified
+        
         results = db.query(BacktestResult).offset(skip).limit(limit).all()
         
         # Konvertiere SQLAlchemy-Objekte in Dictionaries
@@ -119,6 +488,8 @@ def list_backtests(
                 "profit_factor": result.profit_factor,
                 "max_drawdown": result.max_drawdown,
                 "cagr": result.cagr,
+                "win_rate": result.win_rate,
+                "net_profit_percent": result.net_profit_percent,
                 "created_at": result.created_at.strftime('%Y-%m-%d %H:%M:%S'),
             }
             for result in results
@@ -127,15 +498,200 @@ def list_backtests(
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+# Kennzahlen, nach denen Ranglisten sortiert und gefiltert werden können (alle indiziert)
+LEADERBOARD_METRICS = {
+    "net_profit_percent": BacktestResult.net_profit_percent,
+    "win_rate": BacktestResult.win_rate,
+    "sharpe_ratio": BacktestResult.sharpe_ratio,
+    "profit_factor": BacktestResult.profit_factor,
+    "max_drawdown": BacktestResult.max_drawdown,
+    "cagr": BacktestResult.cagr,
+    "total_trades": BacktestResult.total_trades,
+}
+
+def _parse_metric_filters(filters: List[str]) -> List[tuple]:
+    """
+    Liest Filter der Form "kennzahl:wert", z.B. "win_rate:50"
+    """
+    parsed = []
+    for entry in filters:
+        name, _, value = entry.partition(":")
+        if name not in LEADERBOARD_METRICS:
+            raise HTTPException(status_code=400, detail=f"Unbekannte Kennzahl '{name}', verfügbar: {', '.join(LEADERBOARD_METRICS)}")
+        try:
+            parsed.append((name, float(value)))
+        except ValueError:
+            raise HTTPException(status_code=400, detail=f"Ungültiger Filterwert in '{entry}'")
+    return parsed
+
+def _finite(value: Optional[float]) -> Optional[float]:
+    """
+    Nicht endliche Werte (z.B. Profit Factor ohne Verlusttrades) als None ausgeben
+    """
+    return value if value is None or math.isfinite(value) else None
+
+@router.get("/leaderboard", response_model=List[Dict[str, Any]])
+def get_leaderboard(
+    request: Request,
+    response: Response,
+    metric: str = Query("net_profit_percent", pattern="^(" + "|".join(LEADERBOARD_METRICS) + ")$"),
+    order: Optional[str] = Query(None, pattern="^(asc|desc)$"),
+    limit: int = Query(20, ge=1, le=1000),
+    offset: int = Query(0, ge=0),
+    min_filters: List[str] = Query([], alias="min"),
+    max_filters: List[str] = Query([], alias="max"),
+    strategy_id: Optional[int] = Query(None),
+    db: Session = Depends(get_db)
+):
+    """
+    Rangliste der gespeicherten Backtests nach einer Kennzahl.
+    
+    - **metric**: Sortierkennzahl (net_profit_percent, win_rate, sharpe_ratio,
+      profit_factor, max_drawdown, cagr, total_trades)
+    - **order**: asc oder desc (Standard: desc, für max_drawdown asc)
+    - **min** / **max**: wiederholbare Filter "kennzahl:wert", z.B. min=total_trades:30&max=max_drawdown:20
+    - **strategy_id**: nur Backtests dieser Strategie
+    
+    Sortierung und Filter laufen über die indizierten Kennzahl-Spalten, die
+    Top-N-Abfrage liest nur die benötigten Zeilen.
+    """
+    try:
+        lower = _parse_metric_filters(min_filters)
+        upper = _parse_metric_filters(max_filters)
+        order = order or ("asc" if metric == "max_drawdown" else "desc")
+        
+        not_modified = conditional_get(
+            request, response,
+            ("backtests", "leaderboard", metric, order, limit, offset, tuple(lower), tuple(upper), strategy_id),
+            lambda: _backtest_list_version(db, "leaderboard", metric, order, limit, offset, lower, upper, strategy_id)
+        )
+        if not_modified is not None:
+            return not_modified
+        
+        column = LEADERBOARD_METRICS[metric]
+        query = (
+            db.query(BacktestResult, Strategy.name)
+            .outerjoin(Strategy, BacktestResult.strategy_id == Strategy.id)
+            .filter(column.isnot(None))
+        )
+        for name, value in lower:
+            query = query.filter(LEADERBOARD_METRICS[name] >= value)
+        for name, value in upper:
+            query = query.filter(LEADERBOARD_METRICS[name] <= value)
+        if strategy_id is not None:
+            query = query.filter(BacktestResult.strategy_id == strategy_id)
+        
+        if order == "desc":
+            query = query.order_by(column.desc(), BacktestResult.id.desc())
+        else:
+            query = query.order_by(column.asc(), BacktestResult.id.asc())
+        
+        rows = query.offset(offset).limit(limit).all()
+        
+        return [
+            {
+                "rank": offset + position + 1,
+                "id": result.id,
+                "strategy_id": result.strategy_id,
+                "strategy_name": strategy_name or "Unbekannt",
+                "start_date": result.start_date.strftime('%Y-%m-%d'),
+                "end_date": result.end_date.strftime('%Y-%m-%d'),
+                "total_trades": result.total_trades,
+                "win_rate": result.win_rate,
+                "net_profit_percent": result.net_profit_percent,
+                "sharpe_ratio": result.sharpe_ratio,
+                "profit_factor": _finite(result.profit_factor),
+                "max_drawdown": result.max_drawdown,
+                "cagr": result.cagr,
+                "created_at": result.created_at.strftime('%Y-%m-%d %H:%M:%S'),
+            }
+            for position, (result, strategy_name) in enumerate(rows)
+        ]
+    
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.get("/export")
+def export_backtest_archive(
+    ids: Optional[List[int]] = Query(None),
+    strategy_id: Optional[int] = None,
+    created_from: Optional[str] = None,
+    created_to: Optional[str] = None
+):
+    """
+    Exportiert die ausgewählten Backtests (Zusammenfassung, Trades, Equity)
+    als ZIP-Archiv mit partitionierten Parquet-Dateien. Das Archiv wird
+    blockweise erzeugt und gestreamt.
+    """
+    try:
+        start = datetime.strptime(created_from, "%Y-%m-%d") if created_from else None
+        end = datetime.strptime(created_to, "%Y-%m-%d") + timedelta(days=1) if created_to else None
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    filename = f"backtests_{datetime.now().strftime('%Y%m%d_%H%M%S')}.zip"
+    return StreamingResponse(
+        export_backtests(backtest_ids=ids, strategy_id=strategy_id, created_from=start, created_to=end),
+        media_type="application/zip",
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'}
+    )
+
+@router.post("/import", response_model=Dict[str, Any])
+def import_backtest_archive(
+    file: UploadFile = File(...),
+    db: Session = Depends(get_db)
+):
+    """
+    Importiert ein mit GET /backtest/export erzeugtes Archiv in die Datenbank
+    """
+    try:
+        imported = import_backtests(db, file.file)
+        versions.invalidate("backtests", "strategies")
+        return imported
+    
+    except Exception as e:
+        db.rollback()
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.get("/jobs", response_model=List[Dict[str, Any]])
+async def list_backtest_jobs():
+    """
+    Gibt die laufenden Backtests zurück
+    """
+    return jobs.list("backtest")
+
+@router.delete("/jobs/{job_id}", response_model=Dict[str, Any])
+async def cancel_backtest_job(job_id: str):
+    """
+    Bricht einen laufenden Backtest ab
+    """
+    if not jobs.cancel(job_id, "backtest"):
+        raise HTTPException(status_code=404, detail=f"Laufender Backtest mit Job-ID {job_id} nicht gefunden")
+    
+    return {"message": f"Backtest mit Job-ID {job_id} wird abgebrochen"}
+
 @router.get("/{backtest_id}", response_model=Dict[str, Any])
 def get_backtest(
     backtest_id: int, 
+    request: Request,
+    response: Response,
     db: Session = Depends(get_db)
 ):
     """
-    Gibt detaillierte Informationen zu einem bestimmten Backtest zurück
+    Gibt detaillierte Informationen zu einem bestimmten Backtest zurück.
+    Backtest-Ergebnisse ändern sich nach dem Speichern nicht; mit
+    If-None-Match wird bei unverändertem starkem ETag 304 geliefert.
     """
     try:
+        not_modified = conditional_get(
+            request, response, ("backtest", backtest_id),
+            lambda: _backtest_version(db, backtest_id)
+        )
+        if not_modified is not None:
+            return not_modified
+        
         result = db.query(BacktestResult).filter(BacktestResult.id == backtest_id).first()
         if not result:
             raise HTTPException(status_code=404, detail=f"Backtest mit ID {backtest_id} nicht gefunden")
@@ -161,5 +717,179 @@ def get_backtest(
             "created_at": result.created_at.strftime('%Y-%m-%d %H:%M:%S'),
         }
     
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+def _backtest_version(db: Session, backtest_id: int):
+    """
+    Versionsstand eines Backtests: Erstellungszeitpunkt und letzte Änderung
+    der Strategie, deren Name und Parameter in der Antwort enthalten sind
+    """
+    row = (
+        db.query(BacktestResult.created_at, Strategy.updated_at)
+        .outerjoin(Strategy, BacktestResult.strategy_id == Strategy.id)
+        .filter(BacktestResult.id == backtest_id)
+        .first()
+    )
+    if row is None:
+        return None
+    created_at, strategy_updated_at = row
+    last_modified = max(t for t in (created_at, strategy_updated_at) if t is not None)
+    return strong_etag("backtest", backtest_id, created_at, strategy_updated_at), last_modified
+
+def _backtest_list_version(db: Session, *params):
+    """
+    Versionsstand einer Backtest-Liste (params: Abfrageparameter) aus Anzahl,
+    höchster ID und letzten Zeitstempeln
+    """
+    # Einzelne Unterabfragen, damit max() jeweils über den Index beantwortet wird
+    count, max_id, last_created, strategy_updated_at = db.query(
+        select(func.count()).select_from(BacktestResult).scalar_subquery(),
+        select(func.max(BacktestResult.id)).scalar_subquery(),
+        select(func.max(BacktestResult.created_at)).scalar_subquery(),
+        select(func.max(Strategy.updated_at)).scalar_subquery()
+    ).one()
+    last_modified = max((t for t in (last_created, strategy_updated_at) if t is not None), default=None)
+    return weak_etag("backtests", params, count, max_id, last_created, strategy_updated_at), last_modified
+
+@router.get("/{backtest_id}/montecarlo", response_model=Dict[str, Any])
+def get_backtest_montecarlo(
+    backtest_id: int,
+    simulations: int = Query(10000, ge=1, le=100000),
+    method: str = Query("bootstrap", pattern="^(bootstrap|reshuffle)$"),
+    seed: Optional[int] = Query(None),
+    percentiles: List[float] = Query([5, 25, 50, 75, 95]),
+    db: Session = Depends(get_db)
+):
+    """
+    Monte-Carlo-Analyse der gespeicherten Trades eines Backtests.
+    
+    - **simulations**: Anzahl der simulierten Trade-Folgen
+    - **method**: bootstrap (Ziehen mit Zurücklegen) oder reshuffle (Reihenfolge vertauschen)
+    - **seed**: Startwert des Zufallsgenerators für reproduzierbare Ergebnisse
+    - **percentiles**: Perzentile der Bänder für Endkapital und Max Drawdown
+    """
+    try:
+        result = db.query(BacktestResult.id).filter(BacktestResult.id == backtest_id).first()
+        if not result:
+            raise HTTPException(status_code=404, detail=f"Backtest mit ID {backtest_id} nicht gefunden")
+        
+        if any(p < 0 or p > 100 for p in percentiles):
+            raise HTTPException(status_code=400, detail="Perzentile müssen zwischen 0 und 100 liegen")
+        
+        # Trade-Ergebnisse in der gespeicherten Reihenfolge
+        profit_loss = [
+            row.profit_loss
+            for row in db.query(BacktestTrade.profit_loss)
+            .filter(BacktestTrade.backtest_id == backtest_id)
+            .order_by(BacktestTrade.id)
+        ]
+        if not profit_loss:
+            raise HTTPException(status_code=400, detail="Backtest enthält keine Trades")
+        
+        analysis = run_montecarlo(
+            profit_loss,
+            simulations=simulations,
+            method=method,
+            seed=seed,
+            initial_equity=BacktestAccumulator().initial_equity,
+            percentiles=percentiles
+        )
+        analysis['backtest_id'] = backtest_id
+        return analysis
+    
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
+
+def _save_backtest_results(
+    db: Session,
+    results: Dict[str, Any],
+    strategy: Optional[Strategy],
+    strategy_params: Dict[str, Any],
+    tickers: List[str],
+    start: datetime,
+    end: datetime,
+    trade_batches: Optional[Iterable[List[Dict[str, Any]]]] = None
+):
+    """
+    Hilfsfunktion zum Speichern eines Backtests. Ergänzt die Ergebnisse um die DB-IDs.
+    Mit trade_batches (Streaming-Backtests) werden die Trades samt Equity
+    batchweise aus der Auslagerungsdatei statt aus results übernommen.
+    """
+    summary = results['summary']
+    
+    # Wenn keine Strategie angegeben wurde, erstelle eine neue
+    if not strategy:
+        strategy = Strategy(
+            name=f"Backtest vom {datetime.now().strftime('%Y-%m-%d %H:%M')}",
+            description=f"Automatisch erstellte Strategie für {', '.join(tickers)}",
+            parameters=strategy_params
+        )
+        db.add(strategy)
+        db.flush()  # Generiere die ID
+    
+    # Speichere die Backtest-Ergebnisse
+    db_result = BacktestResult(
+        strategy_id=strategy.id,
+        start_date=start,
+        end_date=end,
+        total_trades=summary['total_trades'],
+        winning_trades=summary['winning_trades'],
+        losing_trades=summary['losing_trades'],
+        profit_factor=summary['profit_factor'],
+        sharpe_ratio=summary['sharpe_ratio'],
+        max_drawdown=summary['max_drawdown'],
+        cagr=summary['cagr'],
+        win_rate=summary['win_rate'],
+        net_profit_percent=summary['net_profit_percent'],
+        metrics={
+            'win_rate': summary['win_rate'],
+            'net_profit': summary['net_profit'],
+            'net_profit_percent': summary['net_profit_percent'],
+            'final_equity': summary['final_equity']
+        }
+    )
+    db.add(db_result)
+    db.flush()  # Generiere die ID
+    
+    # Trades und Equity-Kurve als Massen-Insert speichern
+    # (je Trade ein Equity-Punkt zum Exit-Datum)
+    if trade_batches is None:
+        trade_batches = [[
+            dict(trade, equity=point['equity'])
+            for trade, point in zip(results['trades'], results['equity_curve'])
+        ]]
+    
+    seq = 0
+    for trades in trade_batches:
+        if not trades:
+            continue
+        db.execute(insert(BacktestTrade), [
+            {
+                'backtest_id': db_result.id,
+                'ticker': trade['ticker'],
+                'entry_date': trade['entry_date'],
+                'exit_date': trade['exit_date'],
+                'entry_price': trade['entry_price'],
+                'exit_price': trade['exit_price'],
+                'position_size': trade['position_size'],
+                'profit_loss': trade['profit_loss'],
+                'profit_loss_percent': trade['profit_loss_percent']
+            }
+            for trade in trades
+        ])
+        db.execute(insert(BacktestEquityPoint), [
+            {'backtest_id': db_result.id, 'seq': seq + offset, 'date': trade['exit_date'], 'equity': trade['equity']}
+            for offset, trade in enumerate(trades)
+        ])
+        seq += len(trades)
+    db.commit()
+    versions.invalidate("backtests", "strategies")
+    
+    # Füge die DB-IDs zu den Ergebnissen hinzu
+    results['strategy_id'] = strategy.id
+    results['backtest_id'] = db_result.id
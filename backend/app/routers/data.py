@@ -0,0 +1,107 @@
+from fastapi import APIRouter, Depends, HTTPException
+from sqlalchemy.orm import Session
+from typing import List, Dict, Any
+from datetime import datetime
+from pydantic import BaseModel, Field
+
+from ..database import get_db
+from ..models.models import CorporateAction
+from ..services.adjustments import adjustments
+from ..services.resampling import timeframes
+
+router = APIRouter(
+    prefix="/data",
+    tags=["data"],
+    responses={404: {"description": "Not found"}},
+)
+
+class CorporateActionCreate(BaseModel):
+    ticker: str
+    ex_date: str
+    action_type: str = Field(..., pattern="^(split|dividend)$")
+    value: float = Field(..., gt=0)
+
+def _action_to_dict(action: CorporateAction) -> Dict[str, Any]:
+    return {
+        "id": action.id,
+        "ticker": action.ticker,
+        "ex_date": action.ex_date.strftime("%Y-%m-%d"),
+        "action_type": action.action_type,
+        "value": action.value
+    }
+
+def _invalidate(tickers: List[str]) -> None:
+    """
+    Verwirft die zwischengespeicherten Faktoren und Kurse der betroffenen Ticker
+    """
+    for ticker in set(tickers):
+        adjustments.invalidate(ticker)
+        timeframes.invalidate(ticker)
+
+@router.post("/corporate-actions", response_model=Dict[str, Any])
+def create_corporate_actions(
+    actions: List[CorporateActionCreate],
+    db: Session = Depends(get_db)
+):
+    """
+    Speichert neue Splits und Dividenden. Die Adjustierungsfaktoren werden
+    nur für die betroffenen Ticker beim nächsten Zugriff neu berechnet.
+    """
+    try:
+        db_actions = []
+        for action in actions:
+            try:
+                ex_date = datetime.strptime(action.ex_date, "%Y-%m-%d")
+            except ValueError:
+                raise HTTPException(status_code=400, detail=f"Ungültiges ex_date: {action.ex_date}")
+            db_actions.append(CorporateAction(
+                ticker=action.ticker,
+                ex_date=ex_date,
+                action_type=action.action_type,
+                value=action.value
+            ))
+        db.add_all(db_actions)
+        db.commit()
+
+        _invalidate([action.ticker for action in db_actions])
+
+        return {
+            "created": len(db_actions),
+            "actions": [_action_to_dict(action) for action in db_actions]
+        }
+
+    except HTTPException:
+        db.rollback()
+        raise
+    except Exception as e:
+        db.rollback()
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.get("/corporate-actions/{ticker}", response_model=List[Dict[str, Any]])
+def list_corporate_actions(ticker: str, db: Session = Depends(get_db)):
+    """
+    Gibt alle Corporate Actions eines Tickers zurück
+    """
+    actions = (
+        db.query(CorporateAction)
+        .filter(CorporateAction.ticker == ticker)
+        .order_by(CorporateAction.ex_date)
+        .all()
+    )
+    return [_action_to_dict(action) for action in actions]
+
+@router.delete("/corporate-actions/{action_id}", response_model=Dict[str, Any])
+def delete_corporate_action(action_id: int, db: Session = Depends(get_db)):
+    """
+    Löscht eine Corporate Action
+    """
+    action = db.query(CorporateAction).filter(CorporateAction.id == action_id).first()
+    if not action:
+        raise HTTPException(status_code=404, detail=f"Corporate Action mit ID {action_id} nicht gefunden")
+
+    ticker = action.ticker
+    db.delete(action)
+    db.commit()
+    _invalidate([ticker])
+
+    return {"message": f"Corporate Action mit ID {action_id} wurde gelöscht"}
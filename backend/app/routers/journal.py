@@ -1,11 +1,18 @@
 from fastapi import APIRouter, Depends, HTTPException, Body
+from sqlalchemy import case, func, update
 from sqlalchemy.orm import Session
 from typing import List, Dict, Any, Optional
 from datetime import datetime
 from pydantic import BaseModel
+import numpy as np
 
 from ..database import get_db
 from ..models.models import Trade
+from ..services.market_data import last_prices
+from ..services.journal_stats import (
+    apply_trade_delta, apply_trade_deltas, contribution_of, get_journal_summary,
+    lock_journal_summary, trade_contribution
+)
 
 router = APIRouter(
     prefix="/journal",
@@ -31,6 +38,12 @@ class TradeUpdate(BaseModel):
     notes: Optional[str] = None
     is_open: Optional[bool] = None
 
+class TradeBulkUpdate(TradeUpdate):
+    id: int
+
+# Maximale Anzahl von Trades je Massenänderung
+BULK_UPDATE_LIMIT = 1000
+
 @router.post("/", response_model=Dict[str, Any])
 def create_trade(
     trade_data: TradeCreate,
@@ -70,6 +83,9 @@ def create_trade(
             is_open=trade_data.is_open
         )
         
+        # Journal-Statistik um den neuen Trade fortschreiben
+        apply_trade_delta(db, None, contribution_of(trade))
+        
         db.add(trade)
         db.commit()
         db.refresh(trade)
@@ -135,6 +151,234 @@ def list_trades(
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+@router.get("/summary", response_model=Dict[str, Any])
+def get_summary(
+    include_curve: bool = True,
+    db: Session = Depends(get_db)
+):
+    """
+    Gibt die laufend gepflegte Performance des Journals zurück
+    (Equity-Kurve, Drawdown, Trefferquote und Statistik pro Setup)
+    """
+    try:
+        return get_journal_summary(db, include_curve)
+    
+    except Exception as e:
+        db.rollback()
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.get("/open/valuation", response_model=Dict[str, Any])
+def get_open_positions_valuation(
+    account_size: float = 100000.0,
+    stop_percent: float = 8.0,
+    db: Session = Depends(get_db)
+):
+    """
+    Bewertet alle offenen Positionen mit den letzten Kursen: unrealisierter
+    Gewinn/Verlust, Exposure und Portfolio-Heat (offenes Risiko bis zum Stop
+    bei stop_percent unter Einstand, in Prozent von account_size).
+    Die Kurse aller Ticker werden in einem Zugriff aus dem Kurs-Cache gelesen.
+    """
+    try:
+        rows = (
+            db.query(Trade.id, Trade.ticker, Trade.entry_price, Trade.position_size, Trade.setup_type)
+            .filter(Trade.is_open == True)
+            .order_by(Trade.id)
+            .all()
+        )
+        
+        if not rows:
+            return {
+                "positions": [],
+                "totals": {
+                    "position_count": 0,
+                    "exposure": 0.0,
+                    "exposure_percent": 0.0,
+                    "unrealized_pl": 0.0,
+                    "portfolio_heat_percent": 0.0
+                },
+                "priced_at": datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+            }
+        
+        ids, tickers, entry_prices, sizes, setup_types = zip(*rows)
+        entry = np.array(entry_prices, dtype=np.float64)
+        size = np.array(sizes, dtype=np.float64)
+        
+        # Jeden Ticker nur einmal abfragen und auf die Positionen verteilen
+        unique_tickers, inverse = np.unique(np.array(tickers), return_inverse=True)
+        last = last_prices.get_many(unique_tickers.tolist())[inverse]
+        
+        market_value = last * size
+        unrealized_pl = (last - entry) * size
+        unrealized_pl_percent = (last - entry) / entry * 100
+        stop = entry * (1 - stop_percent / 100)
+        risk = np.maximum(last - stop, 0.0) * size
+        
+        priced = ~np.isnan(last)
+        exposure = float(market_value[priced].sum())
+        
+        positions = [
+            {
+                "id": ids[i],
+                "ticker": tickers[i],
+                "setup_type": setup_types[i],
+                "entry_price": float(entry[i]),
+                "last_price": float(last[i]) if priced[i] else None,
+                "position_size": float(size[i]),
+                "market_value": float(market_value[i]) if priced[i] else None,
+                "unrealized_pl": float(unrealized_pl[i]) if priced[i] else None,
+                "unrealized_pl_percent": float(unrealized_pl_percent[i]) if priced[i] else None,
+                "risk": float(risk[i]) if priced[i] else None
+            }
+            for i in range(len(ids))
+        ]
+        
+        return {
+            "positions": positions,
+            "totals": {
+                "position_count": len(ids),
+                "exposure": exposure,
+                "exposure_percent": exposure / account_size * 100 if account_size else None,
+                "unrealized_pl": float(unrealized_pl[priced].sum()),
+                "portfolio_heat_percent": float(risk[priced].sum()) / account_size * 100 if account_size else None
+            },
+            "priced_at": datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        }
+    
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.patch("/bulk", response_model=Dict[str, Any])
+def bulk_update_trades(
+    updates: List[TradeBulkUpdate] = Body(..., embed=True, min_length=1, max_length=BULK_UPDATE_LIMIT),
+    db: Session = Depends(get_db)
+):
+    """
+    Aktualisiert viele Trades auf einmal (z.B. Schließen aller Positionen zum
+    Handelsschluss) mit denselben Feldern wie PUT /journal/{trade_id}.
+    Alle Änderungen werden mit einem einzigen UPDATE-Statement geschrieben,
+    das auch profit_loss und profit_loss_percent mengenbasiert neu berechnet,
+    und in einer Transaktion gespeichert. Das Ergebnis enthält pro Eintrag
+    den Status (updated, unchanged, not_found, invalid, duplicate).
+    """
+    try:
+        results: List[Dict[str, Any]] = [None] * len(updates)
+        pending: Dict[int, int] = {}
+        exit_dates: Dict[int, datetime] = {}
+        
+        for index, item in enumerate(updates):
+            if item.id in pending:
+                results[index] = {"id": item.id, "status": "duplicate", "detail": "Trade mehrfach angegeben"}
+                continue
+            if item.exit_date is not None:
+                try:
+                    exit_dates[item.id] = datetime.strptime(item.exit_date, "%Y-%m-%d")
+                except ValueError:
+                    results[index] = {"id": item.id, "status": "invalid", "detail": f"Ungültiges Datum: {item.exit_date}"}
+                    continue
+            if item.exit_date is None and item.exit_price is None and item.notes is None and item.is_open is None:
+                results[index] = {"id": item.id, "status": "unchanged"}
+                continue
+            pending[item.id] = index
+        
+        # Bisherige Beiträge zur Journal-Statistik in einer Abfrage lesen
+        old_rows = (
+            db.query(Trade.id, Trade.is_open, Trade.profit_loss, Trade.exit_date, Trade.entry_date, Trade.setup_type)
+            .filter(Trade.id.in_(list(pending)))
+            .all()
+        ) if pending else []
+        old_contributions = {row.id: trade_contribution(*row[1:]) for row in old_rows}
+        
+        for trade_id, index in list(pending.items()):
+            if trade_id not in old_contributions:
+                results[index] = {"id": trade_id, "status": "not_found", "detail": f"Trade mit ID {trade_id} nicht gefunden"}
+                del pending[trade_id]
+        
+        updated_rows = []
+        if pending:
+            # Vor dem UPDATE sperren, damit eine Erstbefüllung den alten Stand sieht
+            summary = lock_journal_summary(db)
+            
+            items = [updates[index] for index in pending.values()]
+            # Nur gefundene Trades, sonst entstünde für lauter fehlende IDs ein leeres CASE
+            exit_dates = {i: d for i, d in exit_dates.items() if i in pending}
+            exit_prices = {item.id: item.exit_price for item in items if item.exit_price is not None}
+            notes = {item.id: item.notes for item in items if item.notes is not None}
+            
+            # Mit Exit-Preis oder -Datum wird die Position geschlossen
+            is_open = {
+                item.id: False if item.id in exit_prices or item.id in exit_dates else item.is_open
+                for item in items
+                if item.is_open is not None or item.id in exit_prices or item.id in exit_dates
+            }
+            
+            values = {}
+            if exit_dates:
+                values["exit_date"] = case(exit_dates, value=Trade.id, else_=Trade.exit_date)
+            if notes:
+                values["notes"] = case(notes, value=Trade.id, else_=Trade.notes)
+            if is_open:
+                values["is_open"] = case(is_open, value=Trade.id, else_=Trade.is_open)
+            if exit_prices:
+                # Rechte Seiten sehen die Werte vor dem UPDATE, P/L also aus dem neuen Exit-Preis
+                exit_price = case(exit_prices, value=Trade.id, else_=Trade.exit_price)
+                repriced = Trade.id.in_(list(exit_prices))
+                values["exit_price"] = exit_price
+                values["profit_loss"] = case(
+                    (repriced, (exit_price - Trade.entry_price) * Trade.position_size),
+                    else_=Trade.profit_loss
+                )
+                values["profit_loss_percent"] = case(
+                    (repriced, (exit_price - Trade.entry_price) / func.nullif(Trade.entry_price, 0) * 100),
+                    else_=Trade.profit_loss_percent
+                )
+            
+            updated_rows = db.execute(
+                update(Trade)
+                .where(Trade.id.in_(list(pending)))
+                .values(**values)
+                .returning(
+                    Trade.id, Trade.is_open, Trade.profit_loss, Trade.exit_date, Trade.entry_date, Trade.setup_type,
+                    Trade.exit_price, Trade.profit_loss_percent, Trade.notes, Trade.updated_at
+                ),
+                execution_options={"synchronize_session": False}
+            ).all()
+            
+            # Journal-Statistik um alle Änderungen fortschreiben
+            apply_trade_deltas(
+                db,
+                [(old_contributions[row.id], trade_contribution(*row[1:6])) for row in updated_rows],
+                summary
+            )
+        
+        db.commit()
+        
+        for row in updated_rows:
+            results[pending[row.id]] = {
+                "id": row.id,
+                "status": "updated",
+                "exit_date": row.exit_date.strftime("%Y-%m-%d") if row.exit_date else None,
+                "exit_price": row.exit_price,
+                "profit_loss": row.profit_loss,
+                "profit_loss_percent": row.profit_loss_percent,
+                "notes": row.notes,
+                "is_open": row.is_open,
+                "updated_at": row.updated_at.strftime("%Y-%m-%d %H:%M:%S")
+            }
+        
+        return {
+            "updated": len(updated_rows),
+            "failed": sum(1 for result in results if result["status"] not in ("updated", "unchanged")),
+            "results": results
+        }
+    
+    except HTTPException:
+        db.rollback()
+        raise
+    except Exception as e:
+        db.rollback()
+        raise HTTPException(status_code=500, detail=str(e))
+
 @router.get("/{trade_id}", response_model=Dict[str, Any])
 def get_trade(
     trade_id: int, 
@@ -184,6 +428,8 @@ def update_trade(
         if not trade:
             raise HTTPException(status_code=404, detail=f"Trade mit ID {trade_id} nicht gefunden")
         
+        old_contribution = contribution_of(trade)
+        
         # Aktualisiere die Felder, falls vorhanden
         if trade_data.exit_date is not None:
             trade.exit_date = datetime.strptime(trade_data.exit_date, "%Y-%m-%d")
@@ -205,6 +451,9 @@ def update_trade(
         if trade_data.exit_price is not None or trade_data.exit_date is not None:
             trade.is_open = False
         
+        # Journal-Statistik nur um die Änderung dieses Trades fortschreiben
+        apply_trade_delta(db, old_contribution, contribution_of(trade))
+        
         db.commit()
         db.refresh(trade)
         
@@ -242,6 +491,8 @@ def delete_trade(
         if not trade:
             raise HTTPException(status_code=404, detail=f"Trade mit ID {trade_id} nicht gefunden")
         
+        apply_trade_delta(db, contribution_of(trade), None)
+        
         db.delete(trade)
         db.commit()
         
@@ -1,11 +1,19 @@
-from fastapi import APIRouter, Depends, HTTPException, Body
+from fastapi import APIRouter, Depends, HTTPException, Body, Query, Request, Response
+from sqlalchemy import func, select, text
 from sqlalchemy.orm import Session
 from typing import List, Dict, Any, Optional
-from datetime import datetime
+from datetime import datetime, timedelta
 
 from ..database import get_db
-from ..models.models import Screen
-from ..services.trading_service import run_screen
+from ..models.models import Screen, ScreenTickerState, ScheduledScreen, ScreenHit
+from ..services.trading_service import run_screen, run_screen_batch, refresh_screen
+from ..services.scheduler import screen_scheduler
+from ..services.jobs import jobs, run_with_disconnect_watch, CancellationToken
+from ..services.serialization import negotiate_response
+from ..services.universe import resolve_request_tickers
+from ..services.http_cache import conditional_get, strong_etag, weak_etag, versions
+from ..services.screen_hits import save_screen_hits, replace_screen_hits, backfill_screen_hits
+from ..services.analytics import ANALYTICS_LOOKBACK, ANALYTICS_RS_WINDOW, run_screen_analytics
 
 router = APIRouter(
     prefix="/screen",
@@ -14,16 +22,56 @@ router = APIRouter(
 )
 
 @router.post("/", response_model=Dict[str, Any])
-def create_screen(
+async def create_screen(
+    request: Request,
     criteria: Dict[str, Any] = Body(...),
-    tickers: List[str] = Body(...),
+    tickers: Optional[List[str]] = Body(None),
+    universe: Optional[str] = Body(None),
+    adjustment: str = Body("none", pattern="^(none|split|total_return)$"),
     as_of_date: Optional[str] = Body(None),
     save_results: bool = Body(True),
+    job_id: Optional[str] = Body(None),
+    max_seconds: Optional[float] = Body(None),
     db: Session = Depends(get_db)
 ):
     """
     Führt ein Screening mit den angegebenen Kriterien durch
-    und speichert die Ergebnisse optional in der Datenbank
+    und speichert die Ergebnisse optional in der Datenbank.
+    Abbruch über DELETE /screen/jobs/{job_id}, bei Verbindungsabbruch oder nach
+    max_seconds; Teilergebnisse werden mit partial=True markiert und nicht gespeichert.
+    Mit Accept: application/vnd.apache.arrow.stream kommen die Treffer als Arrow-IPC-Stream.
+    Statt tickers kann universe (z.B. "SP500") angegeben werden; verwendet
+    werden dann die Mitglieder am Stichtag.
+    """
+    job_id, token = jobs.register("screen", job_id, max_seconds)
+    try:
+        response = await run_with_disconnect_watch(
+            request, token, _execute_screen,
+            db, criteria, tickers, universe, adjustment, as_of_date, save_results, job_id, token
+        )
+    finally:
+        jobs.finish(job_id, token)
+    
+    return negotiate_response(
+        request,
+        response,
+        tables={"results": response["results"]},
+        default_table="results"
+    )
+
+def _execute_screen(
+    db: Session,
+    criteria: Dict[str, Any],
+    tickers: Optional[List[str]],
+    universe: Optional[str],
+    adjustment: str,
+    as_of_date: Optional[str],
+    save_results: bool,
+    job_id: str,
+    token: CancellationToken
+) -> Dict[str, Any]:
+    """
+    Blockierender Teil von create_screen, läuft im Compute-Pool
     """
     try:
         # Datum für das Screening (Standard: heute)
@@ -31,54 +79,291 @@ def create_screen(
         if as_of_date:
             screen_date = datetime.strptime(as_of_date, "%Y-%m-%d")
         
+        # Ticker aus Liste und/oder Universum (Mitglieder am Stichtag)
+        tickers, _ = resolve_request_tickers(tickers, universe, screen_date or datetime.now())
+        
         # Screening durchführen
         screen_results = run_screen(
             criteria=criteria,
             tickers=tickers,
-            as_of_date=screen_date
+            as_of_date=screen_date,
+            cancel_token=token,
+            adjustment=adjustment
         )
         
-        # Speichere das Screening, falls gewünscht
-        if save_results:
-            screen = Screen(
-                date=screen_date or datetime.now(),
-                filter_criteria=criteria,
-                results={"tickers": [r["ticker"] for r in screen_results]},
-                notes=f"Screening mit {len(screen_results)} Ergebnissen"
-            )
+        # Speichere das Screening, falls gewünscht (keine Teilergebnisse)
+        if save_results and not token.interrupted:
+            screen = _build_screen(criteria, screen_results, screen_date)
             db.add(screen)
+            db.flush()
+            save_screen_hits(db, [screen])
             db.commit()
+            versions.invalidate("screens")
             
             # Füge die ID zum Ergebnis hinzu
             result_with_id = {
                 "screen_id": screen.id,
                 "date": screen.date.strftime("%Y-%m-%d"),
                 "results": screen_results,
-                "criteria": criteria
+                "criteria": criteria,
+                "job_id": job_id
             }
             return result_with_id
         
         # Gib nur die Ergebnisse zurück, falls nicht gespeichert werden soll
-        return {
+        return _with_partial_flag({
             "date": (screen_date or datetime.now()).strftime("%Y-%m-%d"),
             "results": screen_results,
-            "criteria": criteria
-        }
+            "criteria": criteria,
+            "job_id": job_id
+        }, token)
     
+    except HTTPException:
+        db.rollback()
+        raise
     except Exception as e:
         db.rollback()
         raise HTTPException(status_code=500, detail=str(e))
 
+@router.post("/batch", response_model=Dict[str, Any])
+async def create_screen_batch(
+    request: Request,
+    criteria_sets: List[Dict[str, Any]] = Body(...),
+    tickers: Optional[List[str]] = Body(None),
+    universe: Optional[str] = Body(None),
+    adjustment: str = Body("none", pattern="^(none|split|total_return)$"),
+    as_of_date: Optional[str] = Body(None),
+    save_results: bool = Body(True),
+    job_id: Optional[str] = Body(None),
+    max_seconds: Optional[float] = Body(None),
+    db: Session = Depends(get_db)
+):
+    """
+    Führt mehrere Screenings in einem Datendurchlauf durch und speichert
+    jedes Kriterien-Set optional als eigenes Screening (in einer Transaktion).
+    Im Arrow-Format kommen alle Treffer in einer Tabelle mit criteria_index.
+    """
+    job_id, token = jobs.register("screen", job_id, max_seconds)
+    try:
+        response = await run_with_disconnect_watch(
+            request, token, _execute_screen_batch,
+            db, criteria_sets, tickers, universe, adjustment, as_of_date, save_results, job_id, token
+        )
+    finally:
+        jobs.finish(job_id, token)
+    
+    flat_results = [
+        {"criteria_index": index, "screen_id": entry.get("screen_id"), **result}
+        for index, entry in enumerate(response["screens"])
+        for result in entry["results"]
+    ]
+    return negotiate_response(
+        request,
+        response,
+        tables={"screens": flat_results},
+        default_table="screens"
+    )
+
+def _execute_screen_batch(
+    db: Session,
+    criteria_sets: List[Dict[str, Any]],
+    tickers: Optional[List[str]],
+    universe: Optional[str],
+    adjustment: str,
+    as_of_date: Optional[str],
+    save_results: bool,
+    job_id: str,
+    token: CancellationToken
+) -> Dict[str, Any]:
+    """
+    Blockierender Teil von create_screen_batch, läuft im Compute-Pool
+    """
+    try:
+        screen_date = None
+        if as_of_date:
+            screen_date = datetime.strptime(as_of_date, "%Y-%m-%d")
+        
+        # Ticker aus Liste und/oder Universum (Mitglieder am Stichtag)
+        tickers, _ = resolve_request_tickers(tickers, universe, screen_date or datetime.now())
+        
+        # Alle Kriterien-Sets gemeinsam auswerten
+        batch_results = run_screen_batch(
+            criteria_sets=criteria_sets,
+            tickers=tickers,
+            as_of_date=screen_date,
+            cancel_token=token,
+            adjustment=adjustment
+        )
+        
+        screens = [
+            {"criteria": criteria, "results": screen_results}
+            for criteria, screen_results in zip(criteria_sets, batch_results)
+        ]
+        
+        # Alle Screenings gemeinsam speichern, falls gewünscht (keine Teilergebnisse)
+        if save_results and not token.interrupted:
+            db_screens = [
+                _build_screen(criteria, screen_results, screen_date)
+                for criteria, screen_results in zip(criteria_sets, batch_results)
+            ]
+            db.add_all(db_screens)
+            db.flush()
+            save_screen_hits(db, db_screens)
+            db.commit()
+            versions.invalidate("screens")
+            
+            for entry, db_screen in zip(screens, db_screens):
+                entry["screen_id"] = db_screen.id
+        
+        return _with_partial_flag({
+            "date": (screen_date or datetime.now()).strftime("%Y-%m-%d"),
+            "screens": screens,
+            "job_id": job_id
+        }, token)
+    
+    except HTTPException:
+        db.rollback()
+        raise
+    except Exception as e:
+        db.rollback()
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.post("/analytics", response_model=Dict[str, Any])
+async def create_screen_analytics(
+    request: Request,
+    tickers: Optional[List[str]] = Body(None),
+    screen_id: Optional[int] = Body(None),
+    universe: Optional[str] = Body(None),
+    universe_tickers: Optional[List[str]] = Body(None),
+    as_of_date: Optional[str] = Body(None),
+    lookback: int = Body(ANALYTICS_LOOKBACK, ge=2, le=2520),
+    window: int = Body(ANALYTICS_RS_WINDOW, ge=1, le=2520),
+    adjustment: str = Body("none", pattern="^(none|split|total_return)$"),
+    cluster_threshold: float = Body(0.7, ge=-1, le=1),
+    include_series: bool = Body(False),
+    job_id: Optional[str] = Body(None),
+    max_seconds: Optional[float] = Body(None),
+    db: Session = Depends(get_db)
+):
+    """
+    Korrelationsmatrix, Korrelations-Cluster, relative Stärke und
+    Perzentilränge der Screening-Treffer (tickers oder die Treffer des
+    gespeicherten Screenings screen_id) gegenüber einem Universum.
+    Das Universum kommt aus universe (Mitglieder am Stichtag) und/oder
+    universe_tickers; ohne Angabe werden die Treffer untereinander verglichen.
+    Die Statistiken des Universums werden je Handelstag zwischengespeichert.
+    Mit include_series kommt die rollierende relative Stärke je Tag hinzu.
+    """
+    if window > lookback:
+        raise HTTPException(status_code=400, detail="window darf nicht größer als lookback sein")
+    
+    job_id, token = jobs.register("screen", job_id, max_seconds)
+    try:
+        response = await run_with_disconnect_watch(
+            request, token, _execute_screen_analytics,
+            db, tickers, screen_id, universe, universe_tickers, as_of_date,
+            lookback, window, adjustment, cluster_threshold, include_series, job_id, token
+        )
+    finally:
+        jobs.finish(job_id, token)
+    
+    return negotiate_response(
+        request,
+        response,
+        tables={"relative_strength": response.get("relative_strength", [])},
+        default_table="relative_strength"
+    )
+
+def _execute_screen_analytics(
+    db: Session,
+    tickers: Optional[List[str]],
+    screen_id: Optional[int],
+    universe: Optional[str],
+    universe_tickers: Optional[List[str]],
+    as_of_date: Optional[str],
+    lookback: int,
+    window: int,
+    adjustment: str,
+    cluster_threshold: float,
+    include_series: bool,
+    job_id: str,
+    token: CancellationToken
+) -> Dict[str, Any]:
+    """
+    Blockierender Teil von create_screen_analytics, läuft im Compute-Pool
+    """
+    try:
+        screen_date = None
+        if as_of_date:
+            screen_date = datetime.strptime(as_of_date, "%Y-%m-%d")
+        
+        # Treffer eines gespeicherten Screenings, sofern keine Ticker angegeben sind
+        if screen_id is not None:
+            screen = db.query(Screen).filter(Screen.id == screen_id).first()
+            if not screen:
+                raise HTTPException(status_code=404, detail=f"Screening mit ID {screen_id} nicht gefunden")
+            if tickers is None:
+                tickers = (screen.results or {}).get("tickers", [])
+            screen_date = screen_date or screen.date
+        
+        if not tickers:
+            raise HTTPException(status_code=400, detail="Entweder tickers oder screen_id mit Treffern muss angegeben werden")
+        tickers = list(dict.fromkeys(tickers))
+        screen_date = screen_date or datetime.now()
+        
+        # Universum als Vergleichsbasis, sonst die Treffer untereinander
+        if universe or universe_tickers:
+            members, membership = resolve_request_tickers(universe_tickers, universe, screen_date)
+            universe_key = (
+                membership.name if membership is not None else None,
+                tuple(sorted(set(members)))
+            )
+        else:
+            members = tickers
+            universe_key = (None, tuple(sorted(tickers)))
+        
+        analytics = run_screen_analytics(
+            tickers=tickers,
+            universe_tickers=members,
+            universe_key=universe_key,
+            as_of_date=screen_date,
+            lookback=lookback,
+            window=window,
+            adjustment=adjustment,
+            cluster_threshold=cluster_threshold,
+            include_series=include_series,
+            cancel_token=token
+        )
+        
+        return _with_partial_flag({**analytics, "screen_id": screen_id, "job_id": job_id}, token)
+    
+    except HTTPException:
+        raise
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
 @router.get("/", response_model=List[Dict[str, Any]])
 def list_screens(
+    request: Request,
+    response: Response,
     skip: int = 0, 
     limit: int = 100, 
     db: Session = Depends(get_db)
 ):
     """
-    Gibt eine Liste der gespeicherten Screenings zurück
+    Gibt eine Liste der gespeicherten Screenings zurück.
+    Unterstützt bedingte Anfragen (schwacher ETag, Last-Modified).
     """
     try:
+        not_modified = conditional_get(
+            request, response, ("screens", skip, limit),
+            lambda: _screen_list_version(db, skip, limit)
+        )
+        if not_modified is not None:
+            return not_modified
+        
         screens = db.query(Screen).order_by(Screen.date.desc()).offset(skip).limit(limit).all()
         
         # Konvertiere SQLAlchemy-Objekte in Dictionaries
@@ -96,15 +381,231 @@ def list_screens(
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+@router.get("/by-ticker/{ticker}", response_model=Dict[str, Any])
+def list_screens_by_ticker(
+    ticker: str,
+    start_date: Optional[str] = Query(None),
+    end_date: Optional[str] = Query(None),
+    limit: int = Query(100, ge=1, le=1000),
+    source: str = Query("hits", pattern="^(hits|jsonb)$"),
+    db: Session = Depends(get_db)
+):
+    """
+    Gibt die gespeicherten Screenings zurück, in deren Ergebnis der Ticker
+    enthalten war (neueste zuerst), optional eingeschränkt auf einen Zeitraum.
+    
+    - **source**: hits (Standard) liest den umgekehrten Index screen_hits,
+      jsonb (nur PostgreSQL) durchsucht results über den GIN-Index
+    """
+    try:
+        start = datetime.strptime(start_date, "%Y-%m-%d") if start_date else None
+        end = datetime.strptime(end_date, "%Y-%m-%d") + timedelta(days=1) if end_date else None
+        
+        if source == "jsonb":
+            if db.get_bind().dialect.name != "postgresql":
+                raise HTTPException(status_code=400, detail="source=jsonb wird nur mit PostgreSQL unterstützt")
+            query = (
+                db.query(Screen.id, Screen.date, Screen.name, Screen.filter_criteria)
+                .filter(text("(screens.results::jsonb -> 'tickers') @> jsonb_build_array(CAST(:ticker AS text))"))
+                .params(ticker=ticker)
+            )
+            date_column, id_column = Screen.date, Screen.id
+        else:
+            query = (
+                db.query(ScreenHit.screen_id, ScreenHit.date, Screen.name, Screen.filter_criteria)
+                .join(Screen, Screen.id == ScreenHit.screen_id)
+                .filter(ScreenHit.ticker == ticker)
+            )
+            date_column, id_column = ScreenHit.date, ScreenHit.screen_id
+        
+        if start is not None:
+            query = query.filter(date_column >= start)
+        if end is not None:
+            query = query.filter(date_column < end)
+        
+        rows = query.order_by(date_column.desc(), id_column.desc()).limit(limit).all()
+        
+        return {
+            "ticker": ticker,
+            "count": len(rows),
+            "screens": [
+                {
+                    "screen_id": screen_id,
+                    "name": name,
+                    "date": date.strftime("%Y-%m-%d"),
+                    "criteria_summary": _summarize_criteria(criteria)
+                }
+                for screen_id, date, name, criteria in rows
+            ]
+        }
+    
+    except HTTPException:
+        raise
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.post("/hits/backfill", response_model=Dict[str, Any])
+def backfill_hits(db: Session = Depends(get_db)):
+    """
+    Trägt den umgekehrten Index (screen_hits) für Screenings nach, die vor
+    seiner Einführung gespeichert wurden. Kann gefahrlos wiederholt werden.
+    """
+    try:
+        written = backfill_screen_hits(db)
+        return {"message": f"{written} Treffer nachgetragen", "written": written}
+    
+    except Exception as e:
+        db.rollback()
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.get("/jobs", response_model=List[Dict[str, Any]])
+async def list_screen_jobs():
+    """
+    Gibt die laufenden Screenings zurück
+    """
+    return jobs.list("screen")
+
+@router.delete("/jobs/{job_id}", response_model=Dict[str, Any])
+async def cancel_screen_job(job_id: str):
+    """
+    Bricht ein laufendes Screening ab
+    """
+    if not jobs.cancel(job_id, "screen"):
+        raise HTTPException(status_code=404, detail=f"Laufendes Screening mit Job-ID {job_id} nicht gefunden")
+    
+    return {"message": f"Screening mit Job-ID {job_id} wird abgebrochen"}
+
+@router.get("/latest", response_model=Dict[str, Any])
+def get_latest_screen(
+    name: str = Query(...),
+    db: Session = Depends(get_db)
+):
+    """
+    Gibt das zuletzt materialisierte Ergebnis eines geplanten Screenings zurück
+    """
+    try:
+        screen = (
+            db.query(Screen)
+            .filter(Screen.name == name)
+            .order_by(Screen.date.desc(), Screen.id.desc())
+            .first()
+        )
+        if not screen:
+            raise HTTPException(status_code=404, detail=f"Kein materialisiertes Screening mit dem Namen '{name}' gefunden")
+        
+        return {
+            "id": screen.id,
+            "name": screen.name,
+            "date": screen.date.strftime("%Y-%m-%d"),
+            "criteria": screen.filter_criteria,
+            "results": screen.results,
+            "notes": screen.notes,
+            "created_at": screen.created_at.strftime("%Y-%m-%d %H:%M:%S")
+        }
+    
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.post("/schedules", response_model=Dict[str, Any])
+def register_scheduled_screen(
+    name: str = Body(...),
+    criteria: Dict[str, Any] = Body(...),
+    tickers: List[str] = Body(...),
+    is_active: bool = Body(True),
+    db: Session = Depends(get_db)
+):
+    """
+    Registriert ein Screening für die tägliche Materialisierung
+    (ein bestehender Eintrag mit demselben Namen wird aktualisiert)
+    """
+    try:
+        schedule = db.query(ScheduledScreen).filter(ScheduledScreen.name == name).first()
+        if not schedule:
+            schedule = ScheduledScreen(name=name)
+            db.add(schedule)
+        
+        schedule.filter_criteria = criteria
+        schedule.tickers = tickers
+        schedule.is_active = is_active
+        db.commit()
+        db.refresh(schedule)
+        
+        return _schedule_to_dict(schedule)
+    
+    except Exception as e:
+        db.rollback()
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.get("/schedules", response_model=List[Dict[str, Any]])
+def list_scheduled_screens(db: Session = Depends(get_db)):
+    """
+    Gibt alle geplanten Screenings zurück
+    """
+    try:
+        schedules = db.query(ScheduledScreen).order_by(ScheduledScreen.name).all()
+        return [_schedule_to_dict(schedule) for schedule in schedules]
+    
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.delete("/schedules/{name}", response_model=Dict[str, Any])
+def delete_scheduled_screen(
+    name: str,
+    db: Session = Depends(get_db)
+):
+    """
+    Entfernt ein geplantes Screening (bereits materialisierte Ergebnisse bleiben erhalten)
+    """
+    try:
+        schedule = db.query(ScheduledScreen).filter(ScheduledScreen.name == name).first()
+        if not schedule:
+            raise HTTPException(status_code=404, detail=f"Geplantes Screening '{name}' nicht gefunden")
+        
+        db.delete(schedule)
+        db.commit()
+        
+        return {"message": f"Geplantes Screening '{name}' wurde erfolgreich gelöscht"}
+    
+    except HTTPException:
+        db.rollback()
+        raise
+    except Exception as e:
+        db.rollback()
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.post("/schedules/run", response_model=Dict[str, Any])
+def trigger_scheduled_screens():
+    """
+    Startet die geplanten Screenings sofort, z.B. am Ende des täglichen Daten-Imports
+    """
+    if not screen_scheduler.trigger():
+        raise HTTPException(status_code=503, detail="Der Screening-Scheduler ist nicht aktiv")
+    
+    return {"message": "Geplante Screenings wurden gestartet", "last_run": screen_scheduler.last_run}
+
 @router.get("/{screen_id}", response_model=Dict[str, Any])
 def get_screen(
     screen_id: int,
+    request: Request,
+    response: Response,
     db: Session = Depends(get_db)
 ):
     """
-    Gibt detaillierte Informationen zu einem bestimmten Screening zurück
+    Gibt detaillierte Informationen zu einem bestimmten Screening zurück.
+    Mit If-None-Match wird bei unverändertem starkem ETag 304 geliefert.
     """
     try:
+        not_modified = conditional_get(
+            request, response, ("screen", screen_id),
+            lambda: _screen_version(db, screen_id)
+        )
+        if not_modified is not None:
+            return not_modified
+        
         screen = db.query(Screen).filter(Screen.id == screen_id).first()
         if not screen:
             raise HTTPException(status_code=404, detail=f"Screening mit ID {screen_id} nicht gefunden")
@@ -119,9 +620,166 @@ def get_screen(
             "created_at": screen.created_at.strftime("%Y-%m-%d %H:%M:%S")
         }
     
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+def _screen_version(db: Session, screen_id: int):
+    """
+    Versionsstand eines Screenings (ändert sich nur durch /refresh)
+    """
+    modified_at = (
+        db.query(func.coalesce(Screen.updated_at, Screen.created_at))
+        .filter(Screen.id == screen_id)
+        .first()
+    )
+    if modified_at is None:
+        return None
+    return strong_etag("screen", screen_id, modified_at[0]), modified_at[0]
+
+def _screen_list_version(db: Session, skip: int, limit: int):
+    """
+    Versionsstand der Screening-Liste aus Anzahl, höchster ID und letzter Änderung
+    """
+    count, max_id, last_modified = db.query(
+        select(func.count()).select_from(Screen).scalar_subquery(),
+        select(func.max(Screen.id)).scalar_subquery(),
+        select(func.max(func.coalesce(Screen.updated_at, Screen.created_at))).scalar_subquery()
+    ).one()
+    return weak_etag("screens", skip, limit, count, max_id, last_modified), last_modified
+
+@router.post("/{screen_id}/refresh", response_model=Dict[str, Any])
+def refresh_saved_screen(
+    screen_id: int,
+    tickers: Optional[List[str]] = Body(None, embed=True),
+    as_of_date: Optional[str] = Body(None, embed=True),
+    db: Session = Depends(get_db)
+):
+    """
+    Aktualisiert ein gespeichertes Screening inkrementell: nur Ticker mit
+    geänderten Kursdaten werden neu ausgewertet. Gibt die Differenz zur
+    letzten Auswertung zurück (neu aufgenommen, entfallen, unverändert).
+    """
+    try:
+        screen = db.query(Screen).filter(Screen.id == screen_id).first()
+        if not screen:
+            raise HTTPException(status_code=404, detail=f"Screening mit ID {screen_id} nicht gefunden")
+        
+        screen_date = None
+        if as_of_date:
+            screen_date = datetime.strptime(as_of_date, "%Y-%m-%d")
+        
+        state_rows = {
+            row.ticker: row
+            for row in db.query(ScreenTickerState).filter(ScreenTickerState.screen_id == screen_id).all()
+        }
+        
+        if state_rows:
+            previous_state = {
+                ticker: {"data_version": row.data_version, "matched": row.matched, "result": row.result}
+                for ticker, row in state_rows.items()
+            }
+        else:
+            # Erste Aktualisierung: Treffer des gespeicherten Screenings als Ausgangszustand
+            previous_state = {
+                ticker: {"data_version": None, "matched": True, "result": None}
+                for ticker in (screen.results or {}).get("tickers", [])
+            }
+        
+        # Ohne explizites Universum wird das zuletzt ausgewertete verwendet
+        universe = tickers if tickers is not None else list(state_rows.keys())
+        if not universe:
+            raise HTTPException(
+                status_code=400,
+                detail="Für die erste Aktualisierung muss eine Ticker-Liste angegeben werden"
+            )
+        
+        refresh = refresh_screen(
+            criteria=screen.filter_criteria or {},
+            tickers=universe,
+            previous_state=previous_state,
+            as_of_date=screen_date
+        )
+        
+        # Zustand nur für neu ausgewertete Ticker schreiben
+        for ticker in refresh["evaluated"]:
+            entry = refresh["state"][ticker]
+            row = state_rows.get(ticker)
+            if row is None:
+                row = ScreenTickerState(screen_id=screen_id, ticker=ticker)
+                db.add(row)
+            row.data_version = entry["data_version"]
+            row.matched = entry["matched"]
+            row.result = entry["result"]
+        
+        # Ticker, die nicht mehr im Universum sind, entfernen
+        for ticker, row in state_rows.items():
+            if ticker not in refresh["state"]:
+                db.delete(row)
+        
+        screen.date = screen_date or datetime.now()
+        screen.results = {"tickers": [r["ticker"] for r in refresh["results"]]}
+        screen.notes = f"Screening mit {len(refresh['results'])} Ergebnissen"
+        replace_screen_hits(db, screen)
+        db.commit()
+        versions.invalidate("screen", "screens")
+        
+        return {
+            "screen_id": screen.id,
+            "date": screen.date.strftime("%Y-%m-%d"),
+            "results": refresh["results"],
+            "entered": refresh["entered"],
+            "exited": refresh["exited"],
+            "unchanged": refresh["unchanged"],
+            "evaluated_count": len(refresh["evaluated"]),
+            "skipped_count": refresh["skipped"]
+        }
+    
+    except HTTPException:
+        db.rollback()
+        raise
+    except Exception as e:
+        db.rollback()
+        raise HTTPException(status_code=500, detail=str(e))
+
+def _with_partial_flag(response: Dict[str, Any], token: CancellationToken) -> Dict[str, Any]:
+    """
+    Hilfsfunktion zum Kennzeichnen abgebrochener Screenings als Teilergebnis
+    """
+    if token.interrupted:
+        response["partial"] = True
+        response["cancel_reason"] = token.reason
+    return response
+
+def _build_screen(
+    criteria: Dict[str, Any],
+    screen_results: List[Dict[str, Any]],
+    screen_date: Optional[datetime]
+) -> Screen:
+    """
+    Hilfsfunktion zum Anlegen eines Screen-Eintrags aus den Screening-Ergebnissen
+    """
+    return Screen(
+        date=screen_date or datetime.now(),
+        filter_criteria=criteria,
+        results={"tickers": [r["ticker"] for r in screen_results]},
+        notes=f"Screening mit {len(screen_results)} Ergebnissen"
+    )
+
+def _schedule_to_dict(schedule: ScheduledScreen) -> Dict[str, Any]:
+    """
+    Hilfsfunktion zum Konvertieren eines geplanten Screenings in ein Dictionary
+    """
+    return {
+        "id": schedule.id,
+        "name": schedule.name,
+        "criteria": schedule.filter_criteria,
+        "tickers": schedule.tickers,
+        "is_active": schedule.is_active,
+        "last_run_at": schedule.last_run_at.strftime("%Y-%m-%d %H:%M:%S") if schedule.last_run_at else None
+    }
+
 def _summarize_criteria(criteria: Dict[str, Any]) -> str:
     """
     Hilfsfunktion zum Zusammenfassen der Filterkriterien für die Anzeige
@@ -1,10 +1,12 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Request, Response
+from sqlalchemy import func, select
 from sqlalchemy.orm import Session
 from typing import List, Dict, Any
 from pydantic import BaseModel
 
 from ..database import get_db
 from ..models.models import Strategy
+from ..services.http_cache import conditional_get, strong_etag, weak_etag, versions
 
 router = APIRouter(
     prefix="/strategies",
@@ -45,6 +47,7 @@ def create_strategy(
         
         db.add(strategy)
         db.commit()
+        versions.invalidate("strategies")
         db.refresh(strategy)
         
         # Konvertiere SQLAlchemy-Objekt in Dictionary
@@ -65,14 +68,24 @@ def create_strategy(
 
 @router.get("/", response_model=List[Dict[str, Any]])
 def list_strategies(
+    request: Request,
+    response: Response,
     skip: int = 0, 
     limit: int = 100, 
     db: Session = Depends(get_db)
 ):
     """
-    Gibt eine Liste aller gespeicherten Strategien zurück
+    Gibt eine Liste aller gespeicherten Strategien zurück.
+    Unterstützt bedingte Anfragen (schwacher ETag, Last-Modified).
     """
     try:
+        not_modified = conditional_get(
+            request, response, ("strategies", skip, limit),
+            lambda: _strategy_list_version(db, skip, limit)
+        )
+        if not_modified is not None:
+            return not_modified
+        
         strategies = db.query(Strategy).offset(skip).limit(limit).all()
         
         # Konvertiere SQLAlchemy-Objekte in Dictionaries
@@ -93,12 +106,22 @@ def list_strategies(
 @router.get("/{strategy_id}", response_model=Dict[str, Any])
 def get_strategy(
     strategy_id: int, 
+    request: Request,
+    response: Response,
     db: Session = Depends(get_db)
 ):
     """
-    Gibt detaillierte Informationen zu einer bestimmten Strategie zurück
+    Gibt detaillierte Informationen zu einer bestimmten Strategie zurück.
+    Mit If-None-Match wird bei unverändertem ETag 304 geliefert.
     """
     try:
+        not_modified = conditional_get(
+            request, response, ("strategy", strategy_id),
+            lambda: _strategy_version(db, strategy_id)
+        )
+        if not_modified is not None:
+            return not_modified
+        
         strategy = db.query(Strategy).filter(Strategy.id == strategy_id).first()
         if not strategy:
             raise HTTPException(status_code=404, detail=f"Strategie mit ID {strategy_id} nicht gefunden")
@@ -113,9 +136,31 @@ def get_strategy(
             "updated_at": strategy.updated_at.strftime("%Y-%m-%d %H:%M:%S")
         }
     
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+def _strategy_version(db: Session, strategy_id: int):
+    """
+    Versionsstand einer Strategie aus ihrem Änderungszeitpunkt
+    """
+    row = db.query(Strategy.updated_at).filter(Strategy.id == strategy_id).first()
+    if row is None:
+        return None
+    return strong_etag("strategy", strategy_id, row[0]), row[0]
+
+def _strategy_list_version(db: Session, skip: int, limit: int):
+    """
+    Versionsstand der Strategie-Liste aus Anzahl, höchster ID und letzter Änderung
+    """
+    count, max_id, last_modified = db.query(
+        select(func.count()).select_from(Strategy).scalar_subquery(),
+        select(func.max(Strategy.id)).scalar_subquery(),
+        select(func.max(Strategy.updated_at)).scalar_subquery()
+    ).one()
+    return weak_etag("strategies", skip, limit, count, max_id, last_modified), last_modified
+
 @router.put("/{strategy_id}", response_model=Dict[str, Any])
 def update_strategy(
     strategy_id: int,
@@ -145,6 +190,7 @@ def update_strategy(
             strategy.parameters = strategy_data.parameters
         
         db.commit()
+        versions.invalidate("strategy", "strategies", "backtest", "backtests")
         db.refresh(strategy)
         
         # Konvertiere SQLAlchemy-Objekt in Dictionary
@@ -185,6 +231,7 @@ def delete_strategy(
         
         db.delete(strategy)
         db.commit()
+        versions.invalidate("strategy", "strategies", "backtest", "backtests")
         
         return {"message": f"Strategie mit ID {strategy_id} wurde erfolgreich gelöscht"}
     
@@ -0,0 +1,210 @@
+import os
+import threading
+import uuid
+from collections import OrderedDict
+from datetime import datetime, time, timedelta
+from typing import Callable, Dict, List, Optional, Set, Tuple
+
+import numpy as np
+import pandas as pd
+
+from ..database import SessionLocal
+from ..models.models import CorporateAction
+from .dates import day_numbers
+
+# Maximale Anzahl zwischengespeicherter adjustierter Kurs-DataFrames
+ADJUSTED_CACHE_SIZE = int(os.getenv("ADJUSTED_CACHE_SIZE", "256"))
+
+PRICE_COLUMNS = ['open', 'high', 'low', 'close']
+
+# Lädt die unadjustierten Kurse: (ticker, start_date, end_date, compact) -> DataFrame
+RawLoader = Callable[[str, datetime, datetime, bool], pd.DataFrame]
+
+
+class TickerFactors:
+    """
+    Kumulierte Adjustierungsfaktoren eines Tickers. Gespeichert werden nur
+    die Ex-Tage und je Modus das Produkt der Faktoren aller Ereignisse ab
+    diesem Ex-Tag; der Faktor eines Balkens ergibt sich daraus per
+    Indexsuche, unabhängig vom geladenen Zeitraum.
+    """
+
+    def __init__(self, ex_days: np.ndarray, split: np.ndarray, total_return: np.ndarray):
+        self.ex_days = ex_days
+        self.cumulative = {"split": split, "total_return": total_return}
+
+    def factors(self, days: np.ndarray, adjustment: str) -> np.ndarray:
+        """
+        Faktor je Balken: Produkt aller Ereignisse mit Ex-Tag nach dem Balken
+        """
+        return self.cumulative[adjustment][np.searchsorted(self.ex_days, days, side="right")]
+
+
+def _suffix_product(multipliers: np.ndarray) -> np.ndarray:
+    """
+    Produkt der Multiplikatoren ab jeder Position, mit 1.0 am Ende
+    """
+    return np.r_[np.cumprod(multipliers[::-1])[::-1], 1.0]
+
+
+class AdjustmentStore:
+    """
+    Lädt Corporate Actions, berechnet daraus die Faktoren je Ticker beim
+    ersten Zugriff und hält adjustierte Kurs-DataFrames in einem LRU-Cache.
+
+    Die unadjustierten Kurse bleiben unverändert; ein adjustierter Verlauf
+    entsteht mit einer einzigen vektorisierten Multiplikation. Neue
+    Corporate Actions verwerfen nur Faktoren und Cache-Einträge des
+    betroffenen Tickers (invalidate).
+
+    version kennzeichnet den Datenstand und ändert sich mit jeder
+    Invalidierung. Arbeitspakete tragen ihn zu Pool-Prozessen und
+    TCP-Workern, die ihre Caches damit abgleichen (sync_version).
+    """
+
+    def __init__(self, max_views: int = ADJUSTED_CACHE_SIZE):
+        self.max_views = max_views
+        self.version = uuid.uuid4().hex
+        self._lock = threading.Lock()
+        self._actions: Dict[str, List[Tuple[datetime, str, float]]] = {}
+        self._actions_loaded = False
+        self._stale: Set[str] = set()
+        self._factors: Dict[str, TickerFactors] = {}
+        self._views: "OrderedDict[Tuple, pd.DataFrame]" = OrderedDict()
+
+    def _load_actions(self, ticker: str) -> List[Tuple[datetime, str, float]]:
+        """
+        Corporate Actions eines Tickers. Beim ersten Aufruf werden alle
+        Ereignisse mit einer Abfrage geladen, nach einer Invalidierung nur
+        die des betroffenen Tickers.
+        """
+        with self._lock:
+            if self._actions_loaded and ticker not in self._stale:
+                return self._actions.get(ticker, [])
+            load_all = not self._actions_loaded
+
+        db = SessionLocal()
+        try:
+            query = db.query(CorporateAction.ticker, CorporateAction.ex_date, CorporateAction.action_type, CorporateAction.value)
+            if not load_all:
+                query = query.filter(CorporateAction.ticker == ticker)
+            rows = query.order_by(CorporateAction.ex_date).all()
+        finally:
+            db.close()
+
+        actions: Dict[str, List[Tuple[datetime, str, float]]] = {}
+        for row_ticker, ex_date, action_type, value in rows:
+            actions.setdefault(row_ticker, []).append((ex_date, action_type, value))
+
+        with self._lock:
+            if load_all:
+                self._actions = actions
+                self._actions_loaded = True
+            self._actions[ticker] = actions.get(ticker, [])
+            self._stale.discard(ticker)
+            return self._actions[ticker]
+
+    def _ticker_factors(self, ticker: str, loader: RawLoader) -> TickerFactors:
+        with self._lock:
+            factors = self._factors.get(ticker)
+        if factors is not None:
+            return factors
+
+        actions = self._load_actions(ticker)
+        ex_days = day_numbers([ex_date for ex_date, _, _ in actions]) if actions else np.empty(0, dtype=np.int64)
+        split = np.ones(len(actions))
+        dividend = np.ones(len(actions))
+
+        for i, (ex_date, action_type, value) in enumerate(actions):
+            if action_type == "split" and value:
+                split[i] = 1.0 / value
+            elif action_type == "dividend" and value:
+                # Dividendenfaktor bezogen auf den unadjustierten Schlusskurs vor dem Ex-Tag
+                before = loader(ticker, ex_date - timedelta(days=10), ex_date, False)
+                if len(before):
+                    dividend[i] = 1.0 - value / float(before['close'].iloc[-1])
+
+        factors = TickerFactors(ex_days, _suffix_product(split), _suffix_product(split * dividend))
+        with self._lock:
+            self._factors[ticker] = factors
+        return factors
+
+    def adjusted(
+        self,
+        ticker: str,
+        start_date: datetime,
+        end_date: datetime,
+        compact: bool,
+        adjustment: str,
+        loader: RawLoader
+    ) -> pd.DataFrame:
+        """
+        Adjustierte Kursdaten eines Tickers. Das Ergebnis wird geteilt
+        zwischengespeichert und darf vom Aufrufer nicht verändert werden.
+        Start und Ende werden auf den Tag gerundet, damit z.B. Screenings mit
+        datetime.now() denselben Eintrag treffen.
+        """
+        start_date = datetime.combine(start_date.date(), time.min)
+        end_date = datetime.combine(end_date.date(), time.min)
+        key = (ticker, start_date.date(), end_date.date(), compact, adjustment)
+        with self._lock:
+            view = self._views.get(key)
+            if view is not None:
+                self._views.move_to_end(key)
+                return view
+
+        raw = loader(ticker, start_date, end_date, compact)
+        factors = self._ticker_factors(ticker, loader)
+
+        if len(factors.ex_days) == 0:
+            view = raw
+        else:
+            days = raw['date'].to_numpy(dtype=np.int64) if compact else day_numbers(raw['date'])
+            price_factors = factors.factors(days, adjustment)
+            view = raw.copy()
+            prices = raw[PRICE_COLUMNS].to_numpy(dtype=np.float64) * price_factors[:, None]
+            for i, column in enumerate(PRICE_COLUMNS):
+                view[column] = prices[:, i].astype(raw[column].dtype)
+            # Volumen nur um Splits bereinigen (gegenläufig zum Preis)
+            volume_factors = factors.factors(days, "split")
+            view['volume'] = np.round(raw['volume'].to_numpy(dtype=np.float64) / volume_factors).astype(raw['volume'].dtype)
+
+        with self._lock:
+            self._views[key] = view
+            self._views.move_to_end(key)
+            while len(self._views) > self.max_views:
+                self._views.popitem(last=False)
+        return view
+
+    def invalidate(self, ticker: str) -> None:
+        """
+        Verwirft Ereignisse, Faktoren und adjustierte Kurse eines Tickers,
+        z.B. nach einer neuen Corporate Action
+        """
+        with self._lock:
+            self._actions.pop(ticker, None)
+            self._stale.add(ticker)
+            self._factors.pop(ticker, None)
+            for key in [key for key in self._views if key[0] == ticker]:
+                del self._views[key]
+            self.version = uuid.uuid4().hex
+
+    def sync_version(self, version: Optional[str]) -> bool:
+        """
+        Übernimmt den Datenstand eines anderen Prozesses. Weicht er vom
+        eigenen ab, werden alle Ereignisse, Faktoren und adjustierten Kurse
+        verworfen; liefert dann True.
+        """
+        with self._lock:
+            if version is None or version == self.version:
+                return False
+            self.version = version
+            self._actions = {}
+            self._actions_loaded = False
+            self._stale.clear()
+            self._factors.clear()
+            self._views.clear()
+            return True
+
+
+adjustments = AdjustmentStore()
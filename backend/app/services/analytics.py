@@ -0,0 +1,377 @@
+import os
+import threading
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from typing import Any, Dict, Hashable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from .adjustments import adjustments
+from .jobs import CancellationToken
+from .profiling import profile_stage
+from .trading_service import (
+    SCREEN_UNIT_SIZE,
+    bar_day_numbers,
+    day_number_to_date,
+    load_stock_data,
+    map_screen_units,
+    sync_data_version,
+)
+
+# Standard-Betrachtungszeitraum (Handelstage) für Renditematrix und Korrelationen
+ANALYTICS_LOOKBACK = int(os.getenv("ANALYTICS_LOOKBACK", "126"))
+
+# Standard-Fenster (Handelstage) der relativen Stärke
+ANALYTICS_RS_WINDOW = int(os.getenv("ANALYTICS_RS_WINDOW", "63"))
+
+# Maximale Anzahl zwischengespeicherter Universums-Statistiken
+ANALYTICS_CACHE_SIZE = int(os.getenv("ANALYTICS_CACHE_SIZE", "32"))
+
+
+def trading_day(as_of_date: datetime) -> datetime:
+    """
+    Handelstag eines Stichtags (Wochenenden zählen zum vorherigen Freitag)
+    """
+    day = datetime(as_of_date.year, as_of_date.month, as_of_date.day)
+    while day.weekday() >= 5:
+        day -= timedelta(days=1)
+    return day
+
+
+def load_close_series(unit: Dict[str, Any]) -> List[Tuple[np.ndarray, np.ndarray]]:
+    """
+    Lädt Tagesnummern und Schlusskurse der Ticker eines Arbeitspakets. Läuft
+    im Webprozess oder in einem Pool-Prozess (siehe map_screen_units).
+    """
+    sync_data_version(unit['data_version'])
+
+    loaded = []
+    for ticker in unit['tickers']:
+        df = load_stock_data(ticker, unit['start_date'], unit['end_date'], adjustment=unit['adjustment'])
+        loaded.append((bar_day_numbers(df), df['close'].to_numpy(dtype=np.float64)))
+    return loaded
+
+
+def build_return_matrix(
+    tickers: Sequence[str],
+    as_of_date: datetime,
+    lookback: int,
+    adjustment: str = "none",
+    days: Optional[np.ndarray] = None,
+    cancel_token: Optional[CancellationToken] = None
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Lädt die Schlusskurse der Ticker und richtet sie an einem gemeinsamen
+    Tagesraster aus. Ohne days ist das Raster die Vereinigung der
+    Handelstage aller Ticker, gekürzt auf die letzten lookback + 1 Tage.
+
+    Die Kurse werden in Arbeitspaketen zu SCREEN_UNIT_SIZE Tickern geladen
+    (siehe map_screen_units). Liefert (days, returns) mit den Tagesnummern
+    und der Renditematrix (Tage x Ticker, eine Zeile weniger als days);
+    fehlende Kurse ergeben NaN.
+    """
+    # Kalendertage für lookback Handelstage plus Puffer für Feiertage
+    start_date = as_of_date - timedelta(days=int(lookback * 7 / 5) + 14)
+
+    units = [
+        {
+            'tickers': list(tickers[position:position + SCREEN_UNIT_SIZE]),
+            'start_date': start_date,
+            'end_date': as_of_date,
+            'adjustment': adjustment,
+            'data_version': adjustments.version
+        }
+        for position in range(0, len(tickers), SCREEN_UNIT_SIZE)
+    ]
+
+    loaded = []
+    with profile_stage("load_data"):
+        for series in map_screen_units(load_close_series, units, cancel_token):
+            loaded.extend(series)
+    if cancel_token is not None and len(loaded) < len(tickers):
+        cancel_token.interrupted = True
+
+    if days is None:
+        all_days = [ticker_days for ticker_days, _ in loaded]
+        days = np.unique(np.concatenate(all_days)) if all_days else np.empty(0, dtype=np.int64)
+        days = days[-(lookback + 1):]
+
+    closes = np.full((len(days), len(tickers)), np.nan)
+    for column, (ticker_days, close) in enumerate(loaded):
+        # Kurse per Indexsuche in das Raster einsortieren, nur exakte Treffer
+        positions = np.searchsorted(days, ticker_days)
+        valid = positions < len(days)
+        valid[valid] = days[positions[valid]] == ticker_days[valid]
+        closes[positions[valid], column] = close[valid]
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        returns = closes[1:] / closes[:-1] - 1
+    return days, returns
+
+
+def correlation_matrix(returns: np.ndarray, min_periods: int = 2) -> np.ndarray:
+    """
+    Paarweise Korrelation der Spalten über die jeweils gemeinsam vorhandenen
+    Tage, berechnet über Matrixprodukte statt Schleifen über Tickerpaare.
+    Paare mit weniger als min_periods gemeinsamen Tagen ergeben NaN.
+    """
+    present = ~np.isnan(returns)
+    values = np.where(present, returns, 0.0)
+    mask = present.astype(np.float64)
+
+    # Summen von x_i über die Tage, an denen auch x_j vorhanden ist
+    count = mask.T @ mask
+    sum_x = values.T @ mask
+    sum_xx = (values * values).T @ mask
+    sum_xy = values.T @ values
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        covariance = sum_xy - sum_x * sum_x.T / count
+        variance_x = sum_xx - sum_x * sum_x / count
+        correlation = covariance / np.sqrt(variance_x * variance_x.T)
+
+    correlation[count < min_periods] = np.nan
+    np.clip(correlation, -1.0, 1.0, out=correlation)
+    return correlation
+
+
+def rolling_relative_strength(returns: np.ndarray, benchmark: np.ndarray, window: int) -> np.ndarray:
+    """
+    Rollierende relative Stärke: Wertentwicklung jeder Spalte über window
+    Tage geteilt durch die des Benchmarks (1.0 = gleich stark). Die
+    Fensterprodukte ergeben sich aus Differenzen kumulierter Log-Renditen;
+    Zeilen ohne vollständiges Fenster sind NaN.
+    """
+    growth = window_growth(returns, window)
+    return growth / window_growth(benchmark[:, None], window)
+
+
+def window_growth(returns: np.ndarray, window: int) -> np.ndarray:
+    """
+    Wachstumsfaktor (1 + Rendite) über die letzten window Tage je Zeile.
+    NaN nur dort, wo das Fenster selbst eine Lücke enthält; eine frühere
+    Lücke (z.B. vor dem Börsengang) wirkt nicht auf spätere Fenster.
+    """
+    log_growth = np.log1p(returns)
+    missing = np.isnan(log_growth)
+    zeros = np.zeros((1, returns.shape[1]))
+    cumulative = np.vstack([zeros, np.cumsum(np.where(missing, 0.0, log_growth), axis=0)])
+    gaps = np.vstack([zeros, np.cumsum(missing, axis=0)])
+    result = np.full(returns.shape, np.nan)
+    if window <= len(returns):
+        complete = gaps[window:] - gaps[:-window] == 0
+        result[window - 1:] = np.where(complete, np.exp(cumulative[window:] - cumulative[:-window]), np.nan)
+    return result
+
+
+def percentile_ranks(values: np.ndarray, reference: np.ndarray) -> np.ndarray:
+    """
+    Perzentilrang (0-100) jedes Werts innerhalb der sortierten Referenz;
+    NaN-Werte bleiben NaN
+    """
+    ranks = np.full(len(values), np.nan)
+    if len(reference) == 0:
+        return ranks
+    valid = ~np.isnan(values)
+    ranks[valid] = np.searchsorted(reference, values[valid], side="right") / len(reference) * 100
+    return ranks
+
+
+def correlation_clusters(correlation: np.ndarray, threshold: float) -> np.ndarray:
+    """
+    Clusternummer je Ticker: Zusammenhangskomponenten des Graphen, in dem
+    Ticker mit einer Korrelation >= threshold verbunden sind. Die Nummern
+    werden per Label-Propagation bestimmt (jeder Ticker übernimmt die
+    kleinste Nummer seiner Nachbarn, bis sich nichts mehr ändert).
+    """
+    n = len(correlation)
+    adjacent = np.nan_to_num(correlation, nan=-np.inf) >= threshold
+    adjacent[np.arange(n), np.arange(n)] = True
+
+    labels = np.arange(n)
+    while True:
+        updated = np.where(adjacent, labels[None, :], n).min(axis=1)
+        if np.array_equal(updated, labels):
+            break
+        labels = updated
+    return labels
+
+
+class UniverseStatistics:
+    """
+    Statistiken eines Universums an einem Handelstag: Tagesraster,
+    Renditematrix der Mitglieder, gleichgewichteter Benchmark und die
+    sortierten Fensterrenditen aller Mitglieder als Referenz der Perzentilränge.
+    """
+
+    def __init__(
+        self,
+        tickers: List[str],
+        days: np.ndarray,
+        returns: np.ndarray,
+        window: int
+    ):
+        self.tickers = tickers
+        self.columns = {ticker: column for column, ticker in enumerate(tickers)}
+        self.days = days
+        self.returns = returns
+        counts = (~np.isnan(returns)).sum(axis=1)
+        self.benchmark = np.where(counts > 0, np.nansum(returns, axis=1) / np.maximum(counts, 1), np.nan)
+
+        growth = window_growth(returns, window)[-1] if len(returns) else np.empty(0)
+        self.window_returns = np.sort(growth[~np.isnan(growth)] - 1)
+        self.benchmark_return = float(window_growth(self.benchmark[:, None], window)[-1, 0] - 1) if len(returns) else float("nan")
+
+
+class UniverseStatisticsCache:
+    """
+    LRU-Cache der Universums-Statistiken je (Universum, Handelstag,
+    Zeitraum, Fenster, Adjustierung, Stand der Corporate Actions).
+    Anfragen für dieselben Kandidaten-Universen am selben Tag laden die
+    Mitglieder nur einmal.
+    """
+
+    def __init__(self, max_entries: int = ANALYTICS_CACHE_SIZE):
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[Tuple[Hashable, ...], UniverseStatistics]" = OrderedDict()
+
+    def get(self, key: Tuple[Hashable, ...]) -> Optional[UniverseStatistics]:
+        with self._lock:
+            stats = self._entries.get(key)
+            if stats is not None:
+                self._entries.move_to_end(key)
+            return stats
+
+    def set(self, key: Tuple[Hashable, ...], stats: UniverseStatistics) -> None:
+        with self._lock:
+            self._entries[key] = stats
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+
+universe_statistics = UniverseStatisticsCache()
+
+
+def _nullable(values: np.ndarray) -> List[Optional[float]]:
+    return [None if np.isnan(value) else float(value) for value in values]
+
+
+def run_screen_analytics(
+    tickers: List[str],
+    universe_tickers: List[str],
+    universe_key: Hashable,
+    as_of_date: datetime,
+    lookback: int = ANALYTICS_LOOKBACK,
+    window: int = ANALYTICS_RS_WINDOW,
+    adjustment: str = "none",
+    cluster_threshold: float = 0.7,
+    include_series: bool = False,
+    cancel_token: Optional[CancellationToken] = None
+) -> Dict[str, Any]:
+    """
+    Korrelationen und relative Stärke der Screening-Treffer gegenüber einem
+    Universum.
+
+    Die Statistiken des Universums (Renditematrix, gleichgewichteter
+    Benchmark, Verteilung der Fensterrenditen) werden je Handelstag und -
+    bei adjustierten Kursen - Stand der Corporate Actions
+    zwischengespeichert. Die Renditen der Treffer werden am Tagesraster des
+    Universums ausgerichtet; Mitglieder des Universums werden dabei nicht
+    erneut geladen. Korrelationsmatrix, relative Stärke und Perzentilränge
+    ergeben sich aus einzelnen NumPy-Operationen über die Matrix.
+    Bei einem Abbruch über cancel_token wird ein leeres Ergebnis geliefert.
+    """
+    day = trading_day(as_of_date)
+    # Mit Adjustierung gehört der Datenstand der Corporate Actions zum Schlüssel
+    data_version = adjustments.version if adjustment != "none" else None
+    key = (universe_key, day, lookback, window, adjustment, data_version)
+
+    stats = universe_statistics.get(key)
+    cached = stats is not None
+    if stats is None:
+        days, returns = build_return_matrix(universe_tickers, day, lookback, adjustment, cancel_token=cancel_token)
+        if cancel_token is not None and cancel_token.interrupted:
+            return {}
+        stats = UniverseStatistics(list(universe_tickers), days, returns, window)
+        universe_statistics.set(key, stats)
+
+    outside = [ticker for ticker in tickers if ticker not in stats.columns]
+    _, outside_returns = build_return_matrix(
+        outside, day, lookback, adjustment, days=stats.days, cancel_token=cancel_token
+    )
+    if cancel_token is not None and cancel_token.interrupted:
+        return {}
+
+    outside_columns = {ticker: column for column, ticker in enumerate(outside)}
+    returns = np.column_stack([
+        stats.returns[:, stats.columns[ticker]] if ticker in stats.columns
+        else outside_returns[:, outside_columns[ticker]]
+        for ticker in tickers
+    ]) if tickers else np.empty((len(stats.returns), 0))
+
+    with profile_stage("analytics"):
+        correlation = correlation_matrix(returns)
+        relative_strength = rolling_relative_strength(returns, stats.benchmark, window)
+        growth = window_growth(returns, window)
+        last_return = growth[-1] - 1 if len(growth) else np.full(len(tickers), np.nan)
+        ranks = percentile_ranks(last_return, stats.window_returns)
+        last_rs = relative_strength[-1] if len(relative_strength) else np.full(len(tickers), np.nan)
+
+        # Mittlere Korrelation zu den übrigen Treffern
+        off_diagonal = correlation.copy()
+        np.fill_diagonal(off_diagonal, np.nan)
+        pairs = (~np.isnan(off_diagonal)).sum(axis=1)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            mean_correlation = np.where(pairs > 0, np.nansum(off_diagonal, axis=1) / pairs, np.nan)
+
+        labels = correlation_clusters(correlation, cluster_threshold)
+
+    has_data = ~np.all(np.isnan(returns), axis=0)
+    clusters: Dict[int, List[str]] = {}
+    for ticker, label, valid in zip(tickers, labels, has_data):
+        if valid:
+            clusters.setdefault(int(label), []).append(ticker)
+
+    result = {
+        'date': day.strftime("%Y-%m-%d"),
+        'lookback': lookback,
+        'window': window,
+        'universe': {
+            'size': len(stats.tickers),
+            'benchmark_return_percent': None if np.isnan(stats.benchmark_return) else stats.benchmark_return * 100,
+            'cached': cached
+        },
+        'tickers': list(tickers),
+        'missing': [ticker for ticker, valid in zip(tickers, has_data) if not valid],
+        'correlation': [_nullable(row) for row in correlation],
+        'clusters': sorted(clusters.values(), key=lambda members: (-len(members), members[0])),
+        'relative_strength': sorted(
+            [
+                {
+                    'ticker': ticker,
+                    'return_percent': None if np.isnan(ret) else float(ret * 100),
+                    'relative_strength': None if np.isnan(rs) else float(rs),
+                    'percentile_rank': None if np.isnan(rank) else float(rank),
+                    'mean_correlation': None if np.isnan(corr) else float(corr)
+                }
+                for ticker, ret, rs, rank, corr in zip(tickers, last_return, last_rs, ranks, mean_correlation)
+            ],
+            key=lambda row: -row['percentile_rank'] if row['percentile_rank'] is not None else float("inf")
+        )
+    }
+
+    if include_series:
+        result['series'] = {
+            'dates': [day_number_to_date(d).strftime("%Y-%m-%d") for d in stats.days[1:]],
+            'relative_strength': {
+                ticker: _nullable(relative_strength[:, column]) for column, ticker in enumerate(tickers)
+            }
+        }
+
+    return result
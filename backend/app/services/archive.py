@@ -0,0 +1,273 @@
+import io
+import json
+import zipfile
+from datetime import datetime
+from typing import Any, BinaryIO, Dict, Iterator, List, Optional
+
+from sqlalchemy import insert
+from sqlalchemy.orm import Session
+
+from ..database import SessionLocal
+from ..models.models import Strategy, BacktestResult, BacktestTrade, BacktestEquityPoint
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # pragma: no cover
+    pa = None
+    pq = None
+
+# Anzahl Backtests pro Parquet-Teil beim Export
+EXPORT_CHUNK_SIZE = 500
+
+# Anzahl Zeilen pro Batch beim Import
+IMPORT_BATCH_SIZE = 10000
+
+# Feste Schemas, damit alle Teile eines Archivs als ein Datensatz lesbar sind
+if pa is not None:
+    SUMMARY_SCHEMA = pa.schema([
+        ("backtest_id", pa.int64()),
+        ("strategy_id", pa.int64()),
+        ("strategy_name", pa.string()),
+        ("strategy_description", pa.string()),
+        ("strategy_parameters", pa.string()),  # JSON
+        ("start_date", pa.timestamp("us")),
+        ("end_date", pa.timestamp("us")),
+        ("total_trades", pa.int64()),
+        ("winning_trades", pa.int64()),
+        ("losing_trades", pa.int64()),
+        ("profit_factor", pa.float64()),
+        ("sharpe_ratio", pa.float64()),
+        ("max_drawdown", pa.float64()),
+        ("cagr", pa.float64()),
+        ("metrics", pa.string()),  # JSON
+        ("created_at", pa.timestamp("us")),
+    ])
+    TRADES_SCHEMA = pa.schema([
+        ("backtest_id", pa.int64()),
+        ("ticker", pa.string()),
+        ("entry_date", pa.timestamp("us")),
+        ("exit_date", pa.timestamp("us")),
+        ("entry_price", pa.float64()),
+        ("exit_price", pa.float64()),
+        ("position_size", pa.float64()),
+        ("profit_loss", pa.float64()),
+        ("profit_loss_percent", pa.float64()),
+    ])
+    EQUITY_SCHEMA = pa.schema([
+        ("backtest_id", pa.int64()),
+        ("seq", pa.int64()),
+        ("date", pa.timestamp("us")),
+        ("equity", pa.float64()),
+    ])
+
+
+class _StreamBuffer(io.RawIOBase):
+    """
+    Nicht-seekbarer Puffer, in den zipfile schreibt und aus dem der
+    Export-Generator die fertigen Bytes abholt
+    """
+
+    def __init__(self):
+        self._chunks: List[bytes] = []
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data) -> int:
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def pop(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+def _to_parquet(rows: List[Dict[str, Any]], schema) -> bytes:
+    sink = io.BytesIO()
+    pq.write_table(pa.Table.from_pylist(rows, schema=schema), sink)
+    return sink.getvalue()
+
+
+def _summary_row(result: BacktestResult) -> Dict[str, Any]:
+    strategy = result.strategy
+    return {
+        "backtest_id": result.id,
+        "strategy_id": result.strategy_id,
+        "strategy_name": strategy.name if strategy else None,
+        "strategy_description": strategy.description if strategy else None,
+        "strategy_parameters": json.dumps(strategy.parameters) if strategy and strategy.parameters is not None else None,
+        "start_date": result.start_date,
+        "end_date": result.end_date,
+        "total_trades": result.total_trades,
+        "winning_trades": result.winning_trades,
+        "losing_trades": result.losing_trades,
+        "profit_factor": result.profit_factor,
+        "sharpe_ratio": result.sharpe_ratio,
+        "max_drawdown": result.max_drawdown,
+        "cagr": result.cagr,
+        "metrics": json.dumps(result.metrics) if result.metrics is not None else None,
+        "created_at": result.created_at,
+    }
+
+
+def export_backtests(
+    backtest_ids: Optional[List[int]] = None,
+    strategy_id: Optional[int] = None,
+    created_from: Optional[datetime] = None,
+    created_to: Optional[datetime] = None,
+    chunk_size: int = EXPORT_CHUNK_SIZE
+) -> Iterator[bytes]:
+    """
+    Exportiert die ausgewählten Backtests als ZIP-Archiv mit partitionierten
+    Parquet-Dateien (summary/, trades/, equity/ mit je einem Teil pro Block
+    von chunk_size Backtests). Die Daten werden blockweise gelesen und das
+    Archiv wird während des Lesens gestreamt, sodass nie alle Backtests
+    gleichzeitig im Speicher liegen. created_to ist eine exklusive Obergrenze.
+    """
+    db = SessionLocal()
+    buffer = _StreamBuffer()
+    try:
+        with zipfile.ZipFile(buffer, mode="w", compression=zipfile.ZIP_STORED) as archive:
+            last_id = 0
+            part = 0
+            while True:
+                # Keyset-Pagination über die ID
+                query = db.query(BacktestResult).filter(BacktestResult.id > last_id)
+                if backtest_ids:
+                    query = query.filter(BacktestResult.id.in_(backtest_ids))
+                if strategy_id is not None:
+                    query = query.filter(BacktestResult.strategy_id == strategy_id)
+                if created_from is not None:
+                    query = query.filter(BacktestResult.created_at >= created_from)
+                if created_to is not None:
+                    query = query.filter(BacktestResult.created_at < created_to)
+
+                results = query.order_by(BacktestResult.id).limit(chunk_size).all()
+                if not results:
+                    break
+
+                ids = [result.id for result in results]
+                last_id = ids[-1]
+
+                summary_rows = [_summary_row(result) for result in results]
+                trade_rows = [
+                    {
+                        "backtest_id": trade.backtest_id,
+                        "ticker": trade.ticker,
+                        "entry_date": trade.entry_date,
+                        "exit_date": trade.exit_date,
+                        "entry_price": trade.entry_price,
+                        "exit_price": trade.exit_price,
+                        "position_size": trade.position_size,
+                        "profit_loss": trade.profit_loss,
+                        "profit_loss_percent": trade.profit_loss_percent,
+                    }
+                    for trade in db.query(BacktestTrade)
+                    .filter(BacktestTrade.backtest_id.in_(ids))
+                    .order_by(BacktestTrade.backtest_id, BacktestTrade.id)
+                ]
+                equity_rows = [
+                    {"backtest_id": point.backtest_id, "seq": point.seq, "date": point.date, "equity": point.equity}
+                    for point in db.query(BacktestEquityPoint)
+                    .filter(BacktestEquityPoint.backtest_id.in_(ids))
+                    .order_by(BacktestEquityPoint.backtest_id, BacktestEquityPoint.seq)
+                ]
+
+                archive.writestr(f"summary/part-{part:05d}.parquet", _to_parquet(summary_rows, SUMMARY_SCHEMA))
+                archive.writestr(f"trades/part-{part:05d}.parquet", _to_parquet(trade_rows, TRADES_SCHEMA))
+                archive.writestr(f"equity/part-{part:05d}.parquet", _to_parquet(equity_rows, EQUITY_SCHEMA))
+                part += 1
+
+                # Identity-Map leeren, damit der Speicher pro Block begrenzt bleibt
+                db.expunge_all()
+                yield buffer.pop()
+
+        # Zentralverzeichnis des Archivs
+        yield buffer.pop()
+    finally:
+        db.close()
+
+
+def _iter_parquet_rows(archive: zipfile.ZipFile, prefix: str) -> Iterator[List[Dict[str, Any]]]:
+    """
+    Liefert die Zeilen aller Parquet-Teile unter prefix in Batches
+    """
+    names = sorted(name for name in archive.namelist() if name.startswith(prefix) and name.endswith(".parquet"))
+    for name in names:
+        with archive.open(name) as member:
+            parquet_file = pq.ParquetFile(member)
+            for batch in parquet_file.iter_batches(batch_size=IMPORT_BATCH_SIZE):
+                yield batch.to_pylist()
+
+
+def import_backtests(db: Session, fileobj: BinaryIO) -> Dict[str, Any]:
+    """
+    Importiert ein mit export_backtests erzeugtes Archiv. Die Backtests
+    erhalten neue IDs; Strategien werden über ihren Namen zugeordnet und bei
+    Bedarf angelegt. Trades und Equity werden batchweise eingefügt.
+    """
+    id_map: Dict[int, int] = {}
+    strategy_ids: Dict[str, int] = {}
+    counts = {"backtests": 0, "trades": 0, "equity_points": 0}
+
+    with zipfile.ZipFile(fileobj) as archive:
+        for rows in _iter_parquet_rows(archive, "summary/"):
+            new_results = []
+            for row in rows:
+                strategy_id = None
+                name = row["strategy_name"]
+                if name is not None:
+                    if name not in strategy_ids:
+                        strategy = db.query(Strategy).filter(Strategy.name == name).first()
+                        if not strategy:
+                            strategy = Strategy(
+                                name=name,
+                                description=row["strategy_description"],
+                                parameters=json.loads(row["strategy_parameters"]) if row["strategy_parameters"] else None
+                            )
+                            db.add(strategy)
+                            db.flush()
+                        strategy_ids[name] = strategy.id
+                    strategy_id = strategy_ids[name]
+
+                metrics = json.loads(row["metrics"]) if row["metrics"] else None
+                new_results.append((row["backtest_id"], BacktestResult(
+                    strategy_id=strategy_id,
+                    start_date=row["start_date"],
+                    end_date=row["end_date"],
+                    total_trades=row["total_trades"],
+                    winning_trades=row["winning_trades"],
+                    losing_trades=row["losing_trades"],
+                    profit_factor=row["profit_factor"],
+                    sharpe_ratio=row["sharpe_ratio"],
+                    max_drawdown=row["max_drawdown"],
+                    cagr=row["cagr"],
+                    win_rate=(metrics or {}).get("win_rate"),
+                    net_profit_percent=(metrics or {}).get("net_profit_percent"),
+                    metrics=metrics,
+                    created_at=row["created_at"]
+                )))
+
+            db.add_all([result for _, result in new_results])
+            db.flush()
+            for old_id, result in new_results:
+                id_map[old_id] = result.id
+            counts["backtests"] += len(new_results)
+            db.expunge_all()
+
+        for rows in _iter_parquet_rows(archive, "trades/"):
+            rows = [dict(row, backtest_id=id_map[row["backtest_id"]]) for row in rows if row["backtest_id"] in id_map]
+            if rows:
+                db.execute(insert(BacktestTrade), rows)
+                counts["trades"] += len(rows)
+
+        for rows in _iter_parquet_rows(archive, "equity/"):
+            rows = [dict(row, backtest_id=id_map[row["backtest_id"]]) for row in rows if row["backtest_id"] in id_map]
+            if rows:
+                db.execute(insert(BacktestEquityPoint), rows)
+                counts["equity_points"] += len(rows)
+
+    db.commit()
+    return {**counts, "id_map": id_map}
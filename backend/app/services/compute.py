@@ -0,0 +1,168 @@
+import asyncio
+import contextvars
+import functools
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+from typing import Any, Callable, Dict, Iterable, Iterator, Optional
+
+from fastapi import HTTPException
+
+# Anzahl gleichzeitig laufender rechenintensiver Anfragen (Backtests, Screenings)
+COMPUTE_CONCURRENCY = int(os.getenv("COMPUTE_CONCURRENCY", "2"))
+
+# Anzahl rechenintensiver Anfragen, die zusätzlich auf einen freien Platz
+# warten dürfen; darüber hinaus wird mit 429 geantwortet
+COMPUTE_QUEUE_DEPTH = int(os.getenv("COMPUTE_QUEUE_DEPTH", "8"))
+
+# Anzahl der Prozesse für die CPU-lastigen Arbeitspakete
+COMPUTE_PROCESSES = int(os.getenv("COMPUTE_PROCESSES", os.getenv("BACKTEST_WORKERS", str(os.cpu_count() or 2))))
+
+# Empfohlene Wartezeit (Retry-After) in Sekunden bei voller Warteschlange
+COMPUTE_RETRY_AFTER = int(os.getenv("COMPUTE_RETRY_AFTER", "5"))
+
+# Abstand, in dem während des Wartens auf Ergebnisse der Abbruch geprüft wird
+_POLL_INTERVAL = 0.1
+
+
+class ComputePool:
+    """
+    Eigener, begrenzter Ausführungsweg für rechenintensive Endpunkte, damit
+    sie den Threadpool von Starlette (und damit die leichten Journal- und
+    Strategie-Endpunkte) nicht blockieren.
+
+    - Zulassung: höchstens concurrency Anfragen laufen, queue_depth weitere
+      warten; jede weitere Anfrage wird sofort mit 429 abgewiesen.
+    - Die Anfragen selbst (Datenbankzugriffe, Zusammenführen der Ergebnisse)
+      laufen in einem eigenen Threadpool mit concurrency Threads.
+    - CPU-lastige Arbeitspakete laufen über map in einem gemeinsamen
+      Prozess-Pool, damit sie den GIL des Webprozesses nicht belegen.
+    """
+
+    def __init__(
+        self,
+        concurrency: int = COMPUTE_CONCURRENCY,
+        queue_depth: int = COMPUTE_QUEUE_DEPTH,
+        processes: int = COMPUTE_PROCESSES
+    ):
+        self.concurrency = max(1, concurrency)
+        self.queue_depth = max(0, queue_depth)
+        self.processes = max(1, processes)
+        self._lock = threading.Lock()
+        self._admitted = 0
+        self._running = 0
+        self._rejected = 0
+        self._threads: Optional[ThreadPoolExecutor] = None
+        self._pool: Optional[ProcessPoolExecutor] = None
+
+    @property
+    def capacity(self) -> int:
+        return self.concurrency + self.queue_depth
+
+    def _get_threads(self) -> ThreadPoolExecutor:
+        with self._lock:
+            if self._threads is None:
+                self._threads = ThreadPoolExecutor(max_workers=self.concurrency, thread_name_prefix="compute")
+            return self._threads
+
+    def _get_pool(self) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._pool is None:
+                # spawn statt fork, da der Webprozess bereits Threads gestartet hat
+                self._pool = ProcessPoolExecutor(
+                    max_workers=self.processes,
+                    mp_context=multiprocessing.get_context("spawn")
+                )
+            return self._pool
+
+    def _admit(self) -> None:
+        with self._lock:
+            if self._admitted >= self.capacity:
+                self._rejected += 1
+                raise HTTPException(
+                    status_code=429,
+                    detail="Zu viele rechenintensive Anfragen, bitte später erneut versuchen",
+                    headers={"Retry-After": str(COMPUTE_RETRY_AFTER)}
+                )
+            self._admitted += 1
+
+    def _release(self) -> None:
+        with self._lock:
+            self._admitted -= 1
+
+    def _tracked(self, func: Callable[..., Any]) -> Any:
+        with self._lock:
+            self._running += 1
+        try:
+            return func()
+        finally:
+            with self._lock:
+                self._running -= 1
+
+    async def run(self, func: Callable[..., Any], *args, **kwargs) -> Any:
+        """
+        Führt eine blockierende Funktion im Compute-Threadpool aus, sofern
+        die Zulassung es erlaubt (sonst HTTPException 429). Der Kontext der
+        Anfrage (z.B. die Speicherprofilierung) wird mitgegeben.
+        """
+        self._admit()
+        try:
+            context = contextvars.copy_context()
+            call = functools.partial(context.run, func, *args, **kwargs)
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self._get_threads(), self._tracked, call)
+        finally:
+            self._release()
+
+    def map(
+        self,
+        func: Callable[[Any], Any],
+        items: Iterable[Any],
+        cancel_token=None
+    ) -> Iterator[Any]:
+        """
+        Berechnet func für alle items im Prozess-Pool und liefert die
+        Ergebnisse in der Reihenfolge der items. func und items müssen
+        picklebar sein. Bei Abbruch über cancel_token endet der Iterator
+        vorzeitig, noch nicht gestartete Aufrufe werden verworfen.
+        """
+        pool = self._get_pool()
+        futures = [pool.submit(func, item) for item in items]
+        try:
+            for future in futures:
+                while True:
+                    if cancel_token is not None and cancel_token.is_cancelled:
+                        return
+                    try:
+                        result = future.result(timeout=_POLL_INTERVAL)
+                        break
+                    except FutureTimeoutError:
+                        continue
+                yield result
+        finally:
+            for future in futures:
+                future.cancel()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "concurrency": self.concurrency,
+                "queue_depth": self.queue_depth,
+                "processes": self.processes,
+                "running": self._running,
+                "queued": self._admitted - self._running,
+                "rejected": self._rejected
+            }
+
+    def close(self) -> None:
+        with self._lock:
+            threads, pool = self._threads, self._pool
+            self._threads = self._pool = None
+        if pool is not None:
+            pool.shutdown(wait=False, cancel_futures=True)
+        if threads is not None:
+            threads.shutdown(wait=False, cancel_futures=True)
+
+
+compute_pool = ComputePool()
@@ -0,0 +1,30 @@
+from datetime import datetime, timedelta
+
+import numpy as np
+import pandas as pd
+
+# Referenzdatum der Tagesnummern (kompakter Speichermodus, Universen, Adjustierung)
+_EPOCH = datetime(1970, 1, 1)
+
+
+def date_to_day_number(date: datetime) -> int:
+    """
+    Wandelt ein Datum in eine Tagesnummer (Tage seit 1970-01-01) um
+    """
+    return (date - _EPOCH).days
+
+
+def day_number_to_date(day_number: int) -> datetime:
+    """
+    Wandelt eine Tagesnummer zurück in ein Datum um
+    """
+    return _EPOCH + timedelta(days=int(day_number))
+
+
+def day_numbers(dates) -> np.ndarray:
+    """
+    Vektorisierte Variante von date_to_day_number für Datumswerte
+    (datetime, Strings oder datetime64)
+    """
+    values = pd.to_datetime(pd.Series(dates)).to_numpy().astype("datetime64[D]")
+    return (values - np.datetime64(_EPOCH, "D")).astype(np.int64)
@@ -0,0 +1,461 @@
+import argparse
+import json
+import multiprocessing
+import os
+import queue
+import socket
+import socketserver
+import struct
+import threading
+from abc import ABC, abstractmethod
+from datetime import datetime
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+from .adjustments import adjustments
+from .compute import compute_pool
+from .jobs import CancellationToken
+from .profiling import profile_stage
+from .trading_service import BacktestAccumulator, backtest_ticker_trades, load_stock_data, sync_data_version
+from .universe import universes
+
+# Standard-Backend für Backtests: inprocess, process oder tcp. process rechnet
+# im Prozess-Pool des Compute-Pools (Größe: COMPUTE_PROCESSES), damit
+# Backtests den GIL des Webprozesses nicht belegen.
+BACKTEST_EXECUTOR = os.getenv("BACKTEST_EXECUTOR", "process")
+
+# Adressen der TCP-Worker, z.B. "10.0.0.5:9100,10.0.0.6:9100"
+BACKTEST_WORKER_ADDRESSES = os.getenv("BACKTEST_WORKER_ADDRESSES", "")
+
+# Anzahl der Ticker je Arbeitspaket
+BACKTEST_UNIT_SIZE = int(os.getenv("BACKTEST_UNIT_SIZE", "8"))
+
+# Zeitlimit für eine Antwort eines TCP-Workers in Sekunden
+BACKTEST_WORKER_TIMEOUT = float(os.getenv("BACKTEST_WORKER_TIMEOUT", "600"))
+
+DEFAULT_WORKER_PORT = 9100
+
+# Abstand, in dem während des Wartens auf Ergebnisse der Abbruch geprüft wird
+_POLL_INTERVAL = 0.1
+
+_FRAME_HEADER = struct.Struct(">I")
+
+
+def make_work_units(
+    strategy_params: Dict[str, Any],
+    tickers: List[str],
+    start_date: datetime,
+    end_date: datetime,
+    universe_name: Optional[str] = None,
+    adjustment: str = "none",
+    unit_size: Optional[int] = None
+) -> List[Dict[str, Any]]:
+    """
+    Teilt einen Backtest in JSON-serialisierbare Arbeitspakete zu je
+    unit_size Tickern auf. Jedes Paket enthält den Datenstand der
+    Adjustierungen (data_version), damit Worker veraltete Caches verwerfen.
+    """
+    unit_size = max(1, unit_size or BACKTEST_UNIT_SIZE)
+    return [
+        {
+            'index': index,
+            'strategy_params': strategy_params,
+            'tickers': tickers[position:position + unit_size],
+            'start_date': start_date.isoformat(),
+            'end_date': end_date.isoformat(),
+            'universe': universe_name,
+            'adjustment': adjustment,
+            'data_version': adjustments.version
+        }
+        for index, position in enumerate(range(0, len(tickers), unit_size))
+    ]
+
+
+def run_work_unit(unit: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Berechnet die Trades eines Arbeitspakets. Läuft im Webprozess, in einem
+    Pool-Prozess oder auf einem Worker-Knoten; alle lesen dieselben Kursdaten.
+    """
+    sync_data_version(unit.get('data_version'))
+
+    start_date = datetime.fromisoformat(unit['start_date'])
+    end_date = datetime.fromisoformat(unit['end_date'])
+    universe = universes.get(unit['universe']) if unit.get('universe') else None
+
+    results = []
+    for ticker in unit['tickers']:
+        df = load_stock_data(ticker, start_date, end_date, adjustment=unit['adjustment'])
+        trades = list(backtest_ticker_trades(df, ticker, unit['strategy_params'], universe, unit['adjustment']))
+        results.append({'ticker': ticker, 'trades': trades})
+
+    return {'index': unit['index'], 'results': results}
+
+
+class BacktestExecutor(ABC):
+    """
+    Basisklasse eines Ausführungs-Backends. run verarbeitet die
+    Arbeitspakete und liefert ihre Ergebnisse in der Reihenfolge der Pakete;
+    bei Abbruch über cancel_token endet der Iterator vorzeitig.
+    """
+
+    name = ""
+
+    @abstractmethod
+    def run(
+        self,
+        units: List[Dict[str, Any]],
+        cancel_token: Optional[CancellationToken] = None
+    ) -> Iterator[Dict[str, Any]]:
+        ...
+
+    def close(self) -> None:
+        pass
+
+
+class InProcessExecutor(BacktestExecutor):
+    """
+    Führt die Arbeitspakete nacheinander im aufrufenden Thread aus
+    """
+
+    name = "inprocess"
+
+    def run(self, units, cancel_token=None):
+        for unit in units:
+            if cancel_token is not None and cancel_token.is_cancelled:
+                return
+            yield run_work_unit(unit)
+
+
+class ProcessPoolBackend(BacktestExecutor):
+    """
+    Verteilt die Arbeitspakete auf den gemeinsamen Prozess-Pool des
+    Compute-Pools. Der Pool wird beim ersten Backtest gestartet und danach
+    wiederverwendet.
+    """
+
+    name = "process"
+
+    def run(self, units, cancel_token=None):
+        return compute_pool.map(run_work_unit, units, cancel_token)
+
+
+def _json_default(value: Any) -> Any:
+    if isinstance(value, datetime):
+        return value.isoformat()
+    if isinstance(value, np.generic):
+        return value.item()
+    raise TypeError(f"Nicht serialisierbar: {type(value).__name__}")
+
+
+def send_message(sock: socket.socket, message: Dict[str, Any]) -> None:
+    """
+    Sendet eine Nachricht als JSON mit vorangestellter Länge (4 Byte, Big Endian)
+    """
+    payload = json.dumps(message, default=_json_default).encode("utf-8")
+    sock.sendall(_FRAME_HEADER.pack(len(payload)) + payload)
+
+
+def _receive_exactly(sock: socket.socket, size: int) -> Optional[bytes]:
+    chunks = []
+    while size:
+        chunk = sock.recv(min(size, 1 << 20))
+        if not chunk:
+            return None
+        chunks.append(chunk)
+        size -= len(chunk)
+    return b"".join(chunks)
+
+
+def receive_message(sock: socket.socket) -> Optional[Dict[str, Any]]:
+    """
+    Empfängt eine Nachricht; None, wenn die Gegenseite die Verbindung schließt
+    """
+    header = _receive_exactly(sock, _FRAME_HEADER.size)
+    if header is None:
+        return None
+    payload = _receive_exactly(sock, _FRAME_HEADER.unpack(header)[0])
+    if payload is None:
+        raise ConnectionError("Verbindung während einer Nachricht geschlossen")
+    return json.loads(payload)
+
+
+def _decode_result(result: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Wandelt die per JSON übertragenen Datumswerte der Trades zurück
+    """
+    for ticker_result in result['results']:
+        for trade in ticker_result['trades']:
+            trade['entry_date'] = datetime.fromisoformat(trade['entry_date'])
+            trade['exit_date'] = datetime.fromisoformat(trade['exit_date'])
+    return result
+
+
+def parse_worker_addresses(addresses: str) -> List[Tuple[str, int]]:
+    """
+    Liest eine kommagetrennte Liste von host:port-Adressen
+    """
+    parsed = []
+    for address in addresses.split(","):
+        address = address.strip()
+        if not address:
+            continue
+        host, _, port = address.rpartition(":")
+        parsed.append((host or "127.0.0.1", int(port or DEFAULT_WORKER_PORT)))
+    return parsed
+
+
+class TcpBackend(BacktestExecutor):
+    """
+    Verteilt die Arbeitspakete auf Worker-Knoten (siehe serve_worker).
+
+    Je Worker hält ein Thread eine Verbindung und holt sich das nächste
+    Paket aus einer gemeinsamen Warteschlange, sodass schnelle Knoten mehr
+    Pakete übernehmen. Fällt ein Worker aus, geht sein laufendes Paket
+    zurück in die Warteschlange; erst wenn kein Worker mehr erreichbar ist,
+    schlägt der Backtest fehl. Ein Rechenfehler auf einem Worker wird
+    dagegen direkt gemeldet.
+    """
+
+    name = "tcp"
+
+    def __init__(
+        self,
+        addresses: Optional[List[Tuple[str, int]]] = None,
+        timeout: float = BACKTEST_WORKER_TIMEOUT
+    ):
+        self.addresses = addresses if addresses is not None else parse_worker_addresses(BACKTEST_WORKER_ADDRESSES)
+        self.timeout = timeout
+
+    def _worker_loop(
+        self,
+        address: Tuple[str, int],
+        pending: "queue.Queue[Dict[str, Any]]",
+        results: "queue.Queue[Tuple[str, Any, Any]]",
+        stop: threading.Event
+    ) -> None:
+        try:
+            sock = socket.create_connection(address, timeout=self.timeout)
+        except OSError as e:
+            results.put(("dead", address, e))
+            return
+
+        with sock:
+            while not stop.is_set():
+                try:
+                    unit = pending.get(timeout=_POLL_INTERVAL)
+                except queue.Empty:
+                    continue
+                try:
+                    send_message(sock, {'op': 'run', 'unit': unit})
+                    response = receive_message(sock)
+                    if response is None:
+                        raise ConnectionError("Worker hat die Verbindung geschlossen")
+                except (OSError, ValueError) as e:
+                    pending.put(unit)
+                    results.put(("dead", address, e))
+                    return
+                results.put(("done", unit['index'], response))
+
+    def run(self, units, cancel_token=None):
+        if not units:
+            return
+        if not self.addresses:
+            raise RuntimeError("Keine Worker-Adressen konfiguriert (BACKTEST_WORKER_ADDRESSES)")
+
+        pending: "queue.Queue[Dict[str, Any]]" = queue.Queue()
+        for unit in units:
+            pending.put(unit)
+        results: "queue.Queue[Tuple[str, Any, Any]]" = queue.Queue()
+        stop = threading.Event()
+
+        threads = [
+            threading.Thread(target=self._worker_loop, args=(address, pending, results, stop), daemon=True)
+            for address in self.addresses
+        ]
+        for thread in threads:
+            thread.start()
+
+        alive = len(threads)
+        finished: Dict[int, Dict[str, Any]] = {}
+        next_index = 0
+        try:
+            while next_index < len(units):
+                if cancel_token is not None and cancel_token.is_cancelled:
+                    return
+                try:
+                    kind, key, payload = results.get(timeout=_POLL_INTERVAL)
+                except queue.Empty:
+                    continue
+
+                if kind == "dead":
+                    alive -= 1
+                    if alive == 0:
+                        raise RuntimeError(f"Kein Backtest-Worker erreichbar (zuletzt {key[0]}:{key[1]}: {payload})")
+                    continue
+
+                if not payload.get('ok'):
+                    raise RuntimeError(f"Fehler auf Backtest-Worker: {payload.get('error')}")
+                finished[key] = _decode_result(payload['result'])
+
+                # Ergebnisse in der Reihenfolge der Pakete weitergeben
+                while next_index in finished:
+                    yield finished.pop(next_index)
+                    next_index += 1
+        finally:
+            stop.set()
+
+
+class _WorkerHandler(socketserver.BaseRequestHandler):
+    """
+    Bearbeitet die Anfragen einer Verbindung nacheinander
+    """
+
+    def handle(self):
+        while True:
+            try:
+                message = receive_message(self.request)
+            except (OSError, ValueError):
+                return
+            if message is None:
+                return
+
+            if message.get('op') == 'ping':
+                response = {'ok': True, 'pid': os.getpid()}
+            elif message.get('op') == 'run':
+                try:
+                    response = {'ok': True, 'result': run_work_unit(message['unit'])}
+                except Exception as e:
+                    response = {'ok': False, 'error': str(e)}
+            else:
+                response = {'ok': False, 'error': f"Unbekannte Operation: {message.get('op')}"}
+
+            try:
+                send_message(self.request, response)
+            except OSError:
+                return
+
+
+class WorkerServer(socketserver.ThreadingTCPServer):
+    allow_reuse_address = True
+    daemon_threads = True
+
+
+def serve_worker(host: str = "0.0.0.0", port: int = DEFAULT_WORKER_PORT) -> None:
+    """
+    Startet einen Backtest-Worker, der Arbeitspakete über TCP annimmt.
+    Der Worker muss auf dieselben Kursdaten (DATABASE_URL) und Universen
+    (UNIVERSE_DIR) zugreifen wie der Webprozess.
+    """
+    with WorkerServer((host, port), _WorkerHandler) as server:
+        server.serve_forever()
+
+
+_EXECUTOR_CLASSES = {
+    InProcessExecutor.name: InProcessExecutor,
+    ProcessPoolBackend.name: ProcessPoolBackend,
+    TcpBackend.name: TcpBackend,
+}
+
+_executors: Dict[str, BacktestExecutor] = {}
+_executors_lock = threading.Lock()
+
+
+def get_executor(name: Optional[str] = None) -> BacktestExecutor:
+    """
+    Gibt das (gemeinsam genutzte) Backend zurück, Standard ist BACKTEST_EXECUTOR
+    """
+    name = name or BACKTEST_EXECUTOR
+    if name not in _EXECUTOR_CLASSES:
+        raise ValueError(f"Unbekanntes Backend: {name}")
+    with _executors_lock:
+        if name not in _executors:
+            _executors[name] = _EXECUTOR_CLASSES[name]()
+        return _executors[name]
+
+
+def run_backtest_distributed(
+    strategy_params: Dict[str, Any],
+    tickers: List[str],
+    start_date: datetime,
+    end_date: datetime,
+    executor: Optional[BacktestExecutor] = None,
+    cancel_token: Optional[CancellationToken] = None,
+    universe_name: Optional[str] = None,
+    adjustment: str = "none",
+    unit_size: Optional[int] = None
+) -> Dict[str, Any]:
+    """
+    Führt einen Backtest über ein Ausführungs-Backend aus.
+
+    Die Ticker werden in Arbeitspakete aufgeteilt und vom Backend berechnet;
+    die Ergebnisse werden in Ticker-Reihenfolge über den BacktestAccumulator
+    zusammengeführt, sodass das Ergebnis dem von run_backtest entspricht.
+    Bei Abbruch endet der Backtest nach dem letzten vollständig
+    übernommenen Paket (partial, cancel_reason wie in run_backtest).
+    """
+    executor = executor or get_executor()
+    units = make_work_units(strategy_params, tickers, start_date, end_date, universe_name, adjustment, unit_size)
+
+    results = {
+        'summary': {},
+        'trades': [],
+        'equity_curve': []
+    }
+    accumulator = BacktestAccumulator()
+    tickers_processed = 0
+
+    for unit_result in executor.run(units, cancel_token):
+        with profile_stage("merge"):
+            for ticker_result in unit_result['results']:
+                for trade in ticker_result['trades']:
+                    results['trades'].append(trade)
+                    results['equity_curve'].append(accumulator.add_trade(trade))
+                tickers_processed += 1
+
+    results['summary'] = accumulator.summary(start_date, end_date)
+    results['tickers_processed'] = tickers_processed
+
+    # Abgebrochene Berechnung als Teilergebnis kennzeichnen
+    if cancel_token is not None and tickers_processed < len(tickers):
+        cancel_token.interrupted = True
+        results['partial'] = True
+        results['cancel_reason'] = cancel_token.reason
+
+    return results
+
+
+def main() -> None:
+    """
+    Startet einen oder (mit --workers) mehrere lokale Backtest-Worker auf
+    aufeinanderfolgenden Ports, z.B. zum Testen des TCP-Backends auf einem Host:
+
+        python -m app.services.executors --port 9100 --workers 4
+        BACKTEST_EXECUTOR=tcp BACKTEST_WORKER_ADDRESSES=127.0.0.1:9100,...,127.0.0.1:9103
+    """
+    parser = argparse.ArgumentParser(description="Backtest-Worker")
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--port", type=int, default=DEFAULT_WORKER_PORT)
+    parser.add_argument("--workers", type=int, default=1)
+    args = parser.parse_args()
+
+    if args.workers <= 1:
+        serve_worker(args.host, args.port)
+        return
+
+    processes = [
+        multiprocessing.Process(target=serve_worker, args=(args.host, args.port + offset))
+        for offset in range(args.workers)
+    ]
+    for process in processes:
+        process.start()
+    try:
+        for process in processes:
+            process.join()
+    except KeyboardInterrupt:
+        for process in processes:
+            process.terminate()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,202 @@
+from typing import Any, Callable, Dict, Iterator, Optional
+
+import numpy as np
+import pandas as pd
+
+# Startlänge der Blöcke, in denen nach dem ersten Stop-/Ziel-Treffer gesucht
+# wird. Die Länge verdoppelt sich pro Block, sodass der Aufwand je Trade
+# linear in seiner Haltedauer bleibt.
+FIRST_HIT_CHUNK = 32
+
+# Ergebnis von _first_price_exit, wenn die Suche abgebrochen wurde
+_CANCELLED: Dict[str, Any] = {}
+
+
+def average_true_range(high: np.ndarray, low: np.ndarray, close: np.ndarray, length: int = 14) -> np.ndarray:
+    """
+    Average True Range als einfacher gleitender Durchschnitt der True Range
+    """
+    previous_close = np.concatenate(([np.nan], close[:-1]))
+    true_range = np.fmax(high - low, np.fmax(np.abs(high - previous_close), np.abs(low - previous_close)))
+    return pd.Series(true_range).rolling(window=length).mean().to_numpy()
+
+
+def _first_price_exit(
+    open_: np.ndarray,
+    high: np.ndarray,
+    low: np.ndarray,
+    start: int,
+    end: int,
+    stop_level: float,
+    target_level: float,
+    trail_candidates: Optional[np.ndarray],
+    cancelled: Optional[Callable[[int], bool]] = None,
+    max_chunk: Optional[int] = None
+) -> Optional[Dict[str, Any]]:
+    """
+    Sucht im Bereich start..end (inklusive) den ersten Balken, an dem ein
+    Stop oder das Kursziel erreicht wird.
+
+    Der Trailing-Stop eines Balkens ist das laufende Maximum der Kandidaten
+    aller vorherigen Balken ab dem Einstieg; er nutzt also nur Informationen,
+    die zur Eröffnung des Balkens bekannt sind. Reihenfolge innerhalb eines
+    Balkens: Eröffnung unter dem Stop bzw. über dem Ziel wird zum
+    Eröffnungskurs ausgeführt (Gap). Werden sonst Stop und Ziel im selben
+    Balken berührt, gilt konservativ der Stop als zuerst erreicht.
+    """
+    chunk = FIRST_HIT_CHUNK
+    trail_carry = -np.inf
+    position = start
+
+    while position <= end:
+        if cancelled is not None and cancelled(position):
+            return _CANCELLED
+        stop = min(position + chunk, end + 1)
+        bars = slice(position, stop)
+
+        level = np.full(stop - position, stop_level)
+        trailing = None
+        if trail_candidates is not None:
+            trailing = np.maximum(np.maximum.accumulate(trail_candidates[position - 1:stop - 1]), trail_carry)
+            trail_carry = trailing[-1]
+            level = np.maximum(level, trailing)
+
+        hits = (low[bars] <= level) | (high[bars] >= target_level)
+        if hits.any():
+            offset = int(hits.argmax())
+            k = position + offset
+            bar_level = level[offset]
+            stop_reason = 'trailing_stop' if trailing is not None and trailing[offset] > stop_level else 'stop_loss'
+
+            if open_[k] <= bar_level:
+                return {'exit_index': k, 'exit_price': float(open_[k]), 'exit_reason': stop_reason}
+            if open_[k] >= target_level:
+                return {'exit_index': k, 'exit_price': float(open_[k]), 'exit_reason': 'take_profit'}
+            if low[k] <= bar_level:
+                return {'exit_index': k, 'exit_price': float(bar_level), 'exit_reason': stop_reason}
+            return {'exit_index': k, 'exit_price': float(target_level), 'exit_reason': 'take_profit'}
+
+        position = stop
+        chunk = chunk * 2 if max_chunk is None else min(chunk * 2, max_chunk)
+
+    return None
+
+
+def iter_exits(
+    df: pd.DataFrame,
+    entries: np.ndarray,
+    signal_exits: Optional[np.ndarray] = None,
+    stop_loss_percent: Optional[float] = None,
+    take_profit_percent: Optional[float] = None,
+    trailing_atr_multiple: Optional[float] = None,
+    atr_length: int = 14,
+    max_holding_bars: Optional[int] = None,
+    cancel_token=None,
+    cancel_check_bars: int = 256
+) -> Iterator[Dict[str, Any]]:
+    """
+    Erzeugt die Trades eines Tickers aus einem beliebigen Einstiegssignal.
+
+    Einstieg erfolgt zum Schlusskurs eines Balkens mit entries=True, danach
+    wird die Position bis zum ersten Ausstieg gehalten; während einer offenen
+    Position werden weitere Einstiegssignale ignoriert. Ausstiege:
+
+    - signal_exits: Schlusskurs des ersten Balkens mit Ausstiegssignal
+    - stop_loss_percent / take_profit_percent: fester Stop bzw. Ziel in
+      Prozent vom Einstiegskurs, geprüft gegen low/high
+    - trailing_atr_multiple: Trailing-Stop im Abstand von n ATR unter dem
+      höchsten Hoch seit dem Einstieg (Chandelier-Stop)
+    - max_holding_bars: Zeitstop zum Schlusskurs nach n Balken
+
+    Signal- und Zeitstop werden über Indexsuche in vorab bestimmten
+    Signalpositionen gefunden, Stops und Ziele blockweise vektorisiert; der
+    Aufwand pro Ticker ist linear in der Anzahl der Balken. Positionen ohne
+    Ausstieg bis zum Datenende werden nicht als Trade gemeldet.
+
+    Mit cancel_token wird der Abbruch an Einstiegsbalken und bei der Suche
+    nach Stop/Ziel geprüft, höchstens einmal je cancel_check_bars Balken;
+    der Generator endet dann vorzeitig.
+
+    Liefert je Trade entry_index, exit_index, entry_price, exit_price und
+    exit_reason.
+    """
+    n = len(df)
+    if n == 0:
+        return
+
+    open_ = df['open'].to_numpy(dtype=np.float64)
+    high = df['high'].to_numpy(dtype=np.float64)
+    low = df['low'].to_numpy(dtype=np.float64)
+    close = df['close'].to_numpy(dtype=np.float64)
+
+    entry_positions = np.flatnonzero(entries)
+    exit_positions = np.flatnonzero(signal_exits) if signal_exits is not None else np.empty(0, dtype=np.int64)
+
+    trail_candidates = None
+    if trailing_atr_multiple:
+        atr = average_true_range(high, low, close, atr_length)
+        trail_candidates = high - trailing_atr_multiple * atr
+        trail_candidates[np.isnan(trail_candidates)] = -np.inf
+
+    use_price_exits = bool(stop_loss_percent or take_profit_percent or trail_candidates is not None)
+
+    # Abbruch blockweise nach cancel_check_bars Balken prüfen
+    next_check = 0
+
+    def cancelled(position: int) -> bool:
+        nonlocal next_check
+        if position < next_check:
+            return False
+        if cancel_token.is_cancelled:
+            return True
+        next_check = position + cancel_check_bars
+        return False
+
+    check = cancelled if cancel_token is not None else None
+    max_chunk = cancel_check_bars if cancel_token is not None else None
+
+    next_entry = 0
+    while next_entry < len(entry_positions):
+        i = int(entry_positions[next_entry])
+        if i >= n - 1:
+            return
+
+        if check is not None and check(i):
+            return
+        entry_price = float(close[i])
+
+        # Späteste Ausstiege zum Schlusskurs: nächstes Signal, Zeitstop oder Datenende
+        end = n - 1
+        close_reason = None
+        signal_index = np.searchsorted(exit_positions, i, side='right')
+        if signal_index < len(exit_positions):
+            end = int(exit_positions[signal_index])
+            close_reason = 'signal'
+        if max_holding_bars and i + max_holding_bars < end:
+            end = i + max_holding_bars
+            close_reason = 'time_stop'
+        elif max_holding_bars and i + max_holding_bars == end and close_reason is None:
+            close_reason = 'time_stop'
+
+        exit_ = None
+        if use_price_exits:
+            exit_ = _first_price_exit(
+                open_, high, low, i + 1, end,
+                entry_price * (1 - stop_loss_percent / 100) if stop_loss_percent else -np.inf,
+                entry_price * (1 + take_profit_percent / 100) if take_profit_percent else np.inf,
+                trail_candidates,
+                check,
+                max_chunk
+            )
+            if exit_ is _CANCELLED:
+                return
+        if exit_ is None:
+            if close_reason is None:
+                # Position bis zum Datenende offen
+                return
+            exit_ = {'exit_index': end, 'exit_price': float(close[end]), 'exit_reason': close_reason}
+
+        yield {'entry_index': i, 'entry_price': entry_price, **exit_}
+
+        # Nächster Einstieg frühestens nach dem Ausstiegsbalken
+        next_entry = int(np.searchsorted(entry_positions, exit_['exit_index'], side='right'))
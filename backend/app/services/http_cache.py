@@ -0,0 +1,147 @@
+import hashlib
+import os
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from typing import Callable, Dict, Hashable, Optional, Tuple
+
+from fastapi import Request, Response
+
+# Gültigkeit eines zwischengespeicherten Versionsstands in Sekunden. Schreibzugriffe
+# im selben Prozess invalidieren sofort; die Frist begrenzt, wie lange Änderungen
+# aus anderen Worker-Prozessen unbemerkt bleiben können.
+HTTP_VERSION_TTL = float(os.getenv("HTTP_VERSION_TTL", "30"))
+
+# Maximale Anzahl zwischengespeicherter Versionsstände
+HTTP_VERSION_CACHE_SIZE = int(os.getenv("HTTP_VERSION_CACHE_SIZE", "4096"))
+
+# Version einer Ressource: (ETag, Last-Modified)
+Version = Tuple[str, Optional[datetime]]
+
+# Ressourcen werden vom Client zwischengespeichert, aber vor jeder Verwendung validiert
+CACHE_CONTROL = "private, no-cache"
+
+
+def strong_etag(*parts) -> str:
+    """
+    Starker ETag: die Darstellung ist für diese Teile byte-identisch
+    """
+    return '"' + hashlib.sha1(repr(parts).encode("utf-8")).hexdigest()[:24] + '"'
+
+
+def weak_etag(*parts) -> str:
+    """
+    Schwacher ETag, z.B. für Listen, deren Inhalt nur semantisch gleich ist
+    """
+    return "W/" + strong_etag(*parts)
+
+
+def _opaque_tag(etag: str) -> str:
+    return etag[2:] if etag.startswith("W/") else etag
+
+
+class VersionCache:
+    """
+    Prozesslokaler LRU-Cache der aktuellen Versionsstände (ETag,
+    Last-Modified) je Ressource. Schlüssel sind Tupel, deren erstes Element
+    die Art der Ressource ist (z.B. ("backtest", 42) oder ("backtests", 0, 100)),
+    sodass Schreibzugriffe alle Einträge einer Art verwerfen können.
+    """
+
+    def __init__(self, ttl: float = HTTP_VERSION_TTL, max_entries: int = HTTP_VERSION_CACHE_SIZE):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[Tuple[Hashable, ...], Tuple[Version, float]]" = OrderedDict()
+
+    def get(self, key: Tuple[Hashable, ...]) -> Optional[Version]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            version, expires = entry
+            if time.monotonic() >= expires:
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return version
+
+    def set(self, key: Tuple[Hashable, ...], version: Version) -> None:
+        with self._lock:
+            self._entries[key] = (version, time.monotonic() + self.ttl)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, *kinds: str) -> None:
+        """
+        Verwirft alle Versionsstände der angegebenen Ressourcenarten
+        """
+        with self._lock:
+            for key in [key for key in self._entries if key[0] in kinds]:
+                del self._entries[key]
+
+
+versions = VersionCache()
+
+
+def http_date(value: datetime) -> str:
+    """
+    Formatiert einen (naiven, lokalen) Zeitstempel als HTTP-Datum
+    """
+    return format_datetime(value.astimezone(timezone.utc), usegmt=True)
+
+
+def _is_not_modified(request: Request, etag: str, last_modified: Optional[datetime]) -> bool:
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        # If-None-Match hat Vorrang und verwendet den schwachen Vergleich
+        tags = [tag.strip() for tag in if_none_match.split(",")]
+        return "*" in tags or _opaque_tag(etag) in {_opaque_tag(tag) for tag in tags}
+
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_modified_since and last_modified is not None:
+        try:
+            since = parsedate_to_datetime(if_modified_since)
+        except (TypeError, ValueError):
+            return False
+        if since.tzinfo is None:
+            since = since.replace(tzinfo=timezone.utc)
+        # HTTP-Daten haben Sekundenauflösung
+        return last_modified.astimezone(timezone.utc).replace(microsecond=0) <= since
+    return False
+
+
+def conditional_get(
+    request: Request,
+    response: Response,
+    key: Tuple[Hashable, ...],
+    compute_version: Callable[[], Optional[Version]]
+) -> Optional[Response]:
+    """
+    Bedingte GET-Anfrage. Der Versionsstand kommt aus dem VersionCache oder
+    aus compute_version (eine schlanke Abfrage der Zeitstempel, ohne ORM-
+    Objekte). Passt If-None-Match bzw. If-Modified-Since, wird eine 304-
+    Antwort zurückgegeben, sonst werden ETag und Last-Modified an response
+    gesetzt und None zurückgegeben. Liefert compute_version None (Ressource
+    nicht vorhanden), bleibt die Anfrage unverändert.
+    """
+    version = versions.get(key)
+    if version is None:
+        version = compute_version()
+        if version is None:
+            return None
+        versions.set(key, version)
+
+    etag, last_modified = version
+    headers: Dict[str, str] = {"ETag": etag, "Cache-Control": CACHE_CONTROL}
+    if last_modified is not None:
+        headers["Last-Modified"] = http_date(last_modified)
+
+    if _is_not_modified(request, etag, last_modified):
+        return Response(status_code=304, headers=headers)
+
+    response.headers.update(headers)
+    return None
@@ -0,0 +1,163 @@
+import asyncio
+import threading
+import time
+import uuid
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from fastapi import HTTPException, Request
+from .compute import compute_pool
+from .profiling import memory_limit_bytes, process_memory_bytes
+
+# Intervall, in dem laufende Anfragen auf einen Verbindungsabbruch geprüft werden
+DISCONNECT_POLL_INTERVAL = 0.5
+
+# Mindestabstand zwischen zwei Prüfungen des Speicherverbrauchs in Sekunden
+MEMORY_CHECK_INTERVAL = 0.05
+
+MEMORY_LIMIT_REASON = "memory_limit_exceeded"
+
+
+class CancellationToken:
+    """
+    Kooperatives Abbruchsignal für rechenintensive Services. Die Services
+    prüfen is_cancelled zwischen Tickern und zwischen Blöcken von Balken.
+    Mit max_seconds gilt das Token nach Ablauf des Zeitbudgets als abgebrochen,
+    mit memory_limit_bytes, sobald der Speicher des Prozesses seit dem
+    Erzeugen des Tokens um mehr als diese Grenze gewachsen ist. Gemessen wird
+    der Zuwachs statt des absoluten Stands, da der RSS nach großen Anfragen
+    nicht wieder sinkt und sonst alle folgenden Berechnungen abbrächen.
+    """
+    
+    def __init__(self, max_seconds: Optional[float] = None, memory_limit_bytes: Optional[int] = None):
+        self._event = threading.Event()
+        self.deadline = time.monotonic() + max_seconds if max_seconds is not None else None
+        self.memory_limit_bytes = memory_limit_bytes
+        self._memory_baseline = process_memory_bytes() if memory_limit_bytes is not None else None
+        self._next_memory_check = 0.0
+        self.reason: Optional[str] = None
+        # Wird vom Service gesetzt, wenn die Berechnung tatsächlich vorzeitig endete
+        self.interrupted = False
+    
+    def cancel(self, reason: str = "cancelled") -> None:
+        """
+        Bricht die Berechnung ab; der erste Abbruchgrund bleibt erhalten
+        """
+        if self.reason is None:
+            self.reason = reason
+        self._event.set()
+    
+    @property
+    def is_cancelled(self) -> bool:
+        if self._event.is_set():
+            return True
+        if self.deadline is None and self.memory_limit_bytes is None:
+            return False
+        now = time.monotonic()
+        if self.deadline is not None and now >= self.deadline:
+            self.cancel("time_budget_exceeded")
+            return True
+        if self.memory_limit_bytes is not None and now >= self._next_memory_check:
+            self._next_memory_check = now + MEMORY_CHECK_INTERVAL
+            used = process_memory_bytes()
+            if used is not None and self._memory_baseline is not None and used - self._memory_baseline > self.memory_limit_bytes:
+                self.cancel(MEMORY_LIMIT_REASON)
+                return True
+        return False
+
+
+class JobRegistry:
+    """
+    Verzeichnis der laufenden Berechnungen, damit sie über ihre Job-ID
+    abgebrochen werden können. Wird eine Job-ID erneut registriert (z.B. bei
+    einer korrigierten Anfrage), wird der alte Job abgebrochen.
+    """
+    
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._jobs: Dict[str, Dict[str, Any]] = {}
+    
+    def register(
+        self,
+        kind: str,
+        job_id: Optional[str] = None,
+        max_seconds: Optional[float] = None
+    ) -> Tuple[str, CancellationToken]:
+        job_id = job_id or uuid.uuid4().hex
+        token = CancellationToken(max_seconds, memory_limit_bytes())
+        with self._lock:
+            previous = self._jobs.get(job_id)
+            if previous is not None:
+                previous["token"].cancel("superseded")
+            self._jobs[job_id] = {
+                "kind": kind,
+                "token": token,
+                "started_at": datetime.now(),
+                "max_seconds": max_seconds
+            }
+        return job_id, token
+    
+    def finish(self, job_id: str, token: CancellationToken) -> None:
+        with self._lock:
+            job = self._jobs.get(job_id)
+            # Nur entfernen, wenn der Eintrag nicht bereits durch einen neueren Job ersetzt wurde
+            if job is not None and job["token"] is token:
+                del self._jobs[job_id]
+    
+    def cancel(self, job_id: str, kind: Optional[str] = None) -> bool:
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None or (kind is not None and job["kind"] != kind):
+                return False
+            job["token"].cancel("cancelled")
+            return True
+    
+    def list(self, kind: Optional[str] = None) -> List[Dict[str, Any]]:
+        with self._lock:
+            return [
+                {
+                    "job_id": job_id,
+                    "kind": job["kind"],
+                    "started_at": job["started_at"].strftime("%Y-%m-%d %H:%M:%S"),
+                    "max_seconds": job["max_seconds"],
+                    "cancelled": job["token"].is_cancelled
+                }
+                for job_id, job in self._jobs.items()
+                if kind is None or job["kind"] == kind
+            ]
+
+
+jobs = JobRegistry()
+
+
+async def run_with_disconnect_watch(
+    request: Request,
+    token: CancellationToken,
+    func: Callable[..., Any],
+    *args,
+    **kwargs
+) -> Any:
+    """
+    Führt eine blockierende Funktion im Compute-Pool aus (eigener Threadpool
+    mit Zulassungskontrolle, bei voller Warteschlange 429) und bricht das
+    Token ab, sobald der Client die Verbindung trennt.
+    
+    Endete die Berechnung wegen der weichen Speichergrenze, wird das
+    Teilergebnis verworfen und mit 503 geantwortet, statt es noch zu kodieren.
+    """
+    async def watch():
+        while True:
+            if await request.is_disconnected():
+                token.cancel("client_disconnected")
+                return
+            await asyncio.sleep(DISCONNECT_POLL_INTERVAL)
+    
+    watcher = asyncio.create_task(watch())
+    try:
+        result = await compute_pool.run(func, *args, **kwargs)
+    finally:
+        watcher.cancel()
+    
+    if token.reason == MEMORY_LIMIT_REASON and token.interrupted:
+        raise HTTPException(status_code=503, detail="Berechnung wegen Speicherlimit abgebrochen")
+    return result
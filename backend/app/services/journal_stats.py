@@ -0,0 +1,242 @@
+import os
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+from sqlalchemy.orm import Session
+
+from ..models.models import Trade, JournalSummary, JournalDailyPnl, JournalSetupStats
+
+# Startkapital, auf das sich Equity-Kurve und Drawdown des Journals beziehen
+JOURNAL_START_EQUITY = float(os.getenv("JOURNAL_START_EQUITY", "100000"))
+
+
+def trade_contribution(
+    is_open: Optional[bool],
+    profit_loss: Optional[float],
+    exit_date: Optional[datetime],
+    entry_date: Optional[datetime],
+    setup_type: Optional[str]
+) -> Optional[Dict[str, Any]]:
+    """
+    Beitrag eines Trades zur Journal-Performance. Nur geschlossene Trades mit
+    berechnetem Gewinn/Verlust zählen; sie werden dem Exit-Tag zugeordnet.
+    """
+    if is_open or profit_loss is None:
+        return None
+    day = exit_date or entry_date
+    return {
+        "date": datetime(day.year, day.month, day.day),
+        "pnl": profit_loss,
+        "setup_type": setup_type
+    }
+
+
+def contribution_of(trade: Trade) -> Optional[Dict[str, Any]]:
+    return trade_contribution(trade.is_open, trade.profit_loss, trade.exit_date, trade.entry_date, trade.setup_type)
+
+
+def _recompute_curve_from(db: Session, from_date: datetime) -> None:
+    """
+    Schreibt Equity, Peak und Drawdown ab from_date fort. Die Werte davor
+    bleiben unverändert, sodass ein neuer Trade am Ende der Kurve nur einen
+    Tag neu berechnet.
+    """
+    db.flush()
+    previous = (
+        db.query(JournalDailyPnl)
+        .filter(JournalDailyPnl.date < from_date)
+        .order_by(JournalDailyPnl.date.desc())
+        .first()
+    )
+    equity = previous.equity if previous else JOURNAL_START_EQUITY
+    peak = previous.peak if previous else JOURNAL_START_EQUITY
+    max_drawdown = previous.max_drawdown if previous else 0.0
+
+    days = db.query(JournalDailyPnl).filter(JournalDailyPnl.date >= from_date).order_by(JournalDailyPnl.date).all()
+    for day in days:
+        equity += day.pnl
+        peak = max(peak, equity)
+        drawdown = (peak - equity) / peak * 100 if peak > 0 else 0.0
+        max_drawdown = max(max_drawdown, drawdown)
+        day.equity = equity
+        day.peak = peak
+        day.drawdown = drawdown
+        day.max_drawdown = max_drawdown
+
+
+def rebuild_journal_stats(db: Session) -> JournalSummary:
+    """
+    Baut alle Statistiktabellen aus den gespeicherten Trades neu auf
+    (Erstbefüllung und Reparatur). Liest nur Spalten, keine ORM-Objekte,
+    und sieht damit den Stand der Datenbank ohne ausstehende Änderungen.
+    """
+    db.query(JournalDailyPnl).delete()
+    db.query(JournalSetupStats).delete()
+    db.query(JournalSummary).delete()
+
+    summary = JournalSummary(id=1, closed_trades=0, winning_trades=0, losing_trades=0, gross_profit=0.0, gross_loss=0.0)
+    db.add(summary)
+
+    rows = db.query(Trade.is_open, Trade.profit_loss, Trade.exit_date, Trade.entry_date, Trade.setup_type).all()
+    contributions = [contribution for contribution in (trade_contribution(*row) for row in rows) if contribution is not None]
+    apply_trade_deltas(db, [(None, contribution) for contribution in contributions], summary)
+    return summary
+
+
+def _get_summary(db: Session) -> JournalSummary:
+    summary = db.query(JournalSummary).filter(JournalSummary.id == 1).with_for_update().first()
+    if summary is None:
+        summary = rebuild_journal_stats(db)
+    return summary
+
+
+def lock_journal_summary(db: Session) -> JournalSummary:
+    """
+    Sperrt die Journal-Statistik für die laufende Transaktion (und befüllt
+    sie bei Bedarf erstmalig). Für Massenänderungen, die die Trades per
+    UPDATE-Statement schreiben: muss vor diesem Statement aufgerufen werden.
+    """
+    return _get_summary(db)
+
+
+def apply_trade_delta(
+    db: Session,
+    old: Optional[Dict[str, Any]],
+    new: Optional[Dict[str, Any]]
+) -> None:
+    """
+    Aktualisiert die Journal-Statistik um die Änderung eines einzelnen Trades.
+    old ist der Beitrag vor, new der Beitrag nach der Änderung (None, wenn
+    der Trade offen, neu oder gelöscht ist). Muss vor dem Flush der
+    Trade-Änderung aufgerufen werden, damit eine eventuell nötige
+    Erstbefüllung den alten Stand sieht.
+    """
+    apply_trade_deltas(db, [(old, new)])
+
+
+def apply_trade_deltas(
+    db: Session,
+    changes: List[Tuple[Optional[Dict[str, Any]], Optional[Dict[str, Any]]]],
+    summary: Optional[JournalSummary] = None
+) -> None:
+    """
+    Aktualisiert die Journal-Statistik um die Änderungen mehrerer Trades
+    (Paare aus altem und neuem Beitrag). Die Equity-Kurve wird nur einmal ab
+    dem frühesten betroffenen Tag fortgeschrieben. summary ist die vorab mit
+    lock_journal_summary gesperrte Statistik, falls die Trades bereits
+    geändert wurden.
+    """
+    changes = [(old, new) for old, new in changes if old != new]
+    if not changes:
+        return
+
+    if summary is None:
+        summary = _get_summary(db)
+
+    # Beiträge je Setup und Tag zusammenfassen, damit jede Zeile der
+    # Statistiktabellen nur einmal gelesen und geschrieben wird
+    setups: Dict[Optional[str], Dict[str, float]] = {}
+    days: Dict[datetime, Dict[str, float]] = {}
+    for old, new in changes:
+        for sign, contribution in ((-1, old), (1, new)):
+            if contribution is None:
+                continue
+            pnl = contribution["pnl"]
+            is_win = pnl > 0
+
+            summary.closed_trades += sign
+            setup = setups.setdefault(
+                contribution["setup_type"],
+                {"trades": 0, "winning_trades": 0, "gross_profit": 0.0, "gross_loss": 0.0}
+            )
+            setup["trades"] += sign
+            if is_win:
+                summary.winning_trades += sign
+                summary.gross_profit += sign * pnl
+                setup["winning_trades"] += sign
+                setup["gross_profit"] += sign * pnl
+            else:
+                summary.losing_trades += sign
+                summary.gross_loss += sign * pnl
+                setup["gross_loss"] += sign * pnl
+
+            day = days.setdefault(contribution["date"], {"pnl": 0.0, "trades": 0})
+            day["pnl"] += sign * pnl
+            day["trades"] += sign
+
+    for setup_type, delta in setups.items():
+        setup = db.query(JournalSetupStats).filter(JournalSetupStats.setup_type == setup_type).first()
+        if setup is None:
+            if delta["trades"] == 0:
+                continue
+            setup = JournalSetupStats(setup_type=setup_type, trades=0, winning_trades=0, gross_profit=0.0, gross_loss=0.0)
+            db.add(setup)
+        for field, value in delta.items():
+            setattr(setup, field, getattr(setup, field) + value)
+        if setup.trades == 0:
+            db.delete(setup)
+
+    for date, delta in days.items():
+        day = db.query(JournalDailyPnl).filter(JournalDailyPnl.date == date).first()
+        if day is None:
+            if delta["trades"] == 0:
+                continue
+            day = JournalDailyPnl(date=date, pnl=0.0, trades=0)
+            db.add(day)
+        day.pnl += delta["pnl"]
+        day.trades += delta["trades"]
+        if day.trades == 0:
+            db.delete(day)
+
+    # Equity-Kurve ab dem frühesten betroffenen Tag fortschreiben
+    dates = [c["date"] for change in changes for c in change if c is not None]
+    _recompute_curve_from(db, min(dates))
+
+
+def get_journal_summary(db: Session, include_curve: bool = True) -> Dict[str, Any]:
+    """
+    Liest die gepflegte Journal-Statistik
+    """
+    summary = db.query(JournalSummary).filter(JournalSummary.id == 1).first()
+    if summary is None:
+        summary = rebuild_journal_stats(db)
+        db.commit()
+
+    last_day = db.query(JournalDailyPnl).order_by(JournalDailyPnl.date.desc()).first()
+    setups = db.query(JournalSetupStats).order_by(JournalSetupStats.setup_type).all()
+
+    closed = summary.closed_trades
+    result = {
+        "closed_trades": closed,
+        "winning_trades": summary.winning_trades,
+        "losing_trades": summary.losing_trades,
+        "win_rate": summary.winning_trades / closed * 100 if closed else 0,
+        "gross_profit": summary.gross_profit,
+        "gross_loss": summary.gross_loss,
+        "net_profit": summary.gross_profit + summary.gross_loss,
+        "profit_factor": abs(summary.gross_profit) / abs(summary.gross_loss) if summary.gross_loss else None,
+        "start_equity": JOURNAL_START_EQUITY,
+        "equity": last_day.equity if last_day else JOURNAL_START_EQUITY,
+        "drawdown": last_day.drawdown if last_day else 0.0,
+        "max_drawdown": last_day.max_drawdown if last_day else 0.0,
+        "setups": [
+            {
+                "setup_type": setup.setup_type,
+                "trades": setup.trades,
+                "winning_trades": setup.winning_trades,
+                "win_rate": setup.winning_trades / setup.trades * 100 if setup.trades else 0,
+                "net_profit": setup.gross_profit + setup.gross_loss,
+                "profit_factor": abs(setup.gross_profit) / abs(setup.gross_loss) if setup.gross_loss else None
+            }
+            for setup in setups
+        ],
+        "updated_at": summary.updated_at.strftime("%Y-%m-%d %H:%M:%S") if summary.updated_at else None
+    }
+
+    if include_curve:
+        result["equity_curve"] = [
+            {"date": day.date.strftime("%Y-%m-%d"), "pnl": day.pnl, "equity": day.equity, "drawdown": day.drawdown}
+            for day in db.query(JournalDailyPnl).order_by(JournalDailyPnl.date).all()
+        ]
+
+    return result
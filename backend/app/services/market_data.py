@@ -0,0 +1,73 @@
+import os
+import threading
+import time
+from datetime import datetime, timedelta
+from typing import Dict, List
+
+import numpy as np
+
+from .trading_service import load_stock_data
+
+# Wie lange ein Schlusskurs im Cache als aktuell gilt (Sekunden)
+LAST_PRICE_TTL_SECONDS = float(os.getenv("LAST_PRICE_TTL_SECONDS", "5"))
+
+
+def _fetch_last_prices(tickers: List[str]) -> Dict[str, float]:
+    """
+    Liest die letzten Kurse für mehrere Ticker aus dem Datenbestand.
+    Mit Norgate-Daten wäre das ein einzelner Massenabruf; mit den simulierten
+    Daten wird pro Ticker nur ein kurzes Fenster geladen.
+    """
+    end_date = datetime.now()
+    start_date = end_date - timedelta(days=10)
+    prices = {}
+    for ticker in tickers:
+        df = load_stock_data(ticker, start_date, end_date)
+        if len(df):
+            prices[ticker] = float(df['close'].iloc[-1])
+    return prices
+
+
+class LastPriceCache:
+    """
+    Prozessinterner Cache der letzten Kurse. get_many liefert die Kurse für
+    viele Ticker in einem Aufruf als Array und lädt nur fehlende oder
+    veraltete Einträge gemeinsam nach.
+    """
+    
+    def __init__(self, ttl_seconds: float = LAST_PRICE_TTL_SECONDS):
+        self.ttl_seconds = ttl_seconds
+        self._lock = threading.Lock()
+        self._prices: Dict[str, float] = {}
+        self._fetched_at: Dict[str, float] = {}
+    
+    def update(self, prices: Dict[str, float]) -> None:
+        """
+        Übernimmt neue Kurse, z.B. aus einem Kurs-Feed oder dem Daten-Import
+        """
+        now = time.monotonic()
+        with self._lock:
+            for ticker, price in prices.items():
+                self._prices[ticker] = float(price)
+                self._fetched_at[ticker] = now
+    
+    def get_many(self, tickers: List[str]) -> np.ndarray:
+        """
+        Gibt die letzten Kurse in der Reihenfolge von tickers zurück
+        (NaN für Ticker ohne Kursdaten)
+        """
+        now = time.monotonic()
+        with self._lock:
+            stale = [
+                ticker for ticker in tickers
+                if now - self._fetched_at.get(ticker, -np.inf) > self.ttl_seconds
+            ]
+        
+        if stale:
+            self.update(_fetch_last_prices(stale))
+        
+        with self._lock:
+            return np.array([self._prices.get(ticker, np.nan) for ticker in tickers], dtype=np.float64)
+
+
+last_prices = LastPriceCache()
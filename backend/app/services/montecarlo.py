@@ -0,0 +1,98 @@
+import os
+from typing import Any, Dict, Optional, Sequence
+
+import numpy as np
+
+# Obergrenze der gleichzeitig simulierten Werte (Simulationen x Trades),
+# größere Läufe werden in Blöcken von Simulationen berechnet
+MONTECARLO_MAX_CELLS = int(os.getenv("MONTECARLO_MAX_CELLS", "1000000"))
+
+MONTECARLO_METHODS = ("bootstrap", "reshuffle")
+
+DEFAULT_PERCENTILES = (5, 25, 50, 75, 95)
+
+
+def _simulate_block(
+    profit_loss: np.ndarray,
+    simulations: int,
+    method: str,
+    rng: np.random.Generator,
+    initial_equity: float
+):
+    """
+    Simuliert einen Block von Trade-Folgen als 2D-Array (Simulation x Trade)
+    und gibt Endkapital und maximalen Drawdown (in Prozent) je Simulation zurück
+    """
+    if method == "bootstrap":
+        # Ziehen mit Zurücklegen
+        samples = profit_loss[rng.integers(0, len(profit_loss), size=(simulations, len(profit_loss)))]
+    else:
+        # Gleiche Trades in zufälliger Reihenfolge
+        samples = rng.permuted(np.broadcast_to(profit_loss, (simulations, len(profit_loss))), axis=1)
+
+    equity = np.cumsum(samples, axis=1, out=samples)
+    equity += initial_equity
+    final_equity = equity[:, -1].copy()
+
+    # Drawdown wie im BacktestAccumulator: Hochpunkt inklusive Startkapital
+    peak = np.maximum.accumulate(equity, axis=1)
+    np.maximum(peak, initial_equity, out=peak)
+    np.divide(equity, peak, out=equity)
+    max_drawdown = (1 - equity.min(axis=1)) * 100
+
+    return final_equity, max_drawdown
+
+
+def run_montecarlo(
+    profit_loss: Sequence[float],
+    simulations: int = 10000,
+    method: str = "bootstrap",
+    seed: Optional[int] = None,
+    initial_equity: float = 100000.0,
+    percentiles: Sequence[float] = DEFAULT_PERCENTILES
+) -> Dict[str, Any]:
+    """
+    Monte-Carlo-Analyse einer Trade-Folge.
+
+    bootstrap zieht die Trade-Ergebnisse mit Zurücklegen, reshuffle
+    vertauscht nur ihre Reihenfolge (gleiches Endkapital, unterschiedlicher
+    Drawdown). Alle Simulationen eines Blocks werden gemeinsam als
+    2D-Array berechnet. Mit seed sind die Ergebnisse reproduzierbar.
+
+    Liefert Perzentilbänder für Endkapital und maximalen Drawdown sowie die
+    Wahrscheinlichkeit eines Verlusts.
+    """
+    if method not in MONTECARLO_METHODS:
+        raise ValueError(f"Unbekannte Methode: {method}")
+
+    profit_loss = np.asarray(profit_loss, dtype=np.float64)
+    if len(profit_loss) == 0 or simulations <= 0:
+        return {}
+
+    rng = np.random.default_rng(seed)
+    block_size = max(1, MONTECARLO_MAX_CELLS // len(profit_loss))
+
+    final_equity = np.empty(simulations)
+    max_drawdown = np.empty(simulations)
+    for start in range(0, simulations, block_size):
+        stop = min(start + block_size, simulations)
+        final_equity[start:stop], max_drawdown[start:stop] = _simulate_block(
+            profit_loss, stop - start, method, rng, initial_equity
+        )
+
+    percentiles = list(percentiles)
+    final_bands = np.percentile(final_equity, percentiles)
+    drawdown_bands = np.percentile(max_drawdown, percentiles)
+
+    return {
+        'method': method,
+        'simulations': simulations,
+        'trades': len(profit_loss),
+        'seed': seed,
+        'initial_equity': initial_equity,
+        'final_equity': {f"p{p:g}": float(v) for p, v in zip(percentiles, final_bands)},
+        'max_drawdown': {f"p{p:g}": float(v) for p, v in zip(percentiles, drawdown_bands)},
+        'final_equity_mean': float(final_equity.mean()),
+        'max_drawdown_mean': float(max_drawdown.mean()),
+        'probability_of_loss': float((final_equity < initial_equity).mean() * 100)
+    }
@@ -0,0 +1,225 @@
+import contextvars
+import os
+import threading
+import time
+import tracemalloc
+from collections import deque
+from contextlib import contextmanager, nullcontext
+from datetime import datetime
+from typing import Any, Deque, Dict, Iterator, List, Optional
+
+# Speicherprofilierung per tracemalloc (opt-in, verlangsamt Allokationen spürbar)
+MEMORY_PROFILING = os.getenv("MEMORY_PROFILING", "false").lower() in ("1", "true", "yes")
+
+# Anzahl der gespeicherten Stack-Frames je Allokation
+MEMORY_PROFILING_FRAMES = int(os.getenv("MEMORY_PROFILING_FRAMES", "1"))
+
+# Anzahl der zuletzt profilierten Anfragen, die aufbewahrt werden
+MEMORY_PROFILE_HISTORY = int(os.getenv("MEMORY_PROFILE_HISTORY", "100"))
+
+# Weiche Speichergrenze je Berechnung in MB (0 = aus): Wächst der Speicher des
+# Prozesses seit ihrem Start um mehr, bricht sie beim nächsten Prüfpunkt ab.
+MEMORY_SOFT_LIMIT_MB = int(os.getenv("MEMORY_SOFT_LIMIT_MB", "0"))
+
+_PAGE_SIZE = os.sysconf("SC_PAGE_SIZE") if hasattr(os, "sysconf") else 4096
+
+
+def process_memory_bytes() -> Optional[int]:
+    """
+    Aktueller Speicherverbrauch des Prozesses: mit tracemalloc die von Python
+    belegten Bytes, sonst der Resident Set Size (nur Linux, sonst None)
+    """
+    if tracemalloc.is_tracing():
+        return tracemalloc.get_traced_memory()[0]
+    try:
+        with open("/proc/self/statm") as statm:
+            return int(statm.read().split()[1]) * _PAGE_SIZE
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+def memory_limit_bytes() -> Optional[int]:
+    return MEMORY_SOFT_LIMIT_MB * 1024 * 1024 if MEMORY_SOFT_LIMIT_MB > 0 else None
+
+
+class MemoryProfile:
+    """
+    Speicherbilanz einer Anfrage. Jede Stage (z.B. Laden der Kursdaten,
+    Simulation, JSON-Kodierung) wird je Name zusammengefasst:
+    - net_bytes: nach der Stage verbliebener Speicher (Summe über alle Aufrufe)
+    - peak_bytes: höchster Mehrverbrauch der Anfrage während der Stage
+    - calls, seconds: Anzahl der Aufrufe und Gesamtdauer
+
+    tracemalloc misst prozessweit; laufen Anfragen gleichzeitig, enthalten
+    die Werte auch deren Allokationen.
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self.started_at = datetime.now()
+        self._started = time.monotonic()
+        self.baseline, _ = tracemalloc.get_traced_memory()
+        tracemalloc.reset_peak()
+        self.peak = self.baseline
+        self.net_bytes = 0
+        self.seconds = 0.0
+        self.stages: Dict[str, Dict[str, Any]] = {}
+
+    def _observe_peak(self) -> int:
+        """
+        Übernimmt den bisherigen Höchststand von tracemalloc, bevor er für die
+        nächste Stage zurückgesetzt wird
+        """
+        current, peak = tracemalloc.get_traced_memory()
+        self.peak = max(self.peak, peak)
+        return current
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[None]:
+        start = self._observe_peak()
+        tracemalloc.reset_peak()
+        started = time.monotonic()
+        try:
+            yield
+        finally:
+            seconds = time.monotonic() - started
+            current, peak = tracemalloc.get_traced_memory()
+            self.peak = max(self.peak, peak)
+            tracemalloc.reset_peak()
+
+            stage = self.stages.setdefault(name, {'calls': 0, 'net_bytes': 0, 'peak_bytes': 0, 'seconds': 0.0})
+            stage['calls'] += 1
+            stage['net_bytes'] += current - start
+            stage['peak_bytes'] = max(stage['peak_bytes'], peak - self.baseline)
+            stage['seconds'] += seconds
+
+    def finish(self) -> None:
+        current = self._observe_peak()
+        self.net_bytes = current - self.baseline
+        self.seconds = time.monotonic() - self._started
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'name': self.name,
+            'started_at': self.started_at.strftime("%Y-%m-%d %H:%M:%S"),
+            'seconds': self.seconds,
+            'peak_bytes': self.peak - self.baseline,
+            'net_bytes': self.net_bytes,
+            'stages': [
+                {'stage': name, **values}
+                for name, values in sorted(self.stages.items(), key=lambda item: -item[1]['peak_bytes'])
+            ]
+        }
+
+
+_current_profile: contextvars.ContextVar[Optional[MemoryProfile]] = contextvars.ContextVar("memory_profile", default=None)
+
+
+def profile_stage(name: str):
+    """
+    Kontextmanager für eine Stage der aktuellen Anfrage; ohne aktive
+    Profilierung ein No-op
+    """
+    profile = _current_profile.get()
+    if profile is None:
+        return nullcontext()
+    return profile.stage(name)
+
+
+def is_profiling_request() -> bool:
+    return _current_profile.get() is not None
+
+
+class MemoryProfiler:
+    """
+    Steuert tracemalloc und sammelt die Profile der letzten Anfragen.
+    Die Profilierung lässt sich über MEMORY_PROFILING beim Start oder zur
+    Laufzeit (Admin-Endpunkt) einschalten.
+    """
+
+    def __init__(self, history: int = MEMORY_PROFILE_HISTORY):
+        self._lock = threading.Lock()
+        self._profiles: Deque[Dict[str, Any]] = deque(maxlen=history)
+        self._baseline: Optional[tracemalloc.Snapshot] = None
+
+    @property
+    def enabled(self) -> bool:
+        return tracemalloc.is_tracing()
+
+    def enable(self, frames: int = MEMORY_PROFILING_FRAMES) -> None:
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(frames)
+        self.reset_baseline()
+
+    def disable(self) -> None:
+        tracemalloc.stop()
+        with self._lock:
+            self._baseline = None
+
+    def reset_baseline(self) -> None:
+        """
+        Merkt sich den aktuellen Stand als Vergleichsbasis für top_allocations
+        """
+        snapshot = tracemalloc.take_snapshot()
+        with self._lock:
+            self._baseline = snapshot
+
+    @contextmanager
+    def request(self, name: str) -> Iterator[Optional[MemoryProfile]]:
+        """
+        Profiliert eine Anfrage, falls tracemalloc aktiv ist
+        """
+        if not self.enabled:
+            yield None
+            return
+
+        profile = MemoryProfile(name)
+        reset = _current_profile.set(profile)
+        try:
+            yield profile
+        finally:
+            _current_profile.reset(reset)
+            profile.finish()
+            with self._lock:
+                self._profiles.append(profile.to_dict())
+
+    def profiles(self, limit: int = 20) -> List[Dict[str, Any]]:
+        with self._lock:
+            return list(self._profiles)[-limit:][::-1]
+
+    def top_allocations(self, limit: int = 25, group_by: str = "lineno", compare: bool = True) -> List[Dict[str, Any]]:
+        """
+        Größte Allokationsstellen des aktuellen Speicherstands, mit compare
+        als Zuwachs gegenüber der Vergleichsbasis
+        """
+        snapshot = tracemalloc.take_snapshot().filter_traces((
+            tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+        ))
+        with self._lock:
+            baseline = self._baseline
+
+        if compare and baseline is not None:
+            stats = snapshot.compare_to(baseline, group_by)
+            return [
+                {
+                    'location': _format_traceback(stat.traceback),
+                    'size_bytes': stat.size,
+                    'size_diff_bytes': stat.size_diff,
+                    'count': stat.count,
+                    'count_diff': stat.count_diff
+                }
+                for stat in stats[:limit]
+            ]
+
+        return [
+            {'location': _format_traceback(stat.traceback), 'size_bytes': stat.size, 'count': stat.count}
+            for stat in snapshot.statistics(group_by)[:limit]
+        ]
+
+
+def _format_traceback(traceback: tracemalloc.Traceback) -> str:
+    return " <- ".join(f"{frame.filename}:{frame.lineno}" for frame in traceback)
+
+
+memory_profiler = MemoryProfiler()
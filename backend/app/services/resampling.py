@@ -0,0 +1,136 @@
+import os
+import threading
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+# Maximale Anzahl zwischengespeicherter (Ticker, Zeiteinheit, Beginn, Adjustierung)-Einträge
+RESAMPLE_CACHE_SIZE = int(os.getenv("RESAMPLE_CACHE_SIZE", "2048"))
+
+
+def period_keys(days: np.ndarray, timeframe: str) -> np.ndarray:
+    """
+    Ordnet Tagesnummern (Tage seit 1970-01-01) ihrer Periode zu:
+    fortlaufende Wochennummer (Wochen beginnen montags) bzw. Monatsnummer
+    """
+    days = np.asarray(days, dtype=np.int64)
+    if timeframe == "weekly":
+        # 1970-01-01 war ein Donnerstag, +3 verschiebt den Wechsel auf Montag
+        return (days + 3) // 7
+    if timeframe == "monthly":
+        return days.astype("datetime64[D]").astype("datetime64[M]").astype(np.int64)
+    raise ValueError(f"Unbekannte Zeiteinheit: {timeframe}")
+
+
+def resample_bars(df: pd.DataFrame, keys: np.ndarray) -> pd.DataFrame:
+    """
+    Fasst Tagesbalken zu OHLCV-Balken je Periode zusammen. date ist das
+    Datum des letzten Tagesbalkens der Periode, period die Periodennummer.
+    """
+    if len(keys):
+        starts = np.flatnonzero(np.r_[True, keys[1:] != keys[:-1]])
+    else:
+        starts = np.empty(0, dtype=np.int64)
+    ends = np.r_[starts[1:], len(keys)][:len(starts)] - 1
+
+    return pd.DataFrame({
+        "period": keys[starts],
+        "date": df["date"].to_numpy()[ends],
+        "open": df["open"].to_numpy()[starts],
+        "high": np.maximum.reduceat(df["high"].to_numpy(), starts),
+        "low": np.minimum.reduceat(df["low"].to_numpy(), starts),
+        "close": df["close"].to_numpy()[ends],
+        "volume": np.add.reduceat(df["volume"].to_numpy(), starts, dtype=np.int64),
+    })
+
+
+class TimeframeCache:
+    """
+    Cache der Wochen- und Monatsbalken je Ticker.
+
+    Ein Eintrag merkt sich, bis zu welchem Tag die Tagesdaten verarbeitet
+    wurden. Kommen neue Tagesbalken hinzu, wird nur die letzte (ggf.
+    unvollständige) Periode neu berechnet und angehängt; bei unveränderten
+    Daten wird der Eintrag direkt zurückgegeben. Einträge werden nach dem
+    LRU-Prinzip verdrängt.
+    """
+
+    def __init__(self, max_entries: int = RESAMPLE_CACHE_SIZE):
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[tuple, dict]" = OrderedDict()
+
+    def get(
+        self,
+        ticker: str,
+        timeframe: str,
+        df: pd.DataFrame,
+        days: np.ndarray,
+        adjustment: str = "none"
+    ) -> pd.DataFrame:
+        """
+        Liefert die Balken der Zeiteinheit für die Tagesdaten df mit den
+        Tagesnummern days (adjustment: Kursadjustierung von df)
+        """
+        keys = period_keys(days, timeframe)
+        if len(keys) == 0:
+            return resample_bars(df, keys)
+
+        cache_key = (ticker, timeframe, int(days[0]), adjustment)
+        last_day = int(days[-1])
+
+        with self._lock:
+            entry = self._entries.get(cache_key)
+            if entry is not None:
+                self._entries.move_to_end(cache_key)
+
+        if entry is not None and entry["last_day"] == last_day and entry["bars"] == len(days):
+            return entry["frame"]
+
+        if entry is not None and entry["last_day"] < last_day and entry["bars"] < len(days):
+            # Nur die letzte Periode neu zusammenfassen und anhängen
+            cached = entry["frame"]
+            start = int(np.searchsorted(keys, cached["period"].iloc[-1], side="left"))
+            tail = resample_bars(df.iloc[start:], keys[start:])
+            frame = pd.concat([cached.iloc[:-1], tail], ignore_index=True)
+        else:
+            frame = resample_bars(df, keys)
+
+        with self._lock:
+            self._entries[cache_key] = {"frame": frame, "last_day": last_day, "bars": len(days)}
+            self._entries.move_to_end(cache_key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+        return frame
+
+    def invalidate(self, ticker: str) -> None:
+        """
+        Verwirft alle Einträge eines Tickers, z.B. nach geänderten Adjustierungen
+        """
+        with self._lock:
+            for key in [key for key in self._entries if key[0] == ticker]:
+                del self._entries[key]
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+
+timeframes = TimeframeCache()
+
+
+def align_to_daily(values: np.ndarray, periods: np.ndarray, days: np.ndarray, timeframe: str) -> np.ndarray:
+    """
+    Richtet Werte einer höheren Zeiteinheit (z.B. Wochen-MA) an den
+    Tagesbalken aus. Jeder Tag erhält den Wert der letzten abgeschlossenen
+    Periode vor seiner eigenen, sodass keine Informationen aus der laufenden
+    Woche bzw. dem laufenden Monat einfließen (kein Lookahead). Tage ohne
+    abgeschlossene Vorperiode erhalten NaN.
+    """
+    positions = np.searchsorted(periods, period_keys(days, timeframe), side="left") - 1
+    aligned = np.full(len(days), np.nan)
+    valid = positions >= 0
+    aligned[valid] = np.asarray(values, dtype=np.float64)[positions[valid]]
+    return aligned
@@ -0,0 +1,157 @@
+import asyncio
+import logging
+import os
+from datetime import datetime, time, timedelta
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy import or_
+
+from ..database import SessionLocal
+from ..models.models import ScheduledScreen, Screen
+from .http_cache import versions
+from .screen_hits import save_screen_hits
+from .trading_service import run_screen_batch
+
+logger = logging.getLogger(__name__)
+
+# Uhrzeit, zu der die geplanten Screenings nach dem täglichen Daten-Import laufen
+SCREEN_SCHEDULE_TIME = os.getenv("SCREEN_SCHEDULE_TIME", "22:30")
+SCREEN_SCHEDULER_ENABLED = os.getenv("SCREEN_SCHEDULER_ENABLED", "true").lower() in ("1", "true", "yes")
+
+
+def materialize_scheduled_screens(
+    as_of_date: Optional[datetime] = None,
+    not_run_since: Optional[datetime] = None
+) -> List[Dict[str, Any]]:
+    """
+    Führt alle aktiven geplanten Screenings aus und schreibt ihre Ergebnisse
+    als benannte Einträge in die Tabelle screens. Screenings mit demselben
+    Universum werden gemeinsam in einem Datendurchlauf ausgewertet.
+    
+    Mit not_run_since werden nur Screenings ausgeführt, die seitdem nicht
+    gelaufen sind. Die Zeilen werden bis zum Commit gesperrt; ein parallel
+    laufender Worker-Prozess überspringt gesperrte Screenings und sieht
+    danach den neuen last_run_at.
+    """
+    screen_date = as_of_date or datetime.now()
+    db = SessionLocal()
+    try:
+        query = db.query(ScheduledScreen).filter(ScheduledScreen.is_active == True)
+        if not_run_since is not None:
+            query = query.filter(or_(ScheduledScreen.last_run_at == None, ScheduledScreen.last_run_at < not_run_since))
+        schedules = query.with_for_update(skip_locked=True).all()
+        
+        # Nach Universum gruppieren, damit jeder Ticker nur einmal geladen wird
+        groups: Dict[tuple, List[ScheduledScreen]] = {}
+        for schedule in schedules:
+            groups.setdefault(tuple(schedule.tickers or []), []).append(schedule)
+        
+        summary = []
+        for tickers, group in groups.items():
+            batch_results = run_screen_batch(
+                criteria_sets=[schedule.filter_criteria or {} for schedule in group],
+                tickers=list(tickers),
+                as_of_date=screen_date
+            )
+            
+            for schedule, screen_results in zip(group, batch_results):
+                screen = Screen(
+                    name=schedule.name,
+                    date=screen_date,
+                    filter_criteria=schedule.filter_criteria,
+                    results={"tickers": [r["ticker"] for r in screen_results]},
+                    notes=f"Geplantes Screening '{schedule.name}' mit {len(screen_results)} Ergebnissen"
+                )
+                db.add(screen)
+                db.flush()
+                save_screen_hits(db, [screen])
+                schedule.last_run_at = datetime.now()
+                summary.append({"name": schedule.name, "result_count": len(screen_results)})
+        
+        db.commit()
+        versions.invalidate("screens")
+        return summary
+    
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
+
+
+class ScreenScheduler:
+    """
+    Prozessinterner Scheduler auf Basis von asyncio. Führt die geplanten
+    Screenings täglich zur konfigurierten Uhrzeit aus oder sofort, wenn der
+    Daten-Import über trigger() sein Ende meldet.
+    """
+    
+    def __init__(self, run_at: time):
+        self.run_at = run_at
+        self.last_run: Optional[Dict[str, Any]] = None
+        self._task: Optional[asyncio.Task] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._trigger: Optional[asyncio.Event] = None
+    
+    def start(self) -> None:
+        """
+        Startet den Scheduler im laufenden Event-Loop
+        """
+        self._loop = asyncio.get_running_loop()
+        self._trigger = asyncio.Event()
+        self._task = asyncio.create_task(self._run())
+    
+    async def stop(self) -> None:
+        """
+        Beendet den Scheduler
+        """
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+    
+    def trigger(self) -> bool:
+        """
+        Löst einen sofortigen Lauf aus (z.B. nach dem Daten-Import).
+        Kann auch aus Threads des Threadpools aufgerufen werden.
+        """
+        if self._loop is None or self._trigger is None:
+            return False
+        self._loop.call_soon_threadsafe(self._trigger.set)
+        return True
+    
+    def _seconds_until_next_run(self) -> float:
+        now = datetime.now()
+        next_run = datetime.combine(now.date(), self.run_at)
+        if next_run <= now:
+            next_run += timedelta(days=1)
+        # Am Wochenende gibt es keine neuen Tagesdaten
+        while next_run.weekday() >= 5:
+            next_run += timedelta(days=1)
+        return (next_run - now).total_seconds()
+    
+    async def _run(self) -> None:
+        while True:
+            not_run_since = None
+            try:
+                await asyncio.wait_for(self._trigger.wait(), timeout=self._seconds_until_next_run())
+            except asyncio.TimeoutError:
+                # Planmäßiger Lauf: jeder uvicorn-Worker hat einen eigenen Scheduler,
+                # daher nur Screenings ausführen, die seit dem Termin nicht gelaufen sind
+                not_run_since = datetime.combine(datetime.now().date(), self.run_at)
+            self._trigger.clear()
+            
+            started = datetime.now()
+            try:
+                # Die Berechnung läuft im Thread, damit der Event-Loop frei bleibt
+                screens = await asyncio.to_thread(materialize_scheduled_screens, None, not_run_since)
+                self.last_run = {"started_at": started.isoformat(), "screens": screens}
+            except Exception as e:
+                logger.exception("Geplante Screenings fehlgeschlagen")
+                self.last_run = {"started_at": started.isoformat(), "error": str(e)}
+
+
+screen_scheduler = ScreenScheduler(run_at=time.fromisoformat(SCREEN_SCHEDULE_TIME))
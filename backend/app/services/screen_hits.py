@@ -0,0 +1,64 @@
+from typing import Iterable, List
+
+from sqlalchemy import delete, insert, select
+from sqlalchemy.orm import Session
+
+from ..models.models import Screen, ScreenHit
+
+# Anzahl der Screenings je Batch beim Nachtragen der Treffer
+SCREEN_HITS_BACKFILL_BATCH_SIZE = 500
+
+
+def _hit_rows(screen: Screen) -> List[dict]:
+    tickers = (screen.results or {}).get("tickers", [])
+    return [
+        {"screen_id": screen.id, "ticker": ticker, "date": screen.date}
+        for ticker in dict.fromkeys(tickers)
+    ]
+
+
+def save_screen_hits(db: Session, screens: Iterable[Screen]) -> int:
+    """
+    Schreibt die Treffer neu gespeicherter Screenings als Massen-Insert.
+    Die Screenings müssen bereits eine ID haben (flush); committet wird
+    vom Aufrufer zusammen mit den Screenings.
+    """
+    rows = [row for screen in screens for row in _hit_rows(screen)]
+    if rows:
+        db.execute(insert(ScreenHit), rows)
+    return len(rows)
+
+
+def replace_screen_hits(db: Session, screen: Screen) -> int:
+    """
+    Ersetzt die Treffer eines geänderten Screenings (z.B. nach /refresh)
+    """
+    db.execute(delete(ScreenHit).where(ScreenHit.screen_id == screen.id))
+    return save_screen_hits(db, [screen])
+
+
+def backfill_screen_hits(db: Session, batch_size: int = SCREEN_HITS_BACKFILL_BATCH_SIZE) -> int:
+    """
+    Trägt die Treffer aller Screenings ohne Einträge in screen_hits nach
+    (bestehende Daten aus der Zeit vor dem umgekehrten Index). Arbeitet in
+    Batches nach ID und committet je Batch, sodass ein Abbruch gefahrlos
+    wiederholt werden kann. Gibt die Anzahl der geschriebenen Treffer zurück.
+    """
+    indexed = select(ScreenHit.screen_id).distinct()
+    written = 0
+    last_id = 0
+    while True:
+        screens = (
+            db.query(Screen)
+            .filter(Screen.id > last_id, Screen.id.notin_(indexed))
+            .order_by(Screen.id)
+            .limit(batch_size)
+            .all()
+        )
+        if not screens:
+            break
+        written += save_screen_hits(db, screens)
+        last_id = screens[-1].id
+        db.commit()
+        db.expunge_all()
+    return written
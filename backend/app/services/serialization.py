@@ -0,0 +1,120 @@
+import json
+import os
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+from fastapi import HTTPException, Request
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse, Response
+
+from .profiling import is_profiling_request, profile_stage
+
+# Optionale Abhängigkeiten: ohne orjson bleibt es beim Standard-JSON,
+# ohne pyarrow wird Arrow mit 406 abgelehnt
+try:
+    import orjson
+except ImportError:  # pragma: no cover
+    orjson = None
+
+try:
+    import pyarrow as pa
+except ImportError:  # pragma: no cover
+    pa = None
+
+ARROW_STREAM_MEDIA_TYPE = "application/vnd.apache.arrow.stream"
+
+# Schneller JSON-Pfad mit orjson (inkl. nativer NumPy-Unterstützung), aktivierbar über FAST_JSON=1
+FAST_JSON = os.getenv("FAST_JSON", "false").lower() in ("1", "true", "yes")
+
+
+def _orjson_default(obj: Any) -> Any:
+    """
+    Fallback für Typen, die orjson nicht selbst serialisiert
+    """
+    if isinstance(obj, pd.Timestamp):
+        return obj.isoformat()
+    if isinstance(obj, np.generic):
+        return obj.item()
+    if isinstance(obj, (set, tuple)):
+        return list(obj)
+    raise TypeError(f"Typ {type(obj).__name__} ist nicht JSON-serialisierbar")
+
+
+class FastJSONResponse(JSONResponse):
+    """
+    JSON-Antwort über orjson: NumPy-Skalare und -Arrays sowie datetime werden
+    direkt serialisiert, ohne den Umweg über jsonable_encoder
+    """
+    
+    def render(self, content: Any) -> bytes:
+        return orjson.dumps(
+            content,
+            default=_orjson_default,
+            option=orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS
+        )
+
+
+def records_to_arrow_stream(
+    records: List[Dict[str, Any]],
+    metadata: Optional[Dict[str, Any]] = None
+) -> bytes:
+    """
+    Schreibt eine Liste von Datensätzen als Arrow-IPC-Stream. Die übrigen
+    Felder der Antwort (z.B. die Zusammenfassung) landen als JSON in den
+    Schema-Metadaten.
+    """
+    table = pa.Table.from_pylist(records)
+    if metadata:
+        table = table.replace_schema_metadata({
+            key: json.dumps(jsonable_encoder(value)) for key, value in metadata.items()
+        })
+    
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_stream(sink, table.schema) as writer:
+        writer.write_table(table)
+    return sink.getvalue().to_pybytes()
+
+
+def negotiate_response(
+    request: Request,
+    payload: Dict[str, Any],
+    tables: Dict[str, List[Dict[str, Any]]],
+    default_table: str
+) -> Any:
+    """
+    Wählt das Antwortformat anhand des Accept-Headers:
+    - application/vnd.apache.arrow.stream: die Tabelle aus ?table=... (Standard:
+      default_table) als Arrow-IPC-Stream, restliche Felder als Schema-Metadaten
+    - sonst JSON, mit FAST_JSON=1 über orjson
+    """
+    accept = request.headers.get("accept", "")
+    
+    if ARROW_STREAM_MEDIA_TYPE in accept:
+        if pa is None:
+            raise HTTPException(status_code=406, detail="Arrow-Ausgabe nicht verfügbar (pyarrow ist nicht installiert)")
+        
+        table_name = request.query_params.get("table", default_table)
+        if table_name not in tables:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Unbekannte Tabelle '{table_name}', verfügbar: {', '.join(tables)}"
+            )
+        
+        metadata = {key: value for key, value in payload.items() if key not in tables}
+        with profile_stage("encode"):
+            return Response(
+                content=records_to_arrow_stream(tables[table_name], metadata),
+                media_type=ARROW_STREAM_MEDIA_TYPE
+            )
+    
+    if FAST_JSON and orjson is not None:
+        with profile_stage("encode"):
+            return FastJSONResponse(content=payload)
+    
+    # Bei Speicherprofilierung hier kodieren, damit die Kodierung als eigene Stage erfasst wird
+    if is_profiling_request():
+        with profile_stage("encode"):
+            return JSONResponse(content=jsonable_encoder(payload))
+    
+    return payload
@@ -0,0 +1,209 @@
+from abc import ABC, abstractmethod
+from typing import Any, Dict, Hashable, Iterable, Optional, Set, Tuple
+
+import numpy as np
+import pandas as pd
+
+# Ein Indikator wird über (Name, Parameter...) beschrieben, z.B. ("sma", 20)
+IndicatorSpec = Tuple[Hashable, ...]
+
+
+def _previous(values: np.ndarray) -> np.ndarray:
+    """
+    Werte um einen Balken verschoben (erster Balken NaN)
+    """
+    return np.concatenate(([np.nan], values[:-1]))
+
+
+def _crosses_above(a: np.ndarray, b) -> np.ndarray:
+    return (_previous(a) <= _previous(np.broadcast_to(b, a.shape))) & (a > b)
+
+
+def _crosses_below(a: np.ndarray, b) -> np.ndarray:
+    return (_previous(a) >= _previous(np.broadcast_to(b, a.shape))) & (a < b)
+
+
+def rolling_mean(series: pd.Series, window: int) -> pd.Series:
+    """
+    Gleitender Durchschnitt, der den Datentyp der Eingabe beibehält.
+    Die Summation erfolgt intern in float64, erst das Ergebnis wird
+    (im kompakten Modus) wieder auf float32 reduziert.
+    """
+    return series.rolling(window=window).mean().astype(series.dtype)
+
+
+def _compute_indicator(df: pd.DataFrame, spec: IndicatorSpec) -> np.ndarray:
+    name, length = spec[0], spec[1]
+    if name == "sma":
+        return rolling_mean(df['close'], length).to_numpy()
+    if name == "ema":
+        return df['close'].ewm(span=length, adjust=False).mean().to_numpy()
+    if name == "rsi":
+        # RSI nach Wilder (exponentielle Glättung mit alpha = 1/length)
+        change = df['close'].astype(np.float64).diff()
+        gain = change.clip(lower=0).ewm(alpha=1 / length, adjust=False, min_periods=length).mean()
+        loss = (-change.clip(upper=0)).ewm(alpha=1 / length, adjust=False, min_periods=length).mean()
+        return (100 - 100 / (1 + gain / loss)).to_numpy()
+    if name == "prior_high":
+        # Höchstes Hoch der vorherigen length Balken (ohne den aktuellen)
+        return _previous(df['high'].rolling(window=length).max().to_numpy(dtype=np.float64))
+    if name == "prior_low":
+        return _previous(df['low'].rolling(window=length).min().to_numpy(dtype=np.float64))
+    if name == "prior_volume":
+        return _previous(df['volume'].astype(np.float64).rolling(window=length).mean().to_numpy())
+    raise ValueError(f"Unbekannter Indikator: {name}")
+
+
+def compute_indicators(
+    df: pd.DataFrame,
+    specs: Iterable[IndicatorSpec],
+    indicators: Optional[Dict[IndicatorSpec, np.ndarray]] = None
+) -> Dict[IndicatorSpec, np.ndarray]:
+    """
+    Berechnet die angeforderten Indikatoren eines Tickers. Bereits in
+    indicators vorhandene Werte werden wiederverwendet, sodass mehrere
+    Strategien auf denselben Kursdaten jeden Indikator nur einmal berechnen.
+    """
+    indicators = {} if indicators is None else indicators
+    for spec in specs:
+        if spec not in indicators:
+            indicators[spec] = _compute_indicator(df, spec)
+    return indicators
+
+
+class StrategyImplementation(ABC):
+    """
+    Basisklasse einer vektorisierten Strategie. indicators deklariert die
+    benötigten Indikatoren, signals liefert Einstiegs- und Ausstiegssignale
+    als boolesche Arrays über alle Balken.
+    """
+
+    name = ""
+
+    @abstractmethod
+    def indicators(self, params: Dict[str, Any]) -> Set[IndicatorSpec]:
+        ...
+
+    @abstractmethod
+    def signals(
+        self,
+        df: pd.DataFrame,
+        indicators: Dict[IndicatorSpec, np.ndarray],
+        params: Dict[str, Any]
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        ...
+
+
+STRATEGY_REGISTRY: Dict[str, StrategyImplementation] = {}
+
+
+def register_strategy(cls):
+    """
+    Klassen-Dekorator, der eine Strategie unter ihrem Namen registriert
+    """
+    STRATEGY_REGISTRY[cls.name] = cls()
+    return cls
+
+
+@register_strategy
+class PriceMaCross(StrategyImplementation):
+    """
+    Schlusskurs kreuzt den gleitenden Durchschnitt (ma_length)
+    """
+
+    name = "ma_cross"
+
+    def indicators(self, params):
+        return {("sma", params.get('ma_length', 20))}
+
+    def signals(self, df, indicators, params):
+        close = df['close'].to_numpy()
+        ma = indicators[("sma", params.get('ma_length', 20))]
+        return _crosses_above(close, ma), _crosses_below(close, ma)
+
+
+@register_strategy
+class MovingAverageCrossover(StrategyImplementation):
+    """
+    Schneller MA kreuzt den langsamen MA (fast_ma, slow_ma, ma_type SMA/EMA)
+    """
+
+    name = "ma_crossover"
+
+    def _specs(self, params):
+        kind = "ema" if str(params.get('ma_type', 'SMA')).upper() == "EMA" else "sma"
+        return (kind, params.get('fast_ma', 20)), (kind, params.get('slow_ma', 50))
+
+    def indicators(self, params):
+        return set(self._specs(params))
+
+    def signals(self, df, indicators, params):
+        fast_spec, slow_spec = self._specs(params)
+        fast, slow = indicators[fast_spec], indicators[slow_spec]
+        return _crosses_above(fast, slow), _crosses_below(fast, slow)
+
+
+@register_strategy
+class RsiOversold(StrategyImplementation):
+    """
+    Einstieg, wenn der RSI aus dem überverkauften Bereich nach oben dreht,
+    Ausstieg, wenn er den überkauften Bereich erreicht
+    """
+
+    name = "rsi"
+
+    def indicators(self, params):
+        return {("rsi", params.get('rsi_period', 14))}
+
+    def signals(self, df, indicators, params):
+        rsi = indicators[("rsi", params.get('rsi_period', 14))]
+        return (
+            _crosses_above(rsi, params.get('oversold', 30)),
+            _crosses_above(rsi, params.get('overbought', 70))
+        )
+
+
+@register_strategy
+class Breakout(StrategyImplementation):
+    """
+    Einstieg bei Schlusskurs über dem Hoch der letzten lookback_period
+    Balken mit mindestens volume_factor-fachem Durchschnittsvolumen,
+    Ausstieg unter dem Tief der letzten lookback_period Balken
+    """
+
+    name = "breakout"
+
+    def indicators(self, params):
+        lookback = params.get('lookback_period', 20)
+        return {("prior_high", lookback), ("prior_low", lookback), ("prior_volume", lookback)}
+
+    def signals(self, df, indicators, params):
+        lookback = params.get('lookback_period', 20)
+        close = df['close'].to_numpy(dtype=np.float64)
+        volume = df['volume'].to_numpy(dtype=np.float64)
+        entries = (
+            (close > indicators[("prior_high", lookback)])
+            & (volume >= params.get('volume_factor', 1.5) * indicators[("prior_volume", lookback)])
+        )
+        return entries, close < indicators[("prior_low", lookback)]
+
+
+def resolve_strategy(params: Dict[str, Any]) -> StrategyImplementation:
+    """
+    Wählt die Strategie anhand von params['type'] oder, falls nicht
+    angegeben, anhand der vorhandenen Parameter (wie in den Demo-Strategien).
+    Standard ist das Kreuzen von Kurs und MA.
+    """
+    name = params.get('type')
+    if name is None:
+        if 'fast_ma' in params or 'slow_ma' in params:
+            name = "ma_crossover"
+        elif 'rsi_period' in params:
+            name = "rsi"
+        elif 'lookback_period' in params:
+            name = "breakout"
+        else:
+            name = "ma_cross"
+    if name not in STRATEGY_REGISTRY:
+        raise ValueError(f"Unbekannte Strategie: {name}")
+    return STRATEGY_REGISTRY[name]
@@ -0,0 +1,186 @@
+import os
+import tempfile
+import time
+from datetime import datetime
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+from .jobs import CancellationToken
+from .profiling import profile_stage
+from .trading_service import BacktestAccumulator, backtest_ticker_trades, load_stock_data
+from .universe import UniverseMembership
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # pragma: no cover
+    pa = None
+    pq = None
+
+# Speicherobergrenze eines Streaming-Backtests in MB (Kursdaten eines
+# Ticker-Blocks plus gepufferte Trades)
+BACKTEST_MEMORY_LIMIT_MB = int(os.getenv("BACKTEST_MEMORY_LIMIT_MB", "256"))
+
+# Verzeichnis für ausgelagerte Trades (Standard: temporäres Verzeichnis des Systems)
+BACKTEST_SPILL_DIR = os.getenv("BACKTEST_SPILL_DIR") or None
+
+# Geschätzter Speicherbedarf eines gepufferten Trades (Dict mit zehn Einträgen)
+_TRADE_ROW_BYTES = 1500
+
+if pa is not None:
+    SPILL_SCHEMA = pa.schema([
+        ("ticker", pa.string()),
+        ("entry_date", pa.timestamp("us")),
+        ("exit_date", pa.timestamp("us")),
+        ("entry_price", pa.float64()),
+        ("exit_price", pa.float64()),
+        ("position_size", pa.float64()),
+        ("profit_loss", pa.float64()),
+        ("profit_loss_percent", pa.float64()),
+        ("exit_reason", pa.string()),
+        ("equity", pa.float64()),
+    ])
+
+
+def run_backtest_streaming(
+    strategy_params: Dict[str, Any],
+    tickers: List[str],
+    start_date: datetime,
+    end_date: datetime,
+    memory_limit_mb: Optional[int] = None,
+    progress_callback: Optional[Callable[[Dict[str, Any]], None]] = None,
+    cancel_token: Optional[CancellationToken] = None,
+    universe: Optional[UniverseMembership] = None,
+    adjustment: str = "none"
+) -> Dict[str, Any]:
+    """
+    Führt einen Backtest über beliebig große Universen mit begrenztem
+    Speicher aus.
+
+    Die Ticker werden in Blöcken geladen, deren Größe sich aus dem
+    Speicherlimit und der Größe des ersten geladenen Kurs-DataFrames ergibt.
+    Trades werden gepuffert und blockweise (spätestens bei Erreichen des
+    halben Limits) als Row Group in eine temporäre Parquet-Datei geschrieben;
+    die Zusammenfassung entsteht aus den laufenden Kennzahlen des
+    BacktestAccumulator. Die Datei enthält je Trade zusätzlich die Equity
+    nach dem Trade und kann mit iter_spilled_trades gelesen werden; der
+    Aufrufer ist für das Löschen (discard_spill) zuständig.
+
+    Mit universe werden Einstiege wie in run_backtest auf die historische
+    Mitgliedschaft maskiert; adjustment wählt die Kursadjustierung.
+
+    Liefert summary, trade_count, tickers_processed und trades_path sowie bei
+    Abbruch partial und cancel_reason wie run_backtest.
+    """
+    if pq is None:
+        raise RuntimeError("Streaming-Backtests benötigen pyarrow")
+
+    limit_bytes = (memory_limit_mb or BACKTEST_MEMORY_LIMIT_MB) * 1024 * 1024
+    max_buffered_trades = max(1, limit_bytes // 2 // _TRADE_ROW_BYTES)
+
+    accumulator = BacktestAccumulator()
+    started = time.monotonic()
+    tickers_processed = 0
+    trade_count = 0
+    buffer: List[Dict[str, Any]] = []
+
+    handle, trades_path = tempfile.mkstemp(prefix="backtest-", suffix=".parquet", dir=BACKTEST_SPILL_DIR)
+    os.close(handle)
+    writer = pq.ParquetWriter(trades_path, SPILL_SCHEMA)
+
+    def flush() -> None:
+        if buffer:
+            with profile_stage("spill"):
+                writer.write_table(pa.Table.from_pylist(buffer, schema=SPILL_SCHEMA))
+                buffer.clear()
+
+    try:
+        chunk_size = 1
+        position = 0
+        interrupted = False
+
+        while position < len(tickers) and not interrupted:
+            # Abbruch zwischen den Blöcken prüfen
+            if cancel_token is not None and cancel_token.is_cancelled:
+                break
+
+            chunk = tickers[position:position + chunk_size]
+            with profile_stage("load_data"):
+                frames = [load_stock_data(ticker, start_date, end_date, adjustment=adjustment) for ticker in chunk]
+
+            # Blockgröße aus dem Speicherbedarf des ersten Blocks ableiten
+            if position == 0 and frames:
+                frame_bytes = max(1, int(frames[0].memory_usage(deep=True).sum()))
+                chunk_size = max(1, limit_bytes // 2 // frame_bytes)
+
+            for ticker, df in zip(chunk, frames):
+                with profile_stage("simulate"):
+                    for trade in backtest_ticker_trades(df, ticker, strategy_params, universe, adjustment, cancel_token=cancel_token):
+                        trade['equity'] = accumulator.add_trade(trade)['equity']
+                        buffer.append(trade)
+                        trade_count += 1
+                        if len(buffer) >= max_buffered_trades:
+                            flush()
+
+                # Abbruch innerhalb des Tickers (zwischen Blöcken von Balken)
+                if cancel_token is not None and cancel_token.is_cancelled:
+                    interrupted = True
+                    break
+                tickers_processed += 1
+
+            position += len(chunk)
+            frames = None
+            flush()
+
+            if progress_callback is not None and not interrupted:
+                elapsed = time.monotonic() - started
+                progress_callback({
+                    'type': 'progress',
+                    'ticker': chunk[-1],
+                    'ticker_index': position,
+                    'ticker_count': len(tickers),
+                    'elapsed_seconds': elapsed,
+                    'eta_seconds': elapsed / position * (len(tickers) - position),
+                    'equity': accumulator.current_equity,
+                    'summary': accumulator.summary(start_date, end_date)
+                })
+
+        flush()
+        writer.close()
+    except BaseException:
+        writer.close()
+        discard_spill(trades_path)
+        raise
+
+    results = {
+        'summary': accumulator.summary(start_date, end_date),
+        'trade_count': trade_count,
+        'tickers_processed': tickers_processed,
+        'trades_path': trades_path
+    }
+
+    # Abgebrochene Berechnung als Teilergebnis kennzeichnen
+    if cancel_token is not None and tickers_processed < len(tickers):
+        cancel_token.interrupted = True
+        results['partial'] = True
+        results['cancel_reason'] = cancel_token.reason
+
+    return results
+
+
+def iter_spilled_trades(trades_path: str, batch_size: int = 10000) -> Iterator[List[Dict[str, Any]]]:
+    """
+    Liest die ausgelagerten Trades eines Streaming-Backtests in Batches
+    """
+    parquet_file = pq.ParquetFile(trades_path)
+    for batch in parquet_file.iter_batches(batch_size=batch_size):
+        yield batch.to_pylist()
+
+
+def discard_spill(trades_path: str) -> None:
+    """
+    Löscht die Auslagerungsdatei eines Streaming-Backtests
+    """
+    try:
+        os.remove(trades_path)
+    except FileNotFoundError:
+        pass
@@ -2,13 +2,119 @@ from datetime import datetime, timedelta
 import pandas as pd
 import numpy as np
 import json
-from typing import Dict, List, Any, Optional
+import os
+import time
+from typing import Callable, Dict, Iterator, List, Any, Optional
+
+from .dates import date_to_day_number, day_number_to_date, day_numbers
+from .exits import iter_exits
+from .adjustments import adjustments
+from .compute import compute_pool
+from .jobs import CancellationToken
+from .profiling import profile_stage
+from .resampling import timeframes, align_to_daily
+from .strategies import IndicatorSpec, compute_indicators, resolve_strategy, rolling_mean
+from .universe import UniverseMembership
+
+# Kompakter Speichermodus: float32-Preise, int32-Tagesnummern und uint32-Volumen
+# statt float64/int64/datetime. Aktivierbar über COMPACT_DTYPES=1
+COMPACT_DTYPES = os.getenv("COMPACT_DTYPES", "false").lower() in ("1", "true", "yes")
+
+PRICE_COLUMNS = ['open', 'high', 'low', 'close']
+
+# Handelstage pro Jahr für die Annualisierung der Sharpe Ratio
+TRADING_DAYS_PER_YEAR = 252
+
+# Anzahl Balken, nach denen innerhalb eines Tickers der Abbruch geprüft wird
+CANCEL_CHECK_BARS = 256
+
+# Ausführung der Arbeitspakete von Screenings und Screening-Analysen:
+# process rechnet im Prozess-Pool des Compute-Pools, damit sie den GIL des
+# Webprozesses nicht belegen; inprocess im aufrufenden Thread
+SCREEN_EXECUTOR = os.getenv("SCREEN_EXECUTOR", "process")
+
+# Anzahl der Ticker je Screening-Arbeitspaket
+SCREEN_UNIT_SIZE = int(os.getenv("SCREEN_UNIT_SIZE", "16"))
+
+
+def to_compact(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Konvertiert einen Kurs-DataFrame in den kompakten Speichermodus.
+    Das Volumen wird als uint32 gespeichert, solange der Wertebereich reicht,
+    sonst als float32.
+    """
+    compact = pd.DataFrame({
+        'date': np.array([date_to_day_number(d) for d in df['date']], dtype=np.int32)
+    })
+    for column in PRICE_COLUMNS:
+        compact[column] = df[column].to_numpy(dtype=np.float32)
+
+    volume = df['volume'].to_numpy()
+    if len(volume) == 0 or (volume.min() >= 0 and volume.max() <= np.iinfo(np.uint32).max):
+        compact['volume'] = volume.astype(np.uint32)
+    else:
+        compact['volume'] = volume.astype(np.float32)
+
+    return compact
+
+
+def is_compact(df: pd.DataFrame) -> bool:
+    """
+    Prüft, ob ein DataFrame im kompakten Modus (int32-Tagesnummern) vorliegt
+    """
+    return df['date'].dtype == np.int32
+
+
+def bar_date(df: pd.DataFrame, i: int) -> datetime:
+    """
+    Gibt das Datum des i-ten Balkens zurück, unabhängig vom Speichermodus
+    """
+    value = df['date'].iloc[i]
+    if is_compact(df):
+        return day_number_to_date(value)
+    return value
+
+
+def bar_day_numbers(df: pd.DataFrame) -> np.ndarray:
+    """
+    Tagesnummern aller Balken, unabhängig vom Speichermodus
+    """
+    if is_compact(df):
+        return df['date'].to_numpy(dtype=np.int64)
+    return day_numbers(df['date'])
+
 
 # Simulierte Funktion zum Laden von Aktien-Daten 
 # (später durch echte Norgate-Daten zu ersetzen)
-def load_stock_data(ticker: str, start_date: datetime, end_date: datetime) -> pd.DataFrame:
+def load_stock_data(
+    ticker: str,
+    start_date: datetime,
+    end_date: datetime,
+    compact: Optional[bool] = None,
+    adjustment: str = "none"
+) -> pd.DataFrame:
+    """
+    Lädt die Kursdaten eines Tickers.
+    Mit compact=True (Standard: COMPACT_DTYPES) werden die Daten im
+    kompakten Speichermodus zurückgegeben. adjustment wählt unadjustierte
+    Kurse ("none"), split-adjustierte ("split") oder zusätzlich um
+    Dividenden bereinigte Kurse ("total_return"); adjustierte Daten kommen
+    aus einem gemeinsamen Cache und dürfen nicht verändert werden.
+    """
+    use_compact = COMPACT_DTYPES if compact is None else compact
+    if adjustment != "none":
+        return adjustments.adjusted(ticker, start_date, end_date, use_compact, adjustment, _load_raw_stock_data)
+    return _load_raw_stock_data(ticker, start_date, end_date, use_compact)
+
+
+def _load_raw_stock_data(
+    ticker: str,
+    start_date: datetime,
+    end_date: datetime,
+    compact: bool
+) -> pd.DataFrame:
     """
-    Simuliert das Laden von Aktiendaten für Testzwecke.
+    Simuliert das Laden unadjustierter Aktiendaten für Testzwecke.
     Im echten System würde hier die Norgate-Datenbindung implementiert.
     """
     # Generiere simulierte Daten
@@ -38,16 +144,284 @@ def load_stock_data(ticker: str, start_date: datetime, end_date: datetime) -> pd
         'volume': [int(np.random.uniform(1000000, 10000000)) for _ in prices]
     })
     
+    if compact:
+        df = to_compact(df)
+    
     return df
 
+
+def get_data_version(ticker: str, as_of_date: datetime) -> str:
+    """
+    Liefert eine Versionskennung der Kursdaten eines Tickers zum Stichtag.
+    Die simulierten Daten ändern sich nur mit dem letzten Handelstag vor dem
+    Stichtag; mit Norgate-Daten würde hier der Zeitstempel der letzten
+    Aktualisierung des Tickers verwendet.
+    """
+    last_bar = as_of_date - timedelta(days=1)
+    while last_bar.weekday() >= 5:
+        last_bar -= timedelta(days=1)
+    return last_bar.strftime('%Y-%m-%d')
+
+
+def check_compact_precision(
+    ticker: str,
+    start_date: datetime,
+    end_date: datetime,
+    ma_length: int = 20
+) -> Dict[str, Any]:
+    """
+    Vergleicht den kompakten Speichermodus mit den float64-Ergebnissen.
+    
+    Gemessen werden die maximalen absoluten und relativen Abweichungen der
+    Schlusskurse und des gleitenden Durchschnitts sowie die Anzahl der Balken,
+    an denen sich das MA-Crossover-Signal unterscheidet. float32 hat rund
+    7 signifikante Stellen, die relative Abweichung der Kurse liegt daher
+    unter 6e-8, die des MA in der Größenordnung 1e-7. Signalabweichungen
+    treten nur auf, wenn Kurs und MA weniger als diese Toleranz
+    auseinanderliegen.
+    """
+    full = load_stock_data(ticker, start_date, end_date, compact=False)
+    compact = load_stock_data(ticker, start_date, end_date, compact=True)
+    
+    close_full = full['close'].to_numpy()
+    close_compact = compact['close'].to_numpy(dtype=np.float64)
+    ma_full = rolling_mean(full['close'], ma_length).to_numpy()
+    ma_compact = rolling_mean(compact['close'], ma_length).to_numpy(dtype=np.float64)
+    
+    valid = ~np.isnan(ma_full)
+    close_abs = np.abs(close_full - close_compact)
+    ma_abs = np.abs(ma_full[valid] - ma_compact[valid])
+    
+    signal_full = close_full[valid] > ma_full[valid]
+    signal_compact = close_compact[valid] > ma_compact[valid]
+    
+    return {
+        'ticker': ticker,
+        'bars': len(full),
+        'close_max_abs_error': float(close_abs.max()) if len(close_abs) else 0.0,
+        'close_max_rel_error': float((close_abs / np.abs(close_full)).max()) if len(close_abs) else 0.0,
+        'ma_max_abs_error': float(ma_abs.max()) if len(ma_abs) else 0.0,
+        'ma_max_rel_error': float((ma_abs / np.abs(ma_full[valid])).max()) if len(ma_abs) else 0.0,
+        'signal_mismatches': int((signal_full != signal_compact).sum()),
+        'memory_bytes_full': int(full.memory_usage(deep=True).sum()),
+        'memory_bytes_compact': int(compact.memory_usage(deep=True).sum())
+    }
+
+class BacktestAccumulator:
+    """
+    Laufende Kennzahlen eines Backtests. Jeder Trade aktualisiert Equity,
+    Gewinn-/Verlustsummen und Drawdown in O(1), sodass Zwischenstände und
+    die Zusammenfassung ohne erneuten Durchlauf über alle Trades entstehen.
+    Für die Sharpe Ratio werden die Gewinne je Ausstiegstag summiert.
+    """
+    
+    def __init__(self, initial_equity: float = 100000.0):
+        self.initial_equity = initial_equity
+        self.current_equity = initial_equity
+        self.total_trades = 0
+        self.winning_trades = 0
+        self.losing_trades = 0
+        self.gross_profit = 0.0
+        self.gross_loss = 0.0
+        self.peak = initial_equity
+        self.max_drawdown = 0.0
+        self.daily_profit: Dict[int, float] = {}
+    
+    def add_trade(self, trade: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Verbucht einen abgeschlossenen Trade und gibt den neuen Equity-Punkt zurück
+        """
+        profit_loss = trade['profit_loss']
+        self.total_trades += 1
+        
+        if profit_loss > 0:
+            self.winning_trades += 1
+            self.gross_profit += profit_loss
+        else:
+            self.losing_trades += 1
+            self.gross_loss += profit_loss
+        
+        self.current_equity += profit_loss
+        exit_day = date_to_day_number(trade['exit_date'])
+        self.daily_profit[exit_day] = self.daily_profit.get(exit_day, 0.0) + profit_loss
+        
+        # Max Drawdown laufend fortschreiben
+        if self.current_equity > self.peak:
+            self.peak = self.current_equity
+        drawdown = (self.peak - self.current_equity) / self.peak * 100 if self.peak > 0 else 0
+        self.max_drawdown = max(self.max_drawdown, drawdown)
+        
+        return {
+            'date': trade['exit_date'].strftime('%Y-%m-%d'),
+            'equity': self.current_equity
+        }
+    
+    def sharpe_ratio(self, start_date: datetime, end_date: datetime) -> Optional[float]:
+        """
+        Annualisierte Sharpe Ratio (ohne risikofreien Zins) der täglichen
+        Renditen der Equity-Kurve. Gewinne zählen am Ausstiegstag, übrige
+        Handelstage des Zeitraums haben die Rendite 0. None bei weniger als
+        zwei Tagen oder ohne Schwankung.
+        """
+        exit_days = np.fromiter(self.daily_profit.keys(), dtype=np.int64, count=len(self.daily_profit))
+        days = np.union1d(day_numbers(pd.bdate_range(start_date, end_date)), exit_days)
+        if len(days) < 2:
+            return None
+        
+        profits = np.zeros(len(days))
+        profits[np.searchsorted(days, exit_days)] = list(self.daily_profit.values())
+        equity = self.initial_equity + np.cumsum(profits)
+        previous = np.concatenate(([self.initial_equity], equity[:-1]))
+        returns = profits / previous
+        
+        volatility = returns.std(ddof=1)
+        if not volatility > 0:
+            return None
+        return float(returns.mean() / volatility * np.sqrt(TRADING_DAYS_PER_YEAR))
+    
+    def summary(self, start_date: datetime, end_date: datetime) -> Dict[str, Any]:
+        """
+        Berechnet die Zusammenfassung aus den laufenden Kennzahlen
+        """
+        if self.total_trades == 0:
+            return {}
+        
+        win_rate = self.winning_trades / self.total_trades * 100
+        profit_factor = abs(self.gross_profit) / abs(self.gross_loss) if self.losing_trades and self.gross_loss != 0 else float('inf')
+        
+        # CAGR (vereinfacht)
+        years = (end_date - start_date).days / 365.25
+        cagr = (self.current_equity / self.initial_equity) ** (1 / years) - 1 if years > 0 else 0
+        
+        return {
+            'start_date': start_date.strftime('%Y-%m-%d'),
+            'end_date': end_date.strftime('%Y-%m-%d'),
+            'total_trades': self.total_trades,
+            'winning_trades': self.winning_trades,
+            'losing_trades': self.losing_trades,
+            'win_rate': win_rate,
+            'profit_factor': profit_factor,
+            'sharpe_ratio': self.sharpe_ratio(start_date, end_date),
+            'max_drawdown': self.max_drawdown,
+            'cagr': cagr * 100,  # In Prozent
+            'final_equity': self.current_equity,
+            'net_profit': self.current_equity - self.initial_equity,
+            'net_profit_percent': (self.current_equity - self.initial_equity) / self.initial_equity * 100
+        }
+
+
+def backtest_ticker_trades(
+    df: pd.DataFrame,
+    ticker: str,
+    strategy_params: Dict[str, Any],
+    universe: Optional[UniverseMembership] = None,
+    adjustment: str = "none",
+    indicators: Optional[Dict[IndicatorSpec, np.ndarray]] = None,
+    cancel_token: Optional[CancellationToken] = None
+) -> Iterator[Dict[str, Any]]:
+    """
+    Erzeugt die Trades der Strategie für die Kursdaten eines Tickers.
+    Die Strategie wird über strategy_params aus der Registry gewählt
+    (siehe strategies.resolve_strategy); mit indicators können bereits
+    berechnete Indikatoren anderer Strategien mitgenutzt werden.
+    Mit trend_timeframe ('weekly'/'monthly') und trend_ma_length wirkt
+    zusätzlich ein Trendfilter auf der höheren Zeiteinheit. Mit universe sind
+    Einstiege nur an Tagen möglich, an denen der Ticker Mitglied des
+    Universums war; Ausstiege bleiben immer möglich. adjustment ist die
+    Kursadjustierung von df.
+
+    Mit cancel_token wird der Abbruch nach der Signalberechnung und danach
+    an Einstiegsbalken und bei der Suche nach Stop/Ziel geprüft, höchstens
+    einmal je CANCEL_CHECK_BARS Balken; der Generator endet dann vorzeitig
+    (der Aufrufer erkennt das an cancel_token.is_cancelled).
+    """
+    strategy = resolve_strategy(strategy_params)
+    indicators = compute_indicators(df, strategy.indicators(strategy_params), indicators)
+    entries, signal_exits = strategy.signals(df, indicators, strategy_params)
+    close = df['close'].to_numpy()
+    
+    # Trendfilter auf höherer Zeiteinheit: Einstieg nur über dem MA der
+    # letzten abgeschlossenen Woche bzw. des letzten Monats
+    trend_timeframe = strategy_params.get('trend_timeframe')
+    if trend_timeframe:
+        days = bar_day_numbers(df)
+        bars = timeframes.get(ticker, trend_timeframe, df, days, adjustment)
+        trend_ma = rolling_mean(bars['close'], strategy_params.get('trend_ma_length', 10))
+        entries &= close > align_to_daily(trend_ma.to_numpy(), bars['period'].to_numpy(), days, trend_timeframe)
+    
+    if universe is not None:
+        entries &= universe.mask(ticker, bar_day_numbers(df))
+    
+    # Abbruch nach der vektorisierten Signalberechnung prüfen, auch für
+    # Ticker ohne einen einzigen Trade
+    if cancel_token is not None and cancel_token.is_cancelled:
+        return
+    
+    position_size = 100  # Beispiel: 100 Aktien
+    dates = df['date']
+    compact = is_compact(df)
+    
+    for exit_ in iter_exits(
+        df,
+        entries,
+        signal_exits,
+        stop_loss_percent=strategy_params.get('stop_loss_percent'),
+        take_profit_percent=strategy_params.get('take_profit_percent'),
+        trailing_atr_multiple=strategy_params.get('trailing_atr_multiple'),
+        atr_length=strategy_params.get('atr_length', 14),
+        max_holding_bars=strategy_params.get('max_holding_bars'),
+        cancel_token=cancel_token,
+        cancel_check_bars=CANCEL_CHECK_BARS
+    ):
+        entry_price = exit_['entry_price']
+        exit_price = exit_['exit_price']
+        
+        # Trade-Ergebnis berechnen
+        profit_loss = (exit_price - entry_price) * position_size
+        profit_loss_percent = (exit_price - entry_price) / entry_price * 100
+        
+        yield {
+            'ticker': ticker,
+            'entry_date': day_number_to_date(dates.iloc[exit_['entry_index']]) if compact else dates.iloc[exit_['entry_index']],
+            'exit_date': day_number_to_date(dates.iloc[exit_['exit_index']]) if compact else dates.iloc[exit_['exit_index']],
+            'entry_price': entry_price,
+            'exit_price': exit_price,
+            'position_size': position_size,
+            'profit_loss': profit_loss,
+            'profit_loss_percent': profit_loss_percent,
+            'exit_reason': exit_['exit_reason'],
+        }
+
+
 def run_backtest(
     strategy_params: Dict[str, Any],
     tickers: List[str],
     start_date: datetime,
-    end_date: datetime
+    end_date: datetime,
+    progress_callback: Optional[Callable[[Dict[str, Any]], None]] = None,
+    progress_interval: float = 0.5,
+    cancel_token: Optional[CancellationToken] = None,
+    universe: Optional[UniverseMembership] = None,
+    adjustment: str = "none"
 ) -> Dict[str, Any]:
     """
     Führt einen Backtest basierend auf der angegebenen Strategie und Parametern durch.
+
+    Neben dem MA-Kreuz als Ausstiegssignal werden optional stop_loss_percent,
+    take_profit_percent, trailing_atr_multiple (mit atr_length) und
+    max_holding_bars aus strategy_params ausgewertet (siehe exits.iter_exits).
+
+    Mit progress_callback werden nach abgeschlossenen Tickern Fortschritts-
+    Ereignisse (Ticker-Index, Laufzeit, ETA, Equity, Zwischenstand) gemeldet,
+    höchstens jedoch alle progress_interval Sekunden sowie nach dem letzten Ticker.
+    
+    Wird cancel_token abgebrochen (oder läuft sein Zeitbudget ab), endet der
+    Backtest beim nächsten Prüfpunkt; die bis dahin berechneten Ergebnisse
+    werden mit partial=True und dem Abbruchgrund zurückgegeben.
+    
+    Mit universe werden Einstiegssignale auf die historische Mitgliedschaft
+    maskiert (survivorship-frei). adjustment wählt die Kursadjustierung
+    (siehe load_stock_data).
     """
     results = {
         'summary': {},
@@ -55,166 +429,359 @@ def run_backtest(
         'equity_curve': []
     }
     
-    total_trades = 0
-    winning_trades = 0
-    initial_equity = 100000.0
-    current_equity = initial_equity
+    accumulator = BacktestAccumulator()
+    started = time.monotonic()
+    last_progress = started
+    
+    tickers_processed = 0
     
     # Sehr vereinfachte Simulation einer Strategie
-    for ticker in tickers:
-        df = load_stock_data(ticker, start_date, end_date)
+    for ticker_index, ticker in enumerate(tickers):
+        # Abbruch zwischen den Tickern prüfen
+        if cancel_token is not None and cancel_token.is_cancelled:
+            break
         
-        # Einfache Moving-Average-Strategie als Beispiel
-        ma_length = strategy_params.get('ma_length', 20)
-        df['ma'] = df['close'].rolling(window=ma_length).mean()
+        with profile_stage("load_data"):
+            df = load_stock_data(ticker, start_date, end_date, adjustment=adjustment)
         
-        position = None
+        with profile_stage("simulate"):
+            for trade in backtest_ticker_trades(df, ticker, strategy_params, universe, adjustment, cancel_token=cancel_token):
+                results['trades'].append(trade)
+                results['equity_curve'].append(accumulator.add_trade(trade))
         
-        for i in range(ma_length, len(df)):
-            # Kaufsignal: Schlusskurs kreuzt MA von unten
-            if position is None and df['close'].iloc[i-1] <= df['ma'].iloc[i-1] and df['close'].iloc[i] > df['ma'].iloc[i]:
-                entry_price = df['close'].iloc[i]
-                entry_date = df['date'].iloc[i]
-                position_size = 100  # Beispiel: 100 Aktien
-                position = {'entry_price': entry_price, 'entry_date': entry_date, 'size': position_size}
-                
-            # Verkaufssignal: Schlusskurs kreuzt MA von oben
-            elif position is not None and df['close'].iloc[i-1] >= df['ma'].iloc[i-1] and df['close'].iloc[i] < df['ma'].iloc[i]:
-                exit_price = df['close'].iloc[i]
-                exit_date = df['date'].iloc[i]
-                
-                # Trade-Ergebnis berechnen
-                profit_loss = (exit_price - position['entry_price']) * position['size']
-                profit_loss_percent = (exit_price - position['entry_price']) / position['entry_price'] * 100
-                
-                trade = {
+        # Abbruch innerhalb des Tickers (zwischen Blöcken von Balken)
+        if cancel_token is not None and cancel_token.is_cancelled:
+            break
+        tickers_processed += 1
+        
+        # Fortschritt melden (gedrosselt, damit die Berechnung nicht gebremst wird)
+        if progress_callback is not None:
+            now = time.monotonic()
+            is_last = ticker_index == len(tickers) - 1
+            if is_last or now - last_progress >= progress_interval:
+                last_progress = now
+                done = ticker_index + 1
+                elapsed = now - started
+                progress_callback({
+                    'type': 'progress',
                     'ticker': ticker,
-                    'entry_date': position['entry_date'],
-                    'exit_date': exit_date,
-                    'entry_price': position['entry_price'],
-                    'exit_price': exit_price,
-                    'position_size': position['size'],
-                    'profit_loss': profit_loss,
-                    'profit_loss_percent': profit_loss_percent,
-                }
-                
-                results['trades'].append(trade)
-                total_trades += 1
-                
-                if profit_loss > 0:
-                    winning_trades += 1
-                
-                current_equity += profit_loss
-                results['equity_curve'].append({
-                    'date': exit_date.strftime('%Y-%m-%d'),
-                    'equity': current_equity
+                    'ticker_index': done,
+                    'ticker_count': len(tickers),
+                    'elapsed_seconds': elapsed,
+                    'eta_seconds': elapsed / done * (len(tickers) - done),
+                    'equity': accumulator.current_equity,
+                    'summary': accumulator.summary(start_date, end_date)
                 })
-                
-                position = None
     
     # Zusammenfassung berechnen
-    if total_trades > 0:
-        win_rate = winning_trades / total_trades * 100
-        profit_trades = [t for t in results['trades'] if t['profit_loss'] > 0]
-        loss_trades = [t for t in results['trades'] if t['profit_loss'] <= 0]
-        
-        avg_profit = np.mean([t['profit_loss'] for t in profit_trades]) if profit_trades else 0
-        avg_loss = np.mean([t['profit_loss'] for t in loss_trades]) if loss_trades else 0
+    results['summary'] = accumulator.summary(start_date, end_date)
+    results['tickers_processed'] = tickers_processed
+    
+    # Abgebrochene Berechnung als Teilergebnis kennzeichnen
+    if cancel_token is not None and tickers_processed < len(tickers):
+        cancel_token.interrupted = True
+        results['partial'] = True
+        results['cancel_reason'] = cancel_token.reason
+    
+    return results
+
+
+def run_backtest_compare(
+    strategy_params_list: List[Dict[str, Any]],
+    tickers: List[str],
+    start_date: datetime,
+    end_date: datetime,
+    cancel_token: Optional[CancellationToken] = None,
+    universe: Optional[UniverseMembership] = None,
+    adjustment: str = "none"
+) -> Dict[str, Any]:
+    """
+    Führt mehrere Strategien in einem Datendurchlauf gegeneinander aus.
+    Jeder Ticker wird einmal geladen, die Vereinigung der von allen
+    Strategien deklarierten Indikatoren einmal berechnet und von allen
+    Strategien gemeinsam genutzt. Liefert pro Strategie summary, trades und
+    equity_curve in der Reihenfolge von strategy_params_list.
+    """
+    runs = [{'summary': {}, 'trades': [], 'equity_curve': []} for _ in strategy_params_list]
+    accumulators = [BacktestAccumulator() for _ in strategy_params_list]
+    
+    specs = set()
+    for params in strategy_params_list:
+        specs |= resolve_strategy(params).indicators(params)
+    
+    tickers_processed = 0
+    
+    for ticker in tickers:
+        # Abbruch zwischen den Tickern prüfen
+        if cancel_token is not None and cancel_token.is_cancelled:
+            break
         
-        profit_factor = abs(sum(t['profit_loss'] for t in profit_trades)) / abs(sum(t['profit_loss'] for t in loss_trades)) if loss_trades and sum(t['profit_loss'] for t in loss_trades) != 0 else float('inf')
+        with profile_stage("load_data"):
+            df = load_stock_data(ticker, start_date, end_date, adjustment=adjustment)
+        with profile_stage("indicators"):
+            indicators = compute_indicators(df, specs)
         
-        # Max Drawdown berechnen
-        peak = initial_equity
-        drawdowns = []
+        interrupted = False
+        with profile_stage("simulate"):
+            for params, run, accumulator in zip(strategy_params_list, runs, accumulators):
+                for trade in backtest_ticker_trades(df, ticker, params, universe, adjustment, indicators, cancel_token):
+                    run['trades'].append(trade)
+                    run['equity_curve'].append(accumulator.add_trade(trade))
+                
+                # Abbruch zwischen den Strategien und Blöcken von Balken prüfen
+                if cancel_token is not None and cancel_token.is_cancelled:
+                    interrupted = True
+                    break
         
-        for point in results['equity_curve']:
-            equity = point['equity']
-            if equity > peak:
-                peak = equity
-            
-            drawdown = (peak - equity) / peak * 100 if peak > 0 else 0
-            drawdowns.append(drawdown)
+        if interrupted:
+            break
+        tickers_processed += 1
+    
+    for run, accumulator in zip(runs, accumulators):
+        run['summary'] = accumulator.summary(start_date, end_date)
+    
+    results = {'runs': runs, 'tickers_processed': tickers_processed}
+    
+    # Abgebrochene Berechnung als Teilergebnis kennzeichnen
+    if cancel_token is not None and tickers_processed < len(tickers):
+        cancel_token.interrupted = True
+        results['partial'] = True
+        results['cancel_reason'] = cancel_token.reason
+    
+    return results
+
+
+def _load_screen_data(ticker: str, screen_date: datetime, adjustment: str = "none") -> pd.DataFrame:
+    """
+    Lädt die Historien-Daten, die für das Screening eines Tickers benötigt werden
+    """
+    end_date = screen_date
+    start_date = end_date - timedelta(days=100)  # 100 Tage Historien-Daten
+    return load_stock_data(ticker, start_date, end_date, adjustment=adjustment)
+
+
+def _last_ma(df: pd.DataFrame, ma_length: int, indicators: Dict[Any, float]) -> float:
+    """
+    Liefert den letzten MA-Wert und merkt ihn sich im Indikator-Cache des Tickers,
+    damit jede MA-Länge pro Ticker nur einmal berechnet wird
+    """
+    key = ('ma', ma_length)
+    if key not in indicators:
+        indicators[key] = float(rolling_mean(df['close'], ma_length).iloc[-1])
+    return indicators[key]
+
+
+def _matches_criteria(
+    criteria: Dict[str, Any],
+    df: pd.DataFrame,
+    indicators: Dict[Any, float]
+) -> bool:
+    """
+    Prüft, ob der letzte Balken eines Tickers die Screening-Kriterien erfüllt
+    """
+    # Preise im float64-Raum vergleichen, auch im kompakten Modus
+    last_close = float(df['close'].iloc[-1])
+    last_volume = int(df['volume'].iloc[-1])
+    
+    # Preis-Filter
+    if 'min_price' in criteria and last_close < criteria['min_price']:
+        return False
         
-        max_drawdown = max(drawdowns) if drawdowns else 0
+    if 'max_price' in criteria and last_close > criteria['max_price']:
+        return False
         
-        # CAGR (vereinfacht)
-        years = (end_date - start_date).days / 365.25
-        cagr = (current_equity / initial_equity) ** (1 / years) - 1 if years > 0 else 0
+    # Volumen-Filter
+    if 'min_volume' in criteria and last_volume < criteria['min_volume']:
+        return False
         
-        results['summary'] = {
-            'start_date': start_date.strftime('%Y-%m-%d'),
-            'end_date': end_date.strftime('%Y-%m-%d'),
-            'total_trades': total_trades,
-            'winning_trades': winning_trades,
-            'losing_trades': total_trades - winning_trades,
-            'win_rate': win_rate,
-            'profit_factor': profit_factor,
-            'max_drawdown': max_drawdown,
-            'cagr': cagr * 100,  # In Prozent
-            'final_equity': current_equity,
-            'net_profit': current_equity - initial_equity,
-            'net_profit_percent': (current_equity - initial_equity) / initial_equity * 100
-        }
+    # MA-Filter
+    if 'ma_length' in criteria:
+        ma_length = criteria['ma_length']
+        if len(df) >= ma_length and 'ma_above_price' in criteria:
+            ma = _last_ma(df, ma_length, indicators)
+            
+            if criteria['ma_above_price'] and ma <= last_close:
+                return False
+            elif not criteria['ma_above_price'] and ma >= last_close:
+                return False
     
-    return results
+    return True
+
+
+def _screen_result(ticker: str, df: pd.DataFrame, screen_date: datetime) -> Dict[str, Any]:
+    """
+    Baut den Ergebnis-Eintrag für einen passenden Ticker
+    """
+    last_close = float(df['close'].iloc[-1])
+    return {
+        "ticker": ticker,
+        "price": last_close,
+        "volume": int(df['volume'].iloc[-1]),
+        "change_percent": (last_close / float(df['close'].iloc[-2]) - 1) * 100 if len(df) > 1 else 0,
+        "date": screen_date.strftime("%Y-%m-%d")
+    }
 
 
 def run_screen(
     criteria: Dict[str, Any], 
     tickers: List[str], 
-    as_of_date: Optional[datetime] = None
+    as_of_date: Optional[datetime] = None,
+    cancel_token: Optional[CancellationToken] = None,
+    adjustment: str = "none"
 ) -> List[Dict[str, Any]]:
     """
     Führt ein Screening mit den angegebenen Kriterien durch
     und gibt die passenden Aktien zurück
     """
+    return run_screen_batch([criteria], tickers, as_of_date, cancel_token, adjustment)[0]
+
+
+def sync_data_version(data_version: Optional[str]) -> None:
+    """
+    Übernimmt in einem Pool-Prozess oder Worker den Datenstand der
+    Adjustierungen aus einem Arbeitspaket; nach neuen Corporate Actions im
+    Webprozess werden die eigenen Caches verworfen.
+    """
+    if adjustments.sync_version(data_version):
+        timeframes.clear()
+
+
+def map_screen_units(
+    func: Callable[[Dict[str, Any]], Any],
+    units: List[Dict[str, Any]],
+    cancel_token: Optional[CancellationToken] = None
+) -> Iterator[Any]:
+    """
+    Berechnet func für alle Arbeitspakete eines Screenings gemäß
+    SCREEN_EXECUTOR und liefert die Ergebnisse in der Reihenfolge der
+    Pakete. Bei Abbruch über cancel_token endet der Iterator vorzeitig.
+    """
+    if SCREEN_EXECUTOR == "process":
+        yield from compute_pool.map(func, units, cancel_token)
+        return
+
+    for unit in units:
+        if cancel_token is not None and cancel_token.is_cancelled:
+            return
+        yield func(unit)
+
+
+def screen_work_unit(unit: Dict[str, Any]) -> List[List[Dict[str, Any]]]:
+    """
+    Wertet die Kriterien-Sets für die Ticker eines Arbeitspakets aus. Läuft
+    im Webprozess oder in einem Pool-Prozess.
+    """
+    sync_data_version(unit['data_version'])
+
+    criteria_sets = unit['criteria_sets']
+    screen_date = unit['screen_date']
+    results = [[] for _ in criteria_sets]
+
+    for ticker in unit['tickers']:
+        df = _load_screen_data(ticker, screen_date, unit['adjustment'])
+        indicators = {}
+        result = None
+        
+        for index, criteria in enumerate(criteria_sets):
+            # Wenn der Ticker den Kriterien entspricht, füge ihn zu den Ergebnissen hinzu
+            if _matches_criteria(criteria, df, indicators):
+                if result is None:
+                    result = _screen_result(ticker, df, screen_date)
+                results[index].append(dict(result))
+    
+    return results
+
+
+def run_screen_batch(
+    criteria_sets: List[Dict[str, Any]],
+    tickers: List[str],
+    as_of_date: Optional[datetime] = None,
+    cancel_token: Optional[CancellationToken] = None,
+    adjustment: str = "none"
+) -> List[List[Dict[str, Any]]]:
+    """
+    Wertet mehrere Kriterien-Sets in einem Datendurchlauf aus.
+    Jeder Ticker wird nur einmal geladen und jeder Indikator pro Ticker nur
+    einmal berechnet. Gibt eine Ergebnisliste pro Kriterien-Set zurück.
+    Die Ticker werden in Arbeitspaketen zu SCREEN_UNIT_SIZE Tickern
+    ausgewertet (siehe map_screen_units). Bei einem Abbruch über
+    cancel_token enthalten die Listen nur die bis dahin vollständig
+    geprüften Pakete. adjustment wählt die Kursadjustierung.
+    """
     # Datum setzen, falls nicht angegeben
     screen_date = as_of_date or datetime.now()
     
-    results = []
+    units = [
+        {
+            'criteria_sets': criteria_sets,
+            'tickers': tickers[position:position + SCREEN_UNIT_SIZE],
+            'screen_date': screen_date,
+            'adjustment': adjustment,
+            'data_version': adjustments.version
+        }
+        for position in range(0, len(tickers), SCREEN_UNIT_SIZE)
+    ]
+    
+    results = [[] for _ in criteria_sets]
+    completed = 0
+    for unit_results in map_screen_units(screen_work_unit, units, cancel_token):
+        for index, matches in enumerate(unit_results):
+            results[index].extend(matches)
+        completed += 1
+    
+    if cancel_token is not None and completed < len(units):
+        cancel_token.interrupted = True
+    
+    return results
+
+
+def refresh_screen(
+    criteria: Dict[str, Any],
+    tickers: List[str],
+    previous_state: Dict[str, Dict[str, Any]],
+    as_of_date: Optional[datetime] = None
+) -> Dict[str, Any]:
+    """
+    Wertet ein gespeichertes Screening inkrementell neu aus.
+    
+    previous_state enthält pro Ticker die Felder data_version, matched und
+    result der letzten Auswertung. Neu berechnet werden nur Ticker, deren
+    Kursdaten sich seitdem geändert haben oder die neu im Universum sind.
+    Zurückgegeben werden der neue Zustand und die Differenz (entered, exited,
+    unchanged) gegenüber der letzten Auswertung.
+    """
+    screen_date = as_of_date or datetime.now()
+    
+    state = {}
+    evaluated = []
     
-    # Simulierte Screening-Funktion (später durch echte Datenanalyse zu ersetzen)
     for ticker in tickers:
-        # Hole Daten für den Ticker
-        end_date = screen_date
-        start_date = end_date - timedelta(days=100)  # 100 Tage Historien-Daten
+        data_version = get_data_version(ticker, screen_date)
+        previous = previous_state.get(ticker)
         
-        df = load_stock_data(ticker, start_date, end_date)
+        # Unveränderte Daten: Zustand der letzten Auswertung übernehmen
+        if previous is not None and previous.get('data_version') == data_version:
+            state[ticker] = previous
+            continue
         
-        # Kriterien anwenden (vereinfacht)
-        matches_criteria = True
-        
-        # Preis-Filter
-        if 'min_price' in criteria and df['close'].iloc[-1] < criteria['min_price']:
-            matches_criteria = False
-            
-        if 'max_price' in criteria and df['close'].iloc[-1] > criteria['max_price']:
-            matches_criteria = False
-            
-        # Volumen-Filter
-        if 'min_volume' in criteria and df['volume'].iloc[-1] < criteria['min_volume']:
-            matches_criteria = False
-            
-        # MA-Filter
-        if 'ma_length' in criteria:
-            ma_length = criteria['ma_length']
-            if len(df) >= ma_length:
-                ma = df['close'].rolling(window=ma_length).mean().iloc[-1]
-                
-                if 'ma_above_price' in criteria:
-                    if criteria['ma_above_price'] and ma <= df['close'].iloc[-1]:
-                        matches_criteria = False
-                    elif not criteria['ma_above_price'] and ma >= df['close'].iloc[-1]:
-                        matches_criteria = False
-        
-        # Wenn der Ticker den Kriterien entspricht, füge ihn zu den Ergebnissen hinzu
-        if matches_criteria:
-            results.append({
-                "ticker": ticker,
-                "price": df['close'].iloc[-1],
-                "volume": df['volume'].iloc[-1],
-                "change_percent": (df['close'].iloc[-1] / df['close'].iloc[-2] - 1) * 100 if len(df) > 1 else 0,
-                "date": screen_date.strftime("%Y-%m-%d")
-            })
+        df = _load_screen_data(ticker, screen_date)
+        matched = _matches_criteria(criteria, df, {})
+        state[ticker] = {
+            'data_version': data_version,
+            'matched': matched,
+            'result': _screen_result(ticker, df, screen_date) if matched else None
+        }
+        evaluated.append(ticker)
     
-    return results
+    previous_matches = {t for t, s in previous_state.items() if s.get('matched')}
+    current_matches = {t for t, s in state.items() if s['matched']}
+    
+    return {
+        'state': state,
+        'results': [state[t]['result'] for t in tickers if state[t]['matched']],
+        'entered': sorted(current_matches - previous_matches),
+        'exited': sorted(previous_matches - current_matches),
+        'unchanged': sorted(current_matches & previous_matches),
+        'evaluated': evaluated,
+        'skipped': len(tickers) - len(evaluated)
+    }
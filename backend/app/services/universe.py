@@ -0,0 +1,215 @@
+import os
+import threading
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+from fastapi import HTTPException
+
+from .dates import day_numbers
+
+# Verzeichnis mit den Mitgliedschafts-CSVs der Universen (<NAME>.csv)
+UNIVERSE_DIR = os.getenv("UNIVERSE_DIR", "data/universes")
+
+
+class UniverseMembership:
+    """
+    Historische Mitgliedschaft eines Universums als komprimierte Bitmap
+    (Ticker × Handelstag). Jede Zeile ist mit np.packbits auf ein Bit pro
+    Handelstag gepackt; ein Universum mit 1000 Tickern über 25 Jahre
+    belegt so rund 800 KB.
+
+    Abfragen für einen Tag oder einen Ticker entpacken nur die betroffene
+    Spalte bzw. Zeile und liefern vektorisierte Masken. Die letzte Spalte
+    gilt bis auf Weiteres, also auch für alle Tage nach dem Ende des Rasters.
+    """
+
+    def __init__(self, name: str, tickers: List[str], days: np.ndarray, members: np.ndarray):
+        self.name = name
+        self.tickers = list(tickers)
+        self.days = np.asarray(days, dtype=np.int64)
+        self.bits = np.packbits(members.astype(bool), axis=1)
+        self._index = {ticker: i for i, ticker in enumerate(self.tickers)}
+
+    @classmethod
+    def from_csv(cls, name: str, path: str) -> "UniverseMembership":
+        """
+        Liest eine Mitgliedschafts-CSV im Norgate-Stil. Unterstützt werden
+        zwei Formate:
+
+        - Zeitreihe: symbol, date, in_index (1/0 je Ticker und Handelstag)
+        - Intervalle: symbol, start_date, end_date (leeres Ende = Mitglied
+          bis auf Weiteres)
+        """
+        df = pd.read_csv(path)
+        df.columns = [column.strip().lower() for column in df.columns]
+        symbol_column = "symbol" if "symbol" in df.columns else "ticker"
+
+        if "start_date" in df.columns:
+            starts = day_numbers(df["start_date"])
+            open_ended = df["end_date"].isna().to_numpy()
+            ends = np.zeros(len(df), dtype=np.int64)
+            ends[~open_ended] = day_numbers(df.loc[~open_ended, "end_date"])
+
+            # Das Raster reicht bis zum ersten Handelstag nach dem letzten festen
+            # Ende, damit seine letzte Spalte nur noch offene Mitgliedschaften enthält
+            last_day = starts.max()
+            if not open_ended.all():
+                last_day = max(last_day, ends[~open_ended].max() + 3)
+            days = cls._trading_days(starts.min(), last_day)
+            tickers = sorted(df[symbol_column].unique())
+            index = {ticker: i for i, ticker in enumerate(tickers)}
+
+            members = np.zeros((len(tickers), len(days)), dtype=bool)
+            first = np.searchsorted(days, starts, side="left")
+            last = np.where(open_ended, len(days), np.searchsorted(days, ends, side="right"))
+            for row, ticker in enumerate(df[symbol_column]):
+                members[index[ticker], first[row]:last[row]] = True
+        else:
+            value_column = next(c for c in ("in_index", "member", "value") if c in df.columns)
+            dates = day_numbers(df["date"])
+            days = np.unique(dates)
+            codes, tickers = pd.factorize(df[symbol_column], sort=True)
+
+            members = np.zeros((len(tickers), len(days)), dtype=bool)
+            members[codes, np.searchsorted(days, dates)] = df[value_column].to_numpy() != 0
+
+        return cls(name, list(tickers), days, members)
+
+    @staticmethod
+    def _trading_days(first_day: int, last_day: int) -> np.ndarray:
+        days = np.arange(first_day, last_day + 1, dtype=np.int64)
+        # 1970-01-01 war ein Donnerstag: Wochentag 0 = Montag
+        weekday = (days + 3) % 7
+        return days[weekday < 5]
+
+    def _position(self, day: int) -> int:
+        """
+        Spalte des letzten Handelstags am oder vor day (-1 vor Beginn des Rasters)
+        """
+        if len(self.days) == 0:
+            return -1
+        return int(np.searchsorted(self.days, day, side="right")) - 1
+
+    def members_on(self, date: datetime) -> List[str]:
+        """
+        Ticker, die am Stichtag Mitglied des Universums waren
+        """
+        position = self._position(int(day_numbers([date])[0]))
+        if position < 0:
+            return []
+        column = (self.bits[:, position // 8] >> (7 - position % 8)) & 1
+        return [self.tickers[i] for i in np.flatnonzero(column)]
+
+    def tickers_between(self, start_date: datetime, end_date: datetime) -> List[str]:
+        """
+        Ticker, die im Zeitraum mindestens einen Tag Mitglied waren.
+        Für start_date == end_date entspricht das members_on.
+        """
+        start, end = day_numbers([start_date, end_date])
+        if len(self.days) == 0:
+            return []
+        # Stand zu Beginn ist der des letzten Handelstags am oder vor start_date
+        first = max(int(np.searchsorted(self.days, start, side="right")) - 1, 0)
+        last = int(np.searchsorted(self.days, end, side="right")) - 1
+        if last < first:
+            return []
+        block = np.unpackbits(self.bits[:, first // 8:last // 8 + 1], axis=1)
+        offset = first - (first // 8) * 8
+        active = block[:, offset:offset + last - first + 1].any(axis=1)
+        return [self.tickers[i] for i in np.flatnonzero(active)]
+
+    def mask(self, ticker: str, dates: np.ndarray) -> np.ndarray:
+        """
+        Mitgliedschaftsmaske eines Tickers für die übergebenen Tagesnummern.
+        Tage ohne Eintrag (z.B. Feiertage) und Tage nach dem Ende des Rasters
+        erben den Stand des letzten Handelstags davor; Tage davor sind False.
+        """
+        dates = np.asarray(dates, dtype=np.int64)
+        result = np.zeros(len(dates), dtype=bool)
+        row = self._index.get(ticker)
+        if row is None or len(self.days) == 0:
+            return result
+
+        members = np.unpackbits(self.bits[row], count=len(self.days)).astype(bool)
+        positions = np.searchsorted(self.days, dates, side="right") - 1
+        valid = positions >= 0
+        result[valid] = members[positions[valid]]
+        return result
+
+
+class UniverseStore:
+    """
+    Lädt Universen beim ersten Zugriff aus UNIVERSE_DIR und hält sie im Speicher
+    """
+
+    def __init__(self, directory: str = UNIVERSE_DIR):
+        self.directory = directory
+        self._lock = threading.Lock()
+        self._universes: Dict[str, UniverseMembership] = {}
+
+    def get(self, name: str) -> Optional[UniverseMembership]:
+        """
+        Gibt das Universum zurück oder None, wenn keine CSV dafür existiert
+        """
+        key = name.upper()
+        with self._lock:
+            if key not in self._universes:
+                path = os.path.join(self.directory, f"{key}.csv")
+                if not os.path.exists(path):
+                    return None
+                self._universes[key] = UniverseMembership.from_csv(key, path)
+            return self._universes[key]
+
+
+universes = UniverseStore()
+
+
+def resolve_tickers(
+    tickers: Optional[List[str]],
+    universe_name: Optional[str],
+    start_date: datetime,
+    end_date: Optional[datetime] = None
+) -> Tuple[List[str], Optional[UniverseMembership]]:
+    """
+    Bestimmt die Ticker einer Anfrage aus einer expliziten Liste und/oder
+    einem Universum. Mit Universum werden nur Ticker verwendet, die im
+    Zeitraum (bzw. am Stichtag start_date) Mitglied waren; eine explizite
+    Liste wird darauf eingeschränkt.
+
+    Ohne tickers und universe wird ValueError ausgelöst, für ein unbekanntes
+    Universum LookupError.
+    """
+    if not universe_name:
+        if tickers is None:
+            raise ValueError("Entweder tickers oder universe muss angegeben werden")
+        return tickers, None
+
+    universe = universes.get(universe_name)
+    if universe is None:
+        raise LookupError(f"Universum {universe_name} nicht gefunden")
+
+    members = universe.tickers_between(start_date, end_date or start_date)
+    if tickers:
+        allowed = set(members)
+        members = [ticker for ticker in tickers if ticker in allowed]
+    return members, universe
+
+
+def resolve_request_tickers(
+    tickers: Optional[List[str]],
+    universe_name: Optional[str],
+    start_date: datetime,
+    end_date: Optional[datetime] = None
+) -> Tuple[List[str], Optional[UniverseMembership]]:
+    """
+    resolve_tickers für Endpunkte: 400 ohne tickers und universe, 404 für
+    ein unbekanntes Universum
+    """
+    try:
+        return resolve_tickers(tickers, universe_name, start_date, end_date)
+    except LookupError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
@@ -0,0 +1,34 @@
+"""Name-Spalte für materialisierte Screenings
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-19
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0001"
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    inspector = sa.inspect(op.get_bind())
+    if not inspector.has_table("screens"):
+        # Frische Datenbank: create_all legt die Tabelle vollständig an
+        return
+
+    columns = {column["name"] for column in inspector.get_columns("screens")}
+    if "name" not in columns:
+        op.add_column("screens", sa.Column("name", sa.String(), nullable=True))
+
+    indexes = {index["name"] for index in inspector.get_indexes("screens")}
+    if "ix_screens_name_date" not in indexes:
+        op.create_index("ix_screens_name_date", "screens", ["name", "date"])
+
+
+def downgrade() -> None:
+    op.drop_index("ix_screens_name_date", table_name="screens")
+    op.drop_column("screens", "name")
@@ -0,0 +1,30 @@
+"""Änderungszeitpunkt für Screenings (ETag/Last-Modified)
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-19
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0002"
+down_revision = "0001"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    inspector = sa.inspect(op.get_bind())
+    if not inspector.has_table("screens"):
+        # Frische Datenbank: create_all legt die Tabelle vollständig an
+        return
+
+    columns = {column["name"] for column in inspector.get_columns("screens")}
+    if "updated_at" not in columns:
+        op.add_column("screens", sa.Column("updated_at", sa.DateTime(), nullable=True))
+        op.execute("UPDATE screens SET updated_at = created_at")
+
+
+def downgrade() -> None:
+    op.drop_column("screens", "updated_at")
@@ -0,0 +1,82 @@
+"""Indizierte Kennzahl-Spalten für Backtest-Ranglisten
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-19
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0003"
+down_revision = "0002"
+branch_labels = None
+depends_on = None
+
+# Aus dem metrics-JSON übernommene Kennzahlen
+PROMOTED_COLUMNS = ["win_rate", "net_profit_percent"]
+
+INDEXED_COLUMNS = [
+    "strategy_id", "total_trades", "profit_factor", "sharpe_ratio",
+    "max_drawdown", "cagr", "win_rate", "net_profit_percent",
+    # max(created_at) für die Versionsstände der Listen (ETag/Last-Modified)
+    "created_at",
+]
+
+BACKFILL_BATCH_SIZE = 5000
+
+
+def upgrade() -> None:
+    bind = op.get_bind()
+    inspector = sa.inspect(bind)
+    if not inspector.has_table("backtest_results"):
+        # Frische Datenbank: create_all legt die Tabelle vollständig an
+        return
+
+    columns = {column["name"] for column in inspector.get_columns("backtest_results")}
+    added = [name for name in PROMOTED_COLUMNS if name not in columns]
+    for name in added:
+        op.add_column("backtest_results", sa.Column(name, sa.Float(), nullable=True))
+
+    if added:
+        # Werte batchweise aus dem metrics-JSON übernehmen
+        results = sa.table(
+            "backtest_results",
+            sa.column("id", sa.Integer),
+            sa.column("metrics", sa.JSON),
+            *[sa.column(name, sa.Float) for name in PROMOTED_COLUMNS]
+        )
+        last_id = 0
+        while True:
+            rows = bind.execute(
+                sa.select(results.c.id, results.c.metrics)
+                .where(results.c.id > last_id)
+                .order_by(results.c.id)
+                .limit(BACKFILL_BATCH_SIZE)
+            ).all()
+            if not rows:
+                break
+            updates = [
+                {"row_id": row_id, **{name: (metrics or {}).get(name) for name in PROMOTED_COLUMNS}}
+                for row_id, metrics in rows
+            ]
+            bind.execute(
+                results.update()
+                .where(results.c.id == sa.bindparam("row_id"))
+                .values({name: sa.bindparam(name) for name in PROMOTED_COLUMNS}),
+                updates
+            )
+            last_id = rows[-1][0]
+
+    indexes = {index["name"] for index in inspector.get_indexes("backtest_results")}
+    for name in INDEXED_COLUMNS:
+        index_name = f"ix_backtest_results_{name}"
+        if index_name not in indexes:
+            op.create_index(index_name, "backtest_results", [name])
+
+
+def downgrade() -> None:
+    for name in INDEXED_COLUMNS:
+        op.drop_index(f"ix_backtest_results_{name}", table_name="backtest_results")
+    for name in PROMOTED_COLUMNS:
+        op.drop_column("backtest_results", name)
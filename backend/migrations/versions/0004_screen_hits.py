@@ -0,0 +1,51 @@
+"""Umgekehrter Index Ticker -> Screenings (screen_hits), GIN-Index auf PostgreSQL
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-19
+
+Bestehende Screenings werden anschließend über POST /screen/hits/backfill
+in screen_hits nachgetragen.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0004"
+down_revision = "0003"
+branch_labels = None
+depends_on = None
+
+GIN_INDEX = "ix_screens_results_tickers_gin"
+
+
+def upgrade() -> None:
+    bind = op.get_bind()
+    inspector = sa.inspect(bind)
+    if not inspector.has_table("screens"):
+        # Frische Datenbank: create_all legt screen_hits und den GIN-Index an
+        return
+
+    if not inspector.has_table("screen_hits"):
+        op.create_table(
+            "screen_hits",
+            sa.Column("id", sa.Integer(), primary_key=True),
+            sa.Column("screen_id", sa.Integer(), sa.ForeignKey("screens.id")),
+            sa.Column("ticker", sa.String()),
+            sa.Column("date", sa.DateTime()),
+        )
+        op.create_index("ix_screen_hits_id", "screen_hits", ["id"])
+        op.create_index("ix_screen_hits_screen_id", "screen_hits", ["screen_id"])
+        op.create_index("ix_screen_hits_ticker_date", "screen_hits", ["ticker", "date"])
+
+    # Alternative Abfrage direkt auf results (GET /screen/by-ticker/{ticker}?source=jsonb)
+    if bind.dialect.name == "postgresql":
+        op.execute(
+            f"CREATE INDEX IF NOT EXISTS {GIN_INDEX} ON screens "
+            "USING gin (((results::jsonb) -> 'tickers') jsonb_path_ops)"
+        )
+
+
+def downgrade() -> None:
+    if op.get_bind().dialect.name == "postgresql":
+        op.execute(f"DROP INDEX IF EXISTS {GIN_INDEX}")
+    op.drop_table("screen_hits")
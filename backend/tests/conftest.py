@@ -0,0 +1,45 @@
+import os
+import tempfile
+
+# Eigene SQLite-Datenbank für die Tests; muss vor dem Import von app.database gesetzt sein
+_DB_DIR = tempfile.mkdtemp(prefix="trading-tests-")
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(_DB_DIR, 'test.db')}"
+os.environ["SCREEN_SCHEDULER_ENABLED"] = "false"
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.database import Base, SessionLocal, engine
+from app.main import app
+from app.services.http_cache import versions
+
+CACHED_KINDS = ("strategy", "strategies", "backtest", "backtests", "screen", "screens")
+
+
+@pytest.fixture
+def db():
+    """
+    Leere Datenbank je Test
+    """
+    Base.metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+    versions.invalidate(*CACHED_KINDS)
+    session = SessionLocal()
+    try:
+        yield session
+    finally:
+        session.close()
+
+
+@pytest.fixture
+def client(db):
+    return TestClient(app)
+
+
+@pytest.fixture
+def demo_client(client):
+    """
+    Client mit den Demo-Daten (Strategien, Trades, Backtests, Screenings)
+    """
+    assert client.post("/demo-data").json() == {"message": "Demo-Daten erfolgreich erstellt"}
+    return client
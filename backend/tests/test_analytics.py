@@ -0,0 +1,121 @@
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+from app.services import analytics
+from app.services.adjustments import adjustments
+from app.services.analytics import (
+    UniverseStatistics,
+    correlation_clusters,
+    correlation_matrix,
+    percentile_ranks,
+    rolling_relative_strength,
+    run_screen_analytics,
+    universe_statistics,
+    window_growth,
+)
+
+
+def _returns(days=250, tickers=6, seed=7):
+    rng = np.random.default_rng(seed)
+    common = rng.normal(0, 0.01, (days, 1))
+    returns = common + rng.normal(0, 0.01, (days, tickers))
+    # Börsengang nach 60 Tagen und einzelne fehlende Kurse
+    returns[:60, 1] = np.nan
+    returns[[10, 100, 230], 3] = np.nan
+    return returns
+
+
+def test_correlation_matches_pandas_pairwise():
+    returns = _returns()
+
+    expected = pd.DataFrame(returns).corr(min_periods=20).to_numpy()
+
+    np.testing.assert_allclose(correlation_matrix(returns, min_periods=20), expected, atol=1e-10)
+
+
+def test_correlation_needs_min_periods_of_common_days():
+    returns = _returns()
+    returns[:, 4] = np.nan
+    returns[:5, 4] = 0.01
+
+    correlation = correlation_matrix(returns, min_periods=10)
+
+    assert np.isnan(correlation[4, 0]) and np.isnan(correlation[0, 4])
+    assert not np.isnan(correlation[0, 1])
+
+
+def test_window_growth_matches_pandas_rolling_product():
+    returns = _returns()
+
+    expected = (1 + pd.DataFrame(returns)).rolling(20).apply(np.prod, raw=True).to_numpy()
+
+    np.testing.assert_allclose(window_growth(returns, 20), expected, rtol=1e-10)
+
+
+def test_window_growth_ignores_gaps_before_the_window():
+    returns = np.array([[np.nan], [np.nan], [0.01], [0.01], [0.01]])
+
+    growth = window_growth(returns, 2)
+
+    assert np.isnan(growth[:3, 0]).all()
+    np.testing.assert_allclose(growth[3:, 0], [1.01 ** 2, 1.01 ** 2])
+
+
+def test_relative_strength_matches_pandas():
+    returns = _returns()
+    benchmark = np.nanmean(returns, axis=1)
+
+    frame = 1 + pd.DataFrame(returns)
+    expected = frame.rolling(63).apply(np.prod, raw=True).div(
+        (1 + pd.Series(benchmark)).rolling(63).apply(np.prod, raw=True), axis=0
+    ).to_numpy()
+
+    np.testing.assert_allclose(rolling_relative_strength(returns, benchmark, 63), expected, rtol=1e-10)
+
+
+def test_universe_statistics_keep_recently_listed_tickers():
+    returns = _returns()
+
+    stats = UniverseStatistics([f"T{i}" for i in range(returns.shape[1])], np.arange(len(returns) + 1), returns, 63)
+
+    # T3 hat eine Lücke im letzten Fenster, T1 nur vor dem Fenster
+    assert len(stats.window_returns) == returns.shape[1] - 1
+    assert np.all(np.diff(stats.window_returns) >= 0)
+
+
+def test_percentile_ranks_and_clusters():
+    reference = np.array([-0.1, 0.0, 0.1, 0.2])
+    ranks = percentile_ranks(np.array([0.05, 0.3, np.nan]), reference)
+    np.testing.assert_allclose(ranks[:2], [50.0, 100.0])
+    assert np.isnan(ranks[2])
+
+    correlation = np.array([
+        [1.0, 0.9, 0.1, np.nan],
+        [0.9, 1.0, 0.2, 0.0],
+        [0.1, 0.2, 1.0, 0.8],
+        [np.nan, 0.0, 0.8, 1.0],
+    ])
+    assert correlation_clusters(correlation, 0.7).tolist() == [0, 0, 2, 2]
+
+
+def test_universe_statistics_follow_corporate_actions(monkeypatch):
+    returns = _returns()
+
+    def fake_matrix(tickers, day, lookback, adjustment, days=None, cancel_token=None):
+        return np.arange(len(returns) + 1), returns[:, :len(tickers)]
+
+    monkeypatch.setattr(analytics, "build_return_matrix", fake_matrix)
+    universe_statistics.clear()
+    universe = ["T0", "T1", "T2"]
+
+    def cached(adjustment):
+        result = run_screen_analytics(["T0"], universe, "test", datetime(2024, 6, 3), window=20, adjustment=adjustment)
+        return result['universe']['cached']
+
+    assert [cached("split"), cached("split"), cached("none")] == [False, True, False]
+
+    # Neue Corporate Action: adjustierte Statistiken neu, unadjustierte bleiben gültig
+    adjustments.invalidate("T0")
+    assert [cached("split"), cached("none")] == [False, True]
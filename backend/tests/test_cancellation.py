@@ -0,0 +1,91 @@
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+from app.services.exits import iter_exits
+from app.services.jobs import CancellationToken
+from app.services.trading_service import CANCEL_CHECK_BARS, backtest_ticker_trades, load_stock_data, run_backtest
+
+START = datetime(2000, 1, 1)
+END = datetime(2020, 12, 31)
+PARAMS = {"type": "ma_cross", "ma_length": 5}
+
+
+class CountingToken(CancellationToken):
+    """
+    Gilt nach checks Prüfungen als abgebrochen
+    """
+
+    def __init__(self, checks):
+        super().__init__()
+        self.checks = checks
+        self.calls = 0
+
+    @property
+    def is_cancelled(self):
+        self.calls += 1
+        if self.calls > self.checks:
+            self.cancel()
+        return super().is_cancelled
+
+
+def test_long_ticker_is_checked_between_chunks_of_bars():
+    df = load_stock_data("AAPL", START, END)
+    trades = list(backtest_ticker_trades(df, "AAPL", PARAMS))
+
+    token = CountingToken(3)
+    partial = list(backtest_ticker_trades(df, "AAPL", PARAMS, cancel_token=token))
+
+    assert 0 < len(partial) < len(trades)
+    assert partial == trades[:len(partial)]
+    assert token.calls == 4
+
+    # Ohne Abbruch höchstens eine Prüfung je CANCEL_CHECK_BARS Balken
+    token = CountingToken(len(df))
+    assert list(backtest_ticker_trades(df, "AAPL", PARAMS, cancel_token=token)) == trades
+    assert token.calls <= len(df) // CANCEL_CHECK_BARS + 2 < len(trades)
+
+
+def test_ticker_without_trades_is_cancelled_after_signals():
+    df = load_stock_data("AAPL", START, END)
+    token = CancellationToken()
+    token.cancel()
+
+    assert list(backtest_ticker_trades(df, "AAPL", {"type": "ma_cross", "ma_length": 100000}, cancel_token=token)) == []
+
+
+def test_run_backtest_marks_interrupted_ticker_as_partial():
+    results = run_backtest(PARAMS, ["AAPL", "MSFT"], START, END, cancel_token=CountingToken(3))
+
+    assert results["partial"] is True
+    assert results["cancel_reason"] == "cancelled"
+    assert results["tickers_processed"] == 0
+    assert results["trades"]
+
+
+def test_zero_time_budget_cancels_immediately():
+    results = run_backtest(PARAMS, ["AAPL"], START, END, cancel_token=CancellationToken(max_seconds=0))
+
+    assert results["partial"] is True
+    assert results["cancel_reason"] == "time_budget_exceeded"
+    assert results["trades"] == []
+
+
+def test_long_holding_is_checked_while_searching_for_the_stop():
+    # Ein Einstieg, Stop erst nach 5000 Balken
+    bars = 6000
+    low = np.full(bars, 99.0)
+    low[5000] = 80.0
+    df = pd.DataFrame({"open": 100.0, "high": 101.0, "low": low, "close": 100.0})
+    entries = np.zeros(bars, dtype=bool)
+    entries[0] = True
+
+    token = CountingToken(len(df))
+    trades = list(iter_exits(df, entries, stop_loss_percent=10, cancel_token=token, cancel_check_bars=256))
+    assert [trade["exit_index"] for trade in trades] == [5000]
+    assert 5000 // 256 <= token.calls <= 5000 // 256 + 2
+
+    token = CountingToken(3)
+    assert list(iter_exits(df, entries, stop_loss_percent=10, cancel_token=token, cancel_check_bars=256)) == []
+    assert token.calls == 4
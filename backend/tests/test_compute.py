@@ -0,0 +1,49 @@
+import asyncio
+import threading
+
+import pytest
+from fastapi import HTTPException
+
+from app.services.compute import COMPUTE_RETRY_AFTER, ComputePool
+
+
+def test_requests_beyond_queue_depth_are_rejected_with_429():
+    pool = ComputePool(concurrency=1, queue_depth=1, processes=1)
+    release = threading.Event()
+
+    async def scenario():
+        running = [asyncio.ensure_future(pool.run(release.wait)) for _ in range(2)]
+        await asyncio.sleep(0.05)
+        with pytest.raises(HTTPException) as rejected:
+            await pool.run(lambda: None)
+        stats = pool.stats()
+        release.set()
+        await asyncio.gather(*running)
+        return rejected.value, stats
+
+    try:
+        error, stats = asyncio.run(scenario())
+    finally:
+        pool.close()
+
+    assert error.status_code == 429
+    assert error.headers == {"Retry-After": str(COMPUTE_RETRY_AFTER)}
+    assert stats == {"concurrency": 1, "queue_depth": 1, "processes": 1, "running": 1, "queued": 1, "rejected": 1}
+    assert pool.stats()["running"] == 0 and pool.stats()["queued"] == 0
+
+
+def test_admission_slot_is_released_after_errors():
+    pool = ComputePool(concurrency=1, queue_depth=0, processes=1)
+
+    def fail():
+        raise ValueError("kaputt")
+
+    async def scenario():
+        with pytest.raises(ValueError):
+            await pool.run(fail)
+        return await pool.run(lambda: 42)
+
+    try:
+        assert asyncio.run(scenario()) == 42
+    finally:
+        pool.close()
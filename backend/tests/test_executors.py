@@ -0,0 +1,83 @@
+import threading
+from datetime import datetime
+
+import numpy as np
+import pytest
+
+from app.services import analytics, trading_service
+from app.services.analytics import build_return_matrix
+from app.services.compute import compute_pool
+from app.services.executors import TcpBackend, WorkerServer, _WorkerHandler, get_executor, run_backtest_distributed
+from app.services.trading_service import run_backtest, run_screen_batch
+
+TICKERS = ["AAPL", "MSFT", "NVDA", "AMZN", "META"]
+START = datetime(2021, 1, 1)
+END = datetime(2022, 12, 31)
+PARAMS = {"type": "ma_cross", "ma_length": 10, "stop_loss_percent": 3}
+
+
+def _run(executor, adjustment="none"):
+    return run_backtest_distributed(PARAMS, TICKERS, START, END, executor=executor, adjustment=adjustment, unit_size=2)
+
+
+@pytest.fixture(scope="module")
+def tcp_worker():
+    server = WorkerServer(("127.0.0.1", 0), _WorkerHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield TcpBackend([server.server_address])
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture(scope="module", autouse=True)
+def close_pool():
+    yield
+    compute_pool.close()
+
+
+@pytest.mark.parametrize("name", ["inprocess", "process"])
+def test_executors_match_run_backtest(db, name):
+    expected = run_backtest(PARAMS, TICKERS, START, END)
+    result = _run(get_executor(name))
+
+    assert result["trades"] == expected["trades"]
+    assert result["summary"] == expected["summary"]
+    assert result["tickers_processed"] == len(TICKERS)
+
+
+def test_tcp_executor_matches_run_backtest(db, tcp_worker):
+    expected = run_backtest(PARAMS, TICKERS, START, END)
+    assert _run(tcp_worker)["trades"] == expected["trades"]
+
+
+def test_process_workers_see_new_corporate_actions(client):
+    executor = get_executor("process")
+    before = _run(executor, "split")
+    assert before["trades"] == run_backtest(PARAMS, TICKERS, START, END, adjustment="split")["trades"]
+
+    response = client.post("/data/corporate-actions", json=[
+        {"ticker": ticker, "ex_date": "2022-06-01", "action_type": "split", "value": 4} for ticker in TICKERS
+    ])
+    assert response.status_code == 200
+
+    after = _run(executor, "split")
+    assert after["trades"] != before["trades"]
+    assert after["trades"] == run_backtest(PARAMS, TICKERS, START, END, adjustment="split")["trades"]
+
+
+def test_screens_and_analytics_match_across_executors(db, monkeypatch):
+    criteria_sets = [{"min_price": 50}, {"ma_length": 20, "ma_above_price": False}]
+    outcomes = []
+    for name in ("inprocess", "process"):
+        monkeypatch.setattr(trading_service, "SCREEN_EXECUTOR", name)
+        monkeypatch.setattr(trading_service, "SCREEN_UNIT_SIZE", 2)
+        monkeypatch.setattr(analytics, "SCREEN_UNIT_SIZE", 2)
+        days, returns = build_return_matrix(TICKERS, END, 60)
+        outcomes.append((run_screen_batch(criteria_sets, TICKERS, END), days.tolist(), returns))
+
+    (screens, days, returns), (process_screens, process_days, process_returns) = outcomes
+    assert process_screens == screens
+    assert any(screens)
+    assert process_days == days
+    np.testing.assert_array_equal(process_returns, returns)
@@ -0,0 +1,71 @@
+def _get(client, url, etag=None):
+    return client.get(url, headers={"If-None-Match": etag} if etag else {})
+
+
+def test_unchanged_resources_return_304(demo_client):
+    for url in ("/strategies/", "/strategies/1", "/backtest/", "/backtest/1", "/screen/", "/screen/1"):
+        first = _get(demo_client, url)
+        assert first.status_code == 200, url
+        etag = first.headers["etag"]
+
+        again = _get(demo_client, url, etag)
+        assert again.status_code == 304, url
+        assert again.headers["etag"] == etag
+        assert again.content == b""
+
+
+def test_if_modified_since_uses_last_modified(demo_client):
+    first = _get(demo_client, "/strategies/1")
+    last_modified = first.headers["last-modified"]
+
+    response = demo_client.get("/strategies/1", headers={"If-Modified-Since": last_modified})
+
+    assert response.status_code == 304
+
+
+def test_strategy_update_invalidates_strategy_and_backtests(demo_client):
+    strategy_etag = _get(demo_client, "/strategies/1").headers["etag"]
+    list_etag = _get(demo_client, "/strategies/").headers["etag"]
+    backtests_etag = _get(demo_client, "/backtest/").headers["etag"]
+
+    demo_client.put("/strategies/1", json={"name": "Umbenannt"})
+
+    assert _get(demo_client, "/strategies/1", strategy_etag).status_code == 200
+    assert _get(demo_client, "/strategies/", list_etag).status_code == 200
+    response = _get(demo_client, "/backtest/", backtests_etag)
+    assert response.status_code == 200
+    assert "Umbenannt" in {row["strategy_name"] for row in response.json()}
+
+
+def test_strategy_create_and_delete_invalidate_the_list(demo_client):
+    etag = _get(demo_client, "/strategies/").headers["etag"]
+    created = demo_client.post("/strategies/", json={"name": "Neu", "description": "", "parameters": {}}).json()
+
+    response = _get(demo_client, "/strategies/", etag)
+    assert response.status_code == 200
+    etag = response.headers["etag"]
+
+    assert demo_client.delete(f"/strategies/{created['id']}").status_code == 200
+    assert _get(demo_client, "/strategies/", etag).status_code == 200
+
+
+def test_demo_data_invalidates_cached_lists(client):
+    etags = {url: _get(client, url).headers["etag"] for url in ("/strategies/", "/backtest/", "/screen/")}
+
+    client.post("/demo-data")
+
+    for url, etag in etags.items():
+        response = _get(client, url, etag)
+        assert response.status_code == 200, url
+        assert response.json(), url
+
+
+def test_screen_refresh_invalidates_detail_and_list(demo_client):
+    detail_etag = _get(demo_client, "/screen/1").headers["etag"]
+    list_etag = _get(demo_client, "/screen/").headers["etag"]
+
+    response = demo_client.post("/screen/1/refresh", json={"tickers": ["AAPL", "MSFT", "NVDA"], "as_of_date": "2023-06-01"})
+    assert response.status_code == 200
+
+    assert _get(demo_client, "/screen/1", detail_etag).status_code == 200
+    assert _get(demo_client, "/screen/", list_etag).status_code == 200
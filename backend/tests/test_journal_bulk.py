@@ -0,0 +1,81 @@
+from app.database import Base, engine
+from app.models.models import Trade
+from app.services.journal_stats import rebuild_journal_stats
+
+
+def _trade_ids(client):
+    return sorted(trade["id"] for trade in client.get("/journal/").json())
+
+
+def _summary(client):
+    summary = client.get("/journal/summary").json()
+    summary.pop("updated_at")
+    return summary
+
+
+def test_bulk_update_reports_each_outcome(demo_client, db):
+    trade_id, other_id = _trade_ids(demo_client)[:2]
+    other_before = demo_client.get(f"/journal/{other_id}").json()
+
+    response = demo_client.patch("/journal/bulk", json={"updates": [
+        {"id": trade_id, "exit_price": 200.0, "exit_date": "2023-06-01"},
+        {"id": 99999, "exit_date": "2023-06-01"},
+        {"id": other_id, "exit_date": "2023-13-45"},
+        {"id": trade_id, "notes": "doppelt"},
+        {"id": other_id},
+    ]})
+
+    assert response.status_code == 200
+    body = response.json()
+    assert [result["status"] for result in body["results"]] == [
+        "updated", "not_found", "invalid", "duplicate", "unchanged"
+    ]
+    assert body["updated"] == 1
+
+    trade = db.get(Trade, trade_id)
+    assert trade.is_open is False
+    assert trade.exit_date.strftime("%Y-%m-%d") == "2023-06-01"
+    assert trade.profit_loss == (200.0 - trade.entry_price) * trade.position_size
+    assert demo_client.get(f"/journal/{other_id}").json() == other_before
+
+
+def test_bulk_update_with_only_missing_ids_is_not_an_error(demo_client):
+    response = demo_client.patch("/journal/bulk", json={"updates": [
+        {"id": 99998, "exit_date": "2023-06-01"},
+        {"id": 99999, "exit_price": 10.0},
+    ]})
+
+    assert response.status_code == 200
+    assert [result["status"] for result in response.json()["results"]] == ["not_found", "not_found"]
+
+
+def test_bulk_update_matches_single_updates(demo_client):
+    first, second = _trade_ids(demo_client)[:2]
+    before = _summary(demo_client)
+
+    demo_client.put(f"/journal/{first}", json={"exit_price": 150.0, "exit_date": "2023-06-01"})
+    demo_client.put(f"/journal/{second}", json={"exit_price": 90.0, "exit_date": "2023-06-02"})
+    expected = _summary(demo_client)
+    assert expected != before
+
+    # Gleicher Ausgangsstand, diesmal per Bulk-Update
+    Base.metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+    demo_client.post("/demo-data")
+    assert _summary(demo_client) == before
+    demo_client.patch("/journal/bulk", json={"updates": [
+        {"id": first, "exit_price": 150.0, "exit_date": "2023-06-01"},
+        {"id": second, "exit_price": 90.0, "exit_date": "2023-06-02"},
+    ]})
+    assert _summary(demo_client) == expected
+
+
+def test_rebuild_matches_incremental_statistics(demo_client, db):
+    first, second = _trade_ids(demo_client)[:2]
+    demo_client.put(f"/journal/{first}", json={"exit_price": 150.0, "exit_date": "2023-06-01"})
+    demo_client.put(f"/journal/{second}", json={"exit_price": 90.0, "exit_date": "2023-06-01"})
+    incremental = _summary(demo_client)
+
+    rebuild_journal_stats(db)
+    db.commit()
+    assert _summary(demo_client) == incremental
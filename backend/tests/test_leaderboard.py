@@ -0,0 +1,136 @@
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from app.models.models import BacktestResult, Strategy
+from app.services.trading_service import BacktestAccumulator
+
+ROWS = [
+    # strategy, net_profit_percent, win_rate, total_trades, max_drawdown, profit_factor
+    ("A", 25.0, 55.0, 40, 18.0, 1.8),
+    ("A", 12.0, 62.0, 12, 6.0, 1.4),
+    ("B", 31.0, 48.0, 60, 27.0, float("inf")),
+    ("B", -4.0, 41.0, 35, 14.0, 0.9),
+    ("B", None, 50.0, 20, 10.0, 1.1),
+]
+
+
+@pytest.fixture
+def leaderboard(client, db):
+    strategies = {name: Strategy(name=name, description="", parameters={}) for name in ("A", "B")}
+    db.add_all(strategies.values())
+    db.flush()
+    db.add_all([
+        BacktestResult(
+            strategy_id=strategies[name].id,
+            start_date=datetime(2022, 1, 1),
+            end_date=datetime(2022, 12, 31),
+            net_profit_percent=net_profit,
+            win_rate=win_rate,
+            total_trades=total_trades,
+            max_drawdown=max_drawdown,
+            profit_factor=profit_factor
+        )
+        for name, net_profit, win_rate, total_trades, max_drawdown, profit_factor in ROWS
+    ])
+    db.commit()
+    return client, {name: strategy.id for name, strategy in strategies.items()}
+
+
+def _values(response, field="net_profit_percent"):
+    assert response.status_code == 200
+    return [row[field] for row in response.json()]
+
+
+def test_default_ranks_by_net_profit_and_skips_missing_values(leaderboard):
+    client, _ = leaderboard
+
+    response = client.get("/backtest/leaderboard")
+
+    assert _values(response) == [31.0, 25.0, 12.0, -4.0]
+    assert [row["rank"] for row in response.json()] == [1, 2, 3, 4]
+    # Unendlicher Profit Factor wird als null ausgegeben
+    assert response.json()[0]["profit_factor"] is None
+
+
+def test_max_drawdown_sorts_ascending_by_default(leaderboard):
+    client, _ = leaderboard
+
+    assert _values(client.get("/backtest/leaderboard", params={"metric": "max_drawdown"}), "max_drawdown") == [
+        6.0, 10.0, 14.0, 18.0, 27.0
+    ]
+
+
+def test_min_and_max_filters_combine(leaderboard):
+    client, _ = leaderboard
+
+    response = client.get(
+        "/backtest/leaderboard",
+        params=[("min", "total_trades:30"), ("max", "max_drawdown:20"), ("metric", "win_rate")]
+    )
+
+    assert _values(response, "win_rate") == [55.0, 41.0]
+
+
+def test_strategy_filter_paging_and_order(leaderboard):
+    client, strategy_ids = leaderboard
+
+    response = client.get(
+        "/backtest/leaderboard",
+        params={"strategy_id": strategy_ids["B"], "order": "asc", "limit": 1, "offset": 1}
+    )
+
+    assert _values(response) == [31.0]
+    assert response.json()[0]["rank"] == 2
+    assert response.json()[0]["strategy_name"] == "B"
+
+
+@pytest.mark.parametrize("params", [
+    {"metric": "unknown"},
+    {"min": "unknown:1"},
+    {"min": "win_rate:abc"},
+])
+def test_invalid_metrics_and_filters_are_rejected(leaderboard, params):
+    client, _ = leaderboard
+
+    assert client.get("/backtest/leaderboard", params=params).status_code in (400, 422)
+
+
+def test_sharpe_ratio_from_daily_equity_curve():
+    accumulator = BacktestAccumulator()
+    trades = [
+        (datetime(2022, 1, 5), 1500.0),
+        (datetime(2022, 1, 5), -500.0),
+        (datetime(2022, 1, 12), -800.0),
+        (datetime(2022, 1, 20), 2000.0),
+    ]
+    for exit_date, profit_loss in trades:
+        accumulator.add_trade({"exit_date": exit_date, "profit_loss": profit_loss})
+
+    days = pd.bdate_range("2022-01-03", "2022-01-31")
+    # Gewinne je Ausstiegstag, zwei Trades am 5. Januar
+    exits = pd.Series([1000.0, -800.0, 2000.0], index=pd.to_datetime(["2022-01-05", "2022-01-12", "2022-01-20"]))
+    profits = pd.Series(0.0, index=days).add(exits, fill_value=0.0)
+    returns = (100000.0 + profits.cumsum()).pct_change().fillna(profits.iloc[0] / 100000.0)
+    expected = returns.mean() / returns.std() * np.sqrt(252)
+
+    summary = accumulator.summary(datetime(2022, 1, 3), datetime(2022, 1, 31))
+    assert summary["sharpe_ratio"] == pytest.approx(expected)
+    assert BacktestAccumulator().sharpe_ratio(datetime(2022, 1, 3), datetime(2022, 1, 31)) is None
+
+
+def test_saved_backtest_stores_its_sharpe_ratio(client):
+    response = client.post("/backtest/", json={
+        "tickers": ["AAPL", "MSFT"],
+        "strategy_params": {"type": "ma_cross", "ma_length": 10, "stop_loss_percent": 3},
+        "start_date": "2021-01-01",
+        "end_date": "2022-12-31"
+    })
+    assert response.status_code == 200
+    sharpe_ratio = response.json()["summary"]["sharpe_ratio"]
+    assert sharpe_ratio is not None
+
+    ranked = client.get("/backtest/leaderboard", params={"metric": "sharpe_ratio"}).json()
+    assert [row["sharpe_ratio"] for row in ranked] == [pytest.approx(sharpe_ratio)]
@@ -0,0 +1,55 @@
+from datetime import datetime
+
+from sqlalchemy import delete, select
+
+from app.models.models import Screen, ScreenHit
+from app.services.screen_hits import backfill_screen_hits
+
+
+def _hits(db, screen_id=None):
+    query = select(ScreenHit.screen_id, ScreenHit.ticker).order_by(ScreenHit.screen_id, ScreenHit.ticker)
+    if screen_id is not None:
+        query = query.where(ScreenHit.screen_id == screen_id)
+    return db.execute(query).all()
+
+
+def test_demo_screens_write_hits(demo_client, db):
+    screens = db.query(Screen).order_by(Screen.id).all()
+
+    expected = sorted((screen.id, ticker) for screen in screens for ticker in screen.results["tickers"])
+    assert _hits(db) == expected
+
+
+def test_by_ticker_lists_matching_screens_newest_first(demo_client):
+    response = demo_client.get("/screen/by-ticker/AAPL")
+
+    assert response.status_code == 200
+    assert [screen["screen_id"] for screen in response.json()["screens"]] == [1]
+    assert demo_client.get("/screen/by-ticker/NKE", params={"end_date": "2023-05-19"}).json()["count"] == 0
+    assert demo_client.get("/screen/by-ticker/NKE", params={"start_date": "2023-05-20"}).json()["count"] == 1
+
+
+def test_refresh_replaces_the_hits_of_a_screen(demo_client, db):
+    response = demo_client.post("/screen/1/refresh", json={"tickers": ["AAPL", "MSFT", "NVDA"], "as_of_date": "2023-06-01"})
+    assert response.status_code == 200
+
+    tickers = [ticker for _, ticker in _hits(db, 1)]
+    assert tickers == sorted(ticker["ticker"] for ticker in response.json()["results"])
+
+
+def test_backfill_indexes_screens_without_hits_once(demo_client, db):
+    db.add_all([
+        Screen(date=datetime(2023, 6, day), filter_criteria={}, results={"tickers": ["AAPL", "AAPL", "TSLA"]})
+        for day in (1, 2, 3)
+    ])
+    db.add(Screen(date=datetime(2023, 6, 4), filter_criteria={}, results=None))
+    db.execute(delete(ScreenHit).where(ScreenHit.screen_id == 2))
+    db.commit()
+
+    assert backfill_screen_hits(db, batch_size=2) == 6 + 6
+    assert backfill_screen_hits(db) == 0
+    assert demo_client.post("/screen/hits/backfill").json()["written"] == 0
+
+    tsla = demo_client.get("/screen/by-ticker/TSLA").json()
+    assert [screen["date"] for screen in tsla["screens"]] == ["2023-06-03", "2023-06-02", "2023-06-01"]
+    assert demo_client.get("/screen/by-ticker/NKE").json()["count"] == 1
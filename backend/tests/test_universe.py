@@ -0,0 +1,85 @@
+from datetime import datetime, timedelta
+
+import numpy as np
+import pytest
+
+from app.services.dates import day_numbers
+from app.services.universe import UniverseMembership, UniverseStore
+
+INTERVALS = """symbol,start_date,end_date
+AAPL,2020-01-02,
+MSFT,2020-01-02,2021-06-30
+NVDA,2021-01-04,
+MSFT,2022-03-01,2022-09-30
+"""
+
+SERIES = """symbol,date,in_index
+AAPL,2020-01-02,1
+AAPL,2020-01-03,1
+MSFT,2020-01-02,1
+MSFT,2020-01-03,0
+"""
+
+
+@pytest.fixture
+def store(tmp_path):
+    (tmp_path / "TEST.csv").write_text(INTERVALS)
+    (tmp_path / "DAILY.csv").write_text(SERIES)
+    return UniverseStore(str(tmp_path))
+
+
+def test_intervals_respect_start_and_end(store):
+    universe = store.get("test")
+
+    assert universe.members_on(datetime(2019, 12, 31)) == []
+    assert universe.members_on(datetime(2020, 6, 1)) == ["AAPL", "MSFT"]
+    assert universe.members_on(datetime(2021, 6, 30)) == ["AAPL", "MSFT", "NVDA"]
+    assert universe.members_on(datetime(2021, 7, 1)) == ["AAPL", "NVDA"]
+    assert universe.members_on(datetime(2022, 5, 2)) == ["AAPL", "MSFT", "NVDA"]
+    assert universe.tickers_between(datetime(2021, 7, 1), datetime(2022, 1, 31)) == ["AAPL", "NVDA"]
+
+
+def test_open_ended_members_stay_members_after_loading(store):
+    universe = store.get("TEST")
+    today = datetime.now()
+
+    for day in (today, today + timedelta(days=1), today + timedelta(days=400)):
+        assert universe.members_on(day) == ["AAPL", "NVDA"]
+    assert universe.tickers_between(today, today + timedelta(days=30)) == ["AAPL", "NVDA"]
+
+    days = day_numbers([datetime(2019, 12, 31), datetime(2022, 10, 3), today + timedelta(days=1)])
+    assert universe.mask("AAPL", days).tolist() == [False, True, True]
+    assert universe.mask("MSFT", days).tolist() == [False, False, False]
+
+
+def test_daily_series_carries_the_last_state_forward(store):
+    universe = store.get("DAILY")
+
+    assert universe.members_on(datetime(2020, 1, 2)) == ["AAPL", "MSFT"]
+    # Wochenende und Tage nach dem letzten Eintrag erben den letzten Stand
+    assert universe.members_on(datetime(2020, 1, 5)) == ["AAPL"]
+    assert universe.members_on(datetime(2030, 1, 1)) == ["AAPL"]
+    assert universe.mask("MSFT", day_numbers([datetime(2020, 1, 2), datetime(2030, 1, 1)])).tolist() == [True, False]
+
+
+def test_unknown_universe_and_ticker(store):
+    assert store.get("MISSING") is None
+    assert not store.get("TEST").mask("TSLA", np.array([18500])).any()
+
+
+def test_bitmap_is_packed(store):
+    universe = store.get("TEST")
+
+    assert universe.bits.dtype == np.uint8
+    assert universe.bits.shape == (3, (len(universe.days) + 7) // 8)
+    assert isinstance(universe, UniverseMembership)
+
+
+@pytest.mark.parametrize("url, body", [
+    ("/screen/", {"criteria": {}, "save_results": False}),
+    ("/backtest/", {"strategy_params": {}, "start_date": "2022-01-01", "end_date": "2022-03-01", "save_results": False}),
+])
+def test_endpoints_map_ticker_errors_to_http(client, url, body):
+    assert client.post(url, json=body).status_code == 400
+    assert client.post(url, json={**body, "universe": "MISSING"}).status_code == 404
+    assert client.post(url, json={**body, "tickers": []}).status_code == 200